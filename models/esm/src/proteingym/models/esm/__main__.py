@@ -1,3 +1,4 @@
+import contextlib
 from pathlib import Path
 from typing import Annotated
 
@@ -7,6 +8,7 @@ from proteingym.base import Subsets
 from proteingym.base.model import ModelCard
 from rich.console import Console
 
+from .cache import MarginalsCache, ScoreCache
 from .model import infer, load
 
 app = typer.Typer(
@@ -21,6 +23,7 @@ class ContainerTrainingJobPath:
     PREFIX = Path("/opt/program")
     MODEL_CARD_PATH = PREFIX / "README.md"
     OUTPUT_PATH = PREFIX / "output"
+    CACHE_PATH = PREFIX / "cache"
 
 
 @app.command()
@@ -55,6 +58,12 @@ def train(
             help="Path to the model card markdown file",
         ),
     ] = ContainerTrainingJobPath.MODEL_CARD_PATH,
+    cache_dir: Annotated[
+        Path,
+        typer.Option(
+            help="Directory of the persistent score cache, used if it exists",
+        ),
+    ] = ContainerTrainingJobPath.CACHE_PATH,
 ):
     subsets = Subsets.from_path(dataset_file)
     dataset = subsets[split].dataset
@@ -68,14 +77,23 @@ def train(
 
     console.print(f"Predicting on {len(all_sequences)} sequences...")
 
-    df = infer(
-        sequences=all_sequences,
-        dataset=dataset,
-        target=target,
-        model_card=model_card,
-        model=model,
-        alphabet=alphabet,
-    )
+    with contextlib.ExitStack() as stack:
+        cache, marginals_cache = None, None
+        if cache_dir.is_dir():
+            cache = stack.enter_context(ScoreCache(cache_dir / "scores.sqlite"))
+            marginals_cache = MarginalsCache(cache_dir / "marginals")
+            console.print(f"Using score cache in {cache_dir}")
+
+        df = infer(
+            sequences=all_sequences,
+            dataset=dataset,
+            target=target,
+            model_card=model_card,
+            model=model,
+            alphabet=alphabet,
+            cache=cache,
+            marginals_cache=marginals_cache,
+        )
 
     console.print(f"Got {len(df)} predictions")
 
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import torch
+
+# SQLite versions before 3.32 limit a statement to 999 parameters
+LOOKUP_CHUNK_SIZE = 900
+
+
+def score_key(location: str, scoring_strategy: str, wt_seq: str, sequence: str) -> str:
+    """Content address of the score of a sequence.
+
+    Args:
+        location: The model checkpoint, as in the model card
+        scoring_strategy: The scoring strategy, as in the model card
+        wt_seq: The wildtype sequence the sequence is scored against
+        sequence: The scored sequence
+
+    Returns:
+        str: The SHA-256 hex digest of all four fields
+    """
+    return _digest(location, scoring_strategy, wt_seq, sequence)
+
+
+def marginals_key(location: str, scoring_strategy: str, wt_seq: str) -> str:
+    """Content address of the marginals of a wildtype sequence.
+
+    Args:
+        location: The model checkpoint, as in the model card
+        scoring_strategy: The marginal scoring strategy, as in the model card
+        wt_seq: The wildtype sequence
+
+    Returns:
+        str: The SHA-256 hex digest of all three fields
+    """
+    return _digest(location, scoring_strategy, wt_seq)
+
+
+def _digest(*fields: str) -> str:
+    """SHA-256 hex digest of string fields."""
+    digest = hashlib.sha256()
+    for field in fields:
+        digest.update(field.encode())
+        # separate the fields, which never contain NUL bytes
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """A persistent SQLite map from `score_key` to score.
+
+    The cache is shared by container runs through a mounted volume, so that
+    sequences scored for one dataset, split, fold or target are not scored
+    again for another. Concurrent runs may share the file: it is opened in
+    WAL mode, and every `put_many` is a single transaction.
+
+    Example:
+        >>> with ScoreCache(Path("/opt/program/cache/scores.sqlite")) as cache:
+        ...     cached = cache.get_many(keys)
+        ...     cache.put_many(new_scores)
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def get_many(self, keys: list[str]) -> dict[str, float]:
+        """Look up the cached scores of many keys.
+
+        Args:
+            keys: The keys to look up
+
+        Returns:
+            dict[str, float]: The score of every cached key; missing keys are
+                left out
+        """
+        scores = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start : start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            scores.update(
+                self._connection.execute(
+                    f"SELECT key, score FROM scores WHERE key IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return scores
+
+    def put_many(self, scores: dict[str, float]) -> None:
+        """Store many scores, replacing those of existing keys.
+
+        Args:
+            scores: The score of every key
+        """
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)",
+                scores.items(),
+            )
+
+
+class MarginalsCache:
+    """A directory of wildtype marginal matrices, one file per `marginals_key`.
+
+    Marginals are stored with `torch.save` and loaded memory-mapped, so that
+    scoring on CPU reads only the rows of the mutated positions. Files are
+    written atomically, so concurrent runs computing the same marginals at
+    worst both write them.
+
+    Example:
+        >>> cache = MarginalsCache(Path("/opt/program/cache/marginals"))
+        >>> token_probs = cache.load(key)
+        >>> if token_probs is None:
+        ...     token_probs = compute_masked_marginals(batch_tokens, model, alphabet)
+        ...     cache.save(key, token_probs)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def path(self, key: str) -> Path:
+        """Return the file holding the marginals of a key."""
+        return self.directory / f"{key}.pt"
+
+    def load(self, key: str) -> torch.Tensor | None:
+        """Load the marginals of a key, memory-mapped on the CPU.
+
+        Args:
+            key: The `marginals_key` of the marginals
+
+        Returns:
+            torch.Tensor | None: The marginals, or None if they are not cached
+        """
+        path = self.path(key)
+        if not path.exists():
+            return None
+        return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+    def save(self, key: str, token_probs: torch.Tensor) -> Path:
+        """Store the marginals of a key.
+
+        Args:
+            key: The `marginals_key` of the marginals
+            token_probs: The marginals, on any device
+
+        Returns:
+            Path: The written file
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) as file:
+            torch.save(token_probs.detach().cpu().contiguous(), file)
+        os.replace(file.name, path)
+        return path
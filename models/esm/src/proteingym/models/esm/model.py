@@ -7,10 +7,14 @@ from esm.data import Alphabet
 from proteingym.base import Dataset
 from proteingym.base.model import ModelCard
 from proteingym.base.sequence import SequenceType
-from tqdm import tqdm
 
+from .cache import MarginalsCache, ScoreCache, marginals_key, score_key
+from .parallel import compute_pppls_parallel
 from .preprocess import encode
-from .utils import compute_pppl, score_sequence_difference
+from .utils import (
+    compute_masked_marginals,
+    score_sequence_differences,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +54,8 @@ def infer(
     model_card: ModelCard,
     model: torch.nn.Module,
     alphabet: Alphabet,
+    cache: ScoreCache | None = None,
+    marginals_cache: MarginalsCache | None = None,
 ) -> pl.DataFrame:
     """Generate predictions for protein mutations using an ESM model.
 
@@ -57,6 +63,10 @@ def infer(
     strategies: wild-type marginals, masked marginals, or pseudo-perplexity.
     The scoring strategy is determined by the model card.
 
+    Duplicate sequences are scored once. With a cache, the scores of
+    sequences already scored by the same checkpoint and strategy against the
+    same wildtype are looked up, and only the others are scored by the model.
+
     Args:
         sequences: List of protein sequences to score
         dataset: Dataset object containing reference sequence
@@ -64,6 +74,9 @@ def infer(
         model_card: Configuration object specifying scoring strategy and parameters
         model: The loaded ESM model for computing predictions
         alphabet: ESM alphabet for token encoding/decoding
+        cache: Optional persistent score cache, updated with the new scores
+        marginals_cache: Optional persistent cache of wildtype marginals, see
+            `score_sequences`
 
     Returns:
         pl.DataFrame: Polars DataFrame with sequences and predictions in 'pred' column
@@ -77,71 +90,160 @@ def infer(
         )
     )
 
-    scoring_strategy = model_card.hyper_parameters["scoring_strategy"]
-
-    model_device = next(model.parameters()).device
-
-    match scoring_strategy:
-        case "wt-marginals":
-            batch_tokens = encode(reference_sequence, alphabet).to(model_device)
-            with torch.no_grad():
-                token_probs = torch.log_softmax(model(batch_tokens)["logits"], dim=-1)
+    keys = {
+        seq: score_key(
+            model_card.hyper_parameters["location"],
+            model_card.hyper_parameters["scoring_strategy"],
+            reference_sequence,
+            seq,
+        )
+        for seq in sequences
+    }
+    scores = cache.get_many(list(keys.values())) if cache is not None else {}
+    misses = [seq for seq, key in keys.items() if key not in scores]
+    logger.info(
+        f"Scoring {len(misses)} of {len(keys)} unique sequences, "
+        f"{len(keys) - len(misses)} found in cache"
+    )
 
-            predictions = [
-                score_sequence_difference(
-                    seq,
+    if misses:
+        new_scores = dict(
+            zip(
+                (keys[seq] for seq in misses),
+                score_sequences(
+                    misses,
                     reference_sequence,
-                    token_probs,
+                    model_card,
+                    model,
                     alphabet,
-                )
-                for seq in tqdm(sequences, desc="Scoring mutations")
-            ]
+                    marginals_cache,
+                ),
+            )
+        )
+        if cache is not None:
+            cache.put_many(new_scores)
+        scores.update(new_scores)
 
-        case "masked-marginals":
-            batch_tokens = encode(reference_sequence, alphabet).to(model_device)
-            all_token_probs = []
+    df = pl.DataFrame(
+        {
+            "sequence": sequences,
+            "pred": [scores[keys[seq]] for seq in sequences],
+        }
+    )
 
-            for i in tqdm(range(batch_tokens.size(1)), desc="Computing marginals"):
-                batch_tokens_masked = batch_tokens.clone()
-                batch_tokens_masked[0, i] = alphabet.mask_idx
+    return df
 
-                with torch.no_grad():
-                    token_probs = torch.log_softmax(
-                        model(batch_tokens_masked)["logits"], dim=-1
-                    )
 
-                all_token_probs.append(token_probs[:, i])
+def score_sequences(
+    sequences: list[str],
+    reference_sequence: str,
+    model_card: ModelCard,
+    model: torch.nn.Module,
+    alphabet: Alphabet,
+    marginals_cache: MarginalsCache | None = None,
+) -> list[float]:
+    """Score protein sequences with the scoring strategy of the model card.
 
-            token_probs = torch.cat(all_token_probs, dim=0).unsqueeze(0)
+    With a marginals cache, the wildtype log probabilities of the marginal
+    strategies are loaded from it if present, and stored in it otherwise.
 
-            predictions = [
-                score_sequence_difference(
-                    seq,
-                    reference_sequence,
-                    token_probs,
-                    alphabet,
+    Args:
+        sequences: List of protein sequences to score
+        reference_sequence: The wildtype sequence
+        model_card: Configuration object specifying scoring strategy and parameters
+        model: The loaded ESM model for computing predictions
+        alphabet: ESM alphabet for token encoding/decoding
+        marginals_cache: Optional persistent cache of wildtype marginals
+
+    Returns:
+        list[float]: The score of every sequence, in input order
+
+    Raises:
+        ValueError: If scoring strategy is incompatible with data type
+    """
+    scoring_strategy = model_card.hyper_parameters["scoring_strategy"]
+
+    match scoring_strategy:
+        case "wt-marginals" | "masked-marginals":
+            key = marginals_key(
+                model_card.hyper_parameters["location"],
+                scoring_strategy,
+                reference_sequence,
+            )
+            token_probs = (
+                marginals_cache.load(key) if marginals_cache is not None else None
+            )
+            if token_probs is None:
+                token_probs = compute_marginals(
+                    reference_sequence, model_card, model, alphabet
                 )
-                for seq in tqdm(sequences, desc="Scoring mutations")
-            ]
+                if marginals_cache is not None:
+                    marginals_cache.save(key, token_probs)
+
+            predictions = score_sequence_differences(
+                sequences,
+                reference_sequence,
+                token_probs,
+                alphabet,
+            )
 
         case "pseudo-ppl":
-            predictions = [
-                compute_pppl(
-                    seq,
-                    model,
-                    alphabet,
-                )
-                for seq in tqdm(sequences, desc="Computing pseudo-perplexity")
-            ]
+            predictions = compute_pppls_parallel(
+                sequences,
+                model,
+                alphabet,
+                num_workers=model_card.hyper_parameters.get("num_workers", 1),
+                threads_per_worker=model_card.hyper_parameters.get(
+                    "threads_per_worker"
+                ),
+                batch_size=model_card.hyper_parameters.get("batch_size"),
+                max_tokens=model_card.hyper_parameters.get("max_tokens_per_batch"),
+            )
 
         case _:
             raise ValueError(f"Unrecognized scoring strategy: {scoring_strategy}")
 
-    df = pl.DataFrame(
-        {
-            "sequence": sequences,
-            "pred": predictions,
-        }
-    )
+    return predictions
 
-    return df
+
+def compute_marginals(
+    reference_sequence: str,
+    model_card: ModelCard,
+    model: torch.nn.Module,
+    alphabet: Alphabet,
+) -> torch.Tensor:
+    """Compute the wildtype log probabilities of a marginal scoring strategy.
+
+    Args:
+        reference_sequence: The wildtype sequence
+        model_card: Configuration object specifying scoring strategy and parameters
+        model: The loaded ESM model for computing predictions
+        alphabet: ESM alphabet for token encoding/decoding
+
+    Returns:
+        torch.Tensor: The log probabilities, shape (1, n_tokens, vocab_size)
+
+    Raises:
+        ValueError: If the scoring strategy is not a marginal strategy
+    """
+    scoring_strategy = model_card.hyper_parameters["scoring_strategy"]
+
+    model_device = next(model.parameters()).device
+    batch_tokens = encode(reference_sequence, alphabet).to(model_device)
+
+    match scoring_strategy:
+        case "wt-marginals":
+            with torch.no_grad():
+                return torch.log_softmax(model(batch_tokens)["logits"], dim=-1)
+
+        case "masked-marginals":
+            return compute_masked_marginals(
+                batch_tokens,
+                model,
+                alphabet,
+                batch_size=model_card.hyper_parameters.get("batch_size"),
+                max_tokens=model_card.hyper_parameters.get("max_tokens_per_batch"),
+            )
+
+        case _:
+            raise ValueError(f"Not a marginal scoring strategy: {scoring_strategy}")
@@ -0,0 +1,96 @@
+import logging
+import math
+import os
+
+import torch
+import torch.multiprocessing
+
+from .utils import compute_pppls
+
+logger = logging.getLogger(__name__)
+
+# shards per worker, so that workers finishing early pick up more work
+SHARDS_PER_WORKER = 4
+
+_worker_model = None
+_worker_alphabet = None
+
+
+def compute_pppls_parallel(
+    sequences: list[str],
+    model: torch.nn.Module,
+    alphabet: object,
+    num_workers: int,
+    threads_per_worker: int | None = None,
+    batch_size: int | None = None,
+    max_tokens: int | None = None,
+) -> list[float]:
+    """Compute pseudo-perplexity scores with several CPU worker processes.
+
+    The sequences are split into contiguous shards, scored by
+    `compute_pppls` in a pool of worker processes, and merged back in input
+    order. The model weights are moved to shared memory once and mapped by
+    every worker, instead of being copied or loaded per worker.
+
+    Runs in the current process if there is a single worker, a single
+    shard, or if the model is not on the CPU.
+
+    Args:
+        sequences: The protein sequences to score
+        model: A protein language model, see `compute_pppls`
+        alphabet: An alphabet object, see `compute_pppls`
+        num_workers: The number of worker processes
+        threads_per_worker: The intra-op thread count of every worker;
+            defaults to the CPU count divided by `num_workers`
+        batch_size: Optional maximum number of masked copies per forward pass
+        max_tokens: Optional maximum number of padded tokens per forward pass
+
+    Returns:
+        list[float]: The score of every sequence, in input order
+    """
+    model_device = next(model.parameters()).device
+    if model_device.type != "cpu" or num_workers <= 1 or len(sequences) <= 1:
+        if num_workers > 1:
+            logger.info(f"Scoring in a single process on {model_device}")
+        return compute_pppls(sequences, model, alphabet, batch_size, max_tokens)
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+    shard_size = math.ceil(len(sequences) / (num_workers * SHARDS_PER_WORKER))
+    shards = [
+        sequences[start : start + shard_size]
+        for start in range(0, len(sequences), shard_size)
+    ]
+    logger.info(
+        f"Scoring {len(shards)} shards with {num_workers} workers "
+        f"of {threads_per_worker} threads"
+    )
+
+    model.share_memory()
+    # fork is unsafe once the parent has started intra-op threads
+    context = torch.multiprocessing.get_context("spawn")
+    with context.Pool(
+        num_workers,
+        initializer=_init_worker,
+        initargs=(model, alphabet, threads_per_worker),
+    ) as pool:
+        shard_scores = pool.starmap(
+            _compute_shard_pppls, [(shard, batch_size, max_tokens) for shard in shards]
+        )
+    return [score for scores in shard_scores for score in scores]
+
+
+def _init_worker(model: torch.nn.Module, alphabet: object, threads: int) -> None:
+    """Keep the shared model of a worker and limit its intra-op threads."""
+    global _worker_model, _worker_alphabet
+    torch.set_num_threads(threads)
+    _worker_model, _worker_alphabet = model, alphabet
+
+
+def _compute_shard_pppls(
+    sequences: list[str], batch_size: int | None, max_tokens: int | None
+) -> list[float]:
+    """Score one shard in a worker."""
+    return compute_pppls(
+        sequences, _worker_model, _worker_alphabet, batch_size, max_tokens
+    )
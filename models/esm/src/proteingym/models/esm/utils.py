@@ -1,4 +1,9 @@
 import torch
+from tqdm import tqdm
+
+
+SCORE_CHUNK_BYTES = 1 << 26
+"""Upper bound on the encoded sequence bytes scored at once."""
 
 
 def score_sequence_difference(
@@ -35,24 +40,259 @@ def score_sequence_difference(
         >>> score = score_sequence_difference(mutant_seq, wt_seq, token_probs, alphabet)
         >>> print(f"Mutation effect score: {score}")
     """
-    if len(mutant_seq) != len(wt_seq):
+    return score_sequence_differences([mutant_seq], wt_seq, token_probs, alphabet)[0]
+
+
+def score_sequence_differences(
+    mutant_seqs: list[str],
+    wt_seq: str,
+    token_probs: torch.Tensor,
+    alphabet: object,
+) -> list[float]:
+    """Score many mutant sequences against the wildtype at once.
+
+    Equivalent to calling `score_sequence_difference` on every mutant, with
+    identical results, but the mutants are encoded into one byte tensor, the
+    mutated positions of all of them are found with a single comparison, the
+    mutant-minus-wildtype log probabilities are gathered with one indexed
+    lookup, and the differences are summed per mutant with a segment sum.
+
+    The differences are taken in the dtype and on the device of `token_probs`,
+    and summed in float64 in position order, as the per-mutant loop does.
+
+    Args:
+        mutant_seqs: The mutant protein sequences
+        wt_seq: The wildtype protein sequence
+        token_probs: Log probability tensor with shape (batch_size, seq_len + 1, vocab_size),
+                     see `score_sequence_difference`
+        alphabet: An alphabet object with a get_idx() method
+
+    Returns:
+        list[float]: The mutation effect score of every mutant, in input order
+
+    Raises:
+        ValueError: If a mutant and the wildtype have different lengths
+    """
+    if any(len(seq) != len(wt_seq) for seq in mutant_seqs):
         raise ValueError(
             "Sequences must have the same length. Indels are not supported for marginal scoring strategies."
         )
+    if not wt_seq:
+        return [0.0] * len(mutant_seqs)
+
+    wt_codes = _encode_bytes([wt_seq])[0]
+    chunk_size = max(1, SCORE_CHUNK_BYTES // len(wt_seq))
+    scores = []
+    for start in range(0, len(mutant_seqs), chunk_size):
+        chunk = mutant_seqs[start : start + chunk_size]
+        codes = _encode_bytes(chunk)
+        variant_idx, positions = (codes != wt_codes).nonzero(as_tuple=True)
+        # uint8 tensors would index as boolean masks
+        mt_codes = codes[variant_idx, positions].long()
+        wt_mutated_codes = wt_codes[positions].long()
+        lookup = _token_lookup(torch.cat([mt_codes, wt_mutated_codes]), alphabet)
+
+        # add 1 for BOS token
+        index = (1 + positions).to(token_probs.device)
+        mt_encoded = lookup[mt_codes].to(token_probs.device)
+        wt_encoded = lookup[wt_mutated_codes].to(token_probs.device)
+        differences = (
+            token_probs[0, index, mt_encoded] - token_probs[0, index, wt_encoded]
+        )
+        scores.extend(
+            torch.bincount(
+                variant_idx,
+                weights=differences.to("cpu", torch.float64),
+                minlength=len(chunk),
+            ).tolist()
+        )
+    return scores
+
+
+def _encode_bytes(sequences: list[str]) -> torch.Tensor:
+    """Encode equal-length ASCII sequences as a (sequences, length) uint8 tensor."""
+    buffer = bytearray("".join(sequences).encode("ascii"))
+    return torch.frombuffer(buffer, dtype=torch.uint8).view(len(sequences), -1)
+
+
+def _token_lookup(codes: torch.Tensor, alphabet: object) -> torch.Tensor:
+    """Map every byte occurring in `codes` to its vocabulary index."""
+    lookup = torch.zeros(256, dtype=torch.long)
+    for code in torch.unique(codes).tolist():
+        lookup[code] = alphabet.get_idx(chr(code))
+    return lookup
+
+
+def masked_batch_rows(
+    n_tokens: int, batch_size: int | None = None, max_tokens: int | None = None
+) -> int:
+    """Number of masked copies of a sequence to score per forward pass.
+
+    Args:
+        n_tokens: The number of tokens of one copy, special tokens included
+        batch_size: Optional maximum number of copies per forward pass
+        max_tokens: Optional maximum number of tokens per forward pass
+
+    Returns:
+        int: The smaller of both limits, at least 1; 1 if neither is given
+    """
+    rows = batch_size
+    if max_tokens:
+        token_rows = max_tokens // n_tokens
+        rows = token_rows if rows is None else min(rows, token_rows)
+    return max(1, rows or 1)
+
+
+def compute_masked_marginals(
+    batch_tokens: torch.Tensor,
+    model: object,
+    alphabet: object,
+    batch_size: int | None = None,
+    max_tokens: int | None = None,
+) -> torch.Tensor:
+    """Compute the log probabilities of every position when it is masked.
+
+    Position i of the result holds the log probabilities predicted at token i
+    of a copy of the sequence in which token i is masked. Copies masking
+    different positions are stacked into batches of `masked_batch_rows` rows,
+    so several positions are scored per forward pass.
+
+    Args:
+        batch_tokens: The tokens of a single sequence, shape (1, n_tokens)
+        model: A protein language model whose forward method returns a
+               dictionary with a "logits" key
+        alphabet: An alphabet object with a mask_idx attribute
+        batch_size: Optional maximum number of masked copies per forward pass
+        max_tokens: Optional maximum number of tokens per forward pass
+
+    Returns:
+        torch.Tensor: The marginals, shape (1, n_tokens, vocab_size)
+    """
+    n_tokens = batch_tokens.size(1)
+    rows = masked_batch_rows(n_tokens, batch_size, max_tokens)
+
+    marginals = []
+    for start in tqdm(range(0, n_tokens, rows), desc="Computing marginals"):
+        positions = torch.arange(
+            start, min(start + rows, n_tokens), device=batch_tokens.device
+        )
+        copies = torch.arange(len(positions), device=batch_tokens.device)
+        batch_tokens_masked = batch_tokens.repeat(len(positions), 1)
+        batch_tokens_masked[copies, positions] = alphabet.mask_idx
+
+        with torch.no_grad():
+            token_probs = torch.log_softmax(
+                model(batch_tokens_masked)["logits"], dim=-1
+            )
+
+        marginals.append(token_probs[copies, positions])
+
+    return torch.cat(marginals, dim=0).unsqueeze(0)
+
+
+def pppl_batches(
+    lengths: list[int],
+    special_tokens: int,
+    batch_size: int | None = None,
+    max_tokens: int | None = None,
+) -> list[list[tuple[int, int]]]:
+    """Pack the masked positions of many sequences into padded batches.
+
+    Every (sequence, position) pair scored by `compute_pppl` is one masked
+    copy of a sequence. Sequences are taken longest first, so consecutive
+    copies have similar lengths and a batch is padded to the length of its
+    first copy; batches hold `masked_batch_rows` copies of that length.
+    Within a sequence, positions stay in increasing order.
+
+    Args:
+        lengths: The length of every sequence
+        special_tokens: The number of special tokens added to a sequence
+        batch_size: Optional maximum number of masked copies per forward pass
+        max_tokens: Optional maximum number of padded tokens per forward pass
+
+    Returns:
+        list[list[tuple[int, int]]]: The (sequence index, masked token position)
+            pairs of every batch
+    """
+    order = sorted(range(len(lengths)), key=lambda idx: lengths[idx], reverse=True)
+    pairs = [(idx, pos) for idx in order for pos in range(1, lengths[idx] - 1)]
+
+    batches = []
+    start = 0
+    while start < len(pairs):
+        width = lengths[pairs[start][0]] + special_tokens
+        rows = masked_batch_rows(width, batch_size, max_tokens)
+        batches.append(pairs[start : start + rows])
+        start += rows
+    return batches
+
+
+def compute_pppls(
+    sequences: list[str],
+    model: object,
+    alphabet: object,
+    batch_size: int | None = None,
+    max_tokens: int | None = None,
+) -> list[float]:
+    """Compute the pseudo-perplexity (PPPL) scores of many protein sequences.
+
+    Equivalent to calling `compute_pppl` on every sequence, but the masked
+    copies of all sequences are packed by `pppl_batches` into padded batches,
+    each scored in a single forward pass. The log probabilities are summed
+    per sequence in position order, as `compute_pppl` does.
+
+    Args:
+        sequences: The protein sequences to score
+        model: A protein language model, see `compute_pppl`; it must ignore
+               padding tokens, as ESM models do
+        alphabet: An alphabet object, see `compute_pppl`
+        batch_size: Optional maximum number of masked copies per forward pass
+        max_tokens: Optional maximum number of padded tokens per forward pass
+
+    Returns:
+        list[float]: The score of every sequence, in input order
+    """
+    scores = [0.0] * len(sequences)
+    if not sequences:
+        return scores
+
+    batch_converter = alphabet.get_batch_converter()
+    _, _, all_tokens = batch_converter(
+        [(f"protein{idx}", seq) for idx, seq in enumerate(sequences)]
+    )
+
+    # Move all_tokens to same device as model
+    model_device = next(model.parameters()).device
+    all_tokens = all_tokens.to(model_device)
+    lengths = [len(seq) for seq in sequences]
+    special_tokens = all_tokens.size(1) - max(lengths)
+
+    for batch in tqdm(
+        pppl_batches(lengths, special_tokens, batch_size, max_tokens),
+        desc="Computing pseudo-perplexity",
+    ):
+        seq_idx, positions = (
+            torch.tensor(column, device=model_device) for column in zip(*batch)
+        )
+        copies = torch.arange(len(batch), device=model_device)
+        width = lengths[batch[0][0]] + special_tokens
+        batch_tokens_masked = all_tokens[seq_idx, :width].clone()
+        batch_tokens_masked[copies, positions] = alphabet.mask_idx
+        targets = torch.tensor(
+            [alphabet.get_idx(sequences[idx][pos]) for idx, pos in batch],
+            device=model_device,
+        )
 
-    total_score = 0.0
-    for idx, (wt_aa, mt_aa) in enumerate(zip(wt_seq, mutant_seq)):
-        if wt_aa != mt_aa:
-            wt_encoded = alphabet.get_idx(wt_aa)
-            mt_encoded = alphabet.get_idx(mt_aa)
-            # add 1 for BOS token
-            score = (
-                token_probs[0, 1 + idx, mt_encoded]
-                - token_probs[0, 1 + idx, wt_encoded]
+        with torch.no_grad():
+            token_probs = torch.log_softmax(
+                model(batch_tokens_masked)["logits"], dim=-1
             )
-            total_score += score.item()
 
-    return total_score
+        log_probs = token_probs[copies, positions, targets].tolist()
+        for (idx, _), log_prob in zip(batch, log_probs):
+            scores[idx] += log_prob
+
+    return scores
 
 
 def compute_pppl(sequence: str, model: object, alphabet: object) -> float:
@@ -76,26 +316,4 @@ def compute_pppl(sequence: str, model: object, alphabet: object) -> float:
                Higher (less negative) values indicate the sequence is more likely
                according to the model.
     """
-    data = [
-        ("protein1", sequence),
-    ]
-
-    batch_converter = alphabet.get_batch_converter()
-    _, _, batch_tokens = batch_converter(data)
-
-    # Move batch_tokens to same device as model
-    model_device = next(model.parameters()).device
-    batch_tokens = batch_tokens.to(model_device)
-
-    log_probs = []
-
-    for i in range(1, len(sequence) - 1):
-        batch_tokens_masked = batch_tokens.clone()
-        batch_tokens_masked[0, i] = alphabet.mask_idx
-        with torch.no_grad():
-            token_probs = torch.log_softmax(
-                model(batch_tokens_masked)["logits"], dim=-1
-            )
-        log_probs.append(token_probs[0, i, alphabet.get_idx(sequence[i])].item())
-
-    return sum(log_probs)
+    return compute_pppls([sequence], model, alphabet)[0]
@@ -0,0 +1,50 @@
+import torch
+
+from proteingym.models.esm.cache import (
+    MarginalsCache,
+    ScoreCache,
+    marginals_key,
+    score_key,
+)
+
+
+def test_score_key_covers_every_field():
+    fields = ("esm2_t30_150M_UR50D", "pseudo-ppl", "MKT", "MKA")
+    keys = {
+        score_key(*fields),
+        score_key("esm2_t6_8M_UR50D", *fields[1:]),
+        score_key(fields[0], "wt-marginals", *fields[2:]),
+        score_key(*fields[:2], "MKA", fields[3]),
+        score_key(*fields[:3], "MKW"),
+        # fields are separated, not just concatenated
+        score_key(*fields[:2], "MK", "TMKA"),
+    }
+
+    assert len(keys) == 6
+    assert score_key(*fields) == score_key(*fields)
+
+
+def test_scores_persist(tmp_path):
+    path = tmp_path / "cache" / "scores.sqlite"
+    scores = {f"key{i}": float(i) for i in range(2000)}
+    with ScoreCache(path) as cache:
+        cache.put_many(scores)
+        cache.put_many({"key0": -1.0})
+
+    with ScoreCache(path) as cache:
+        cached = cache.get_many([*scores, "missing"])
+
+    assert cached == {**scores, "key0": -1.0}
+
+
+def test_marginals_roundtrip(tmp_path):
+    cache = MarginalsCache(tmp_path / "marginals")
+    key = marginals_key("esm2_t30_150M_UR50D", "masked-marginals", "MKT")
+    token_probs = torch.log_softmax(torch.randn(1, 5, 33), dim=-1)
+
+    assert cache.load(key) is None
+    assert cache.save(key, token_probs) == cache.path(key)
+
+    assert torch.equal(cache.load(key), token_probs)
+    assert list(cache.directory.iterdir()) == [cache.path(key)]
+    assert key != marginals_key("esm2_t30_150M_UR50D", "wt-marginals", "MKT")
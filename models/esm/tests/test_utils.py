@@ -0,0 +1,169 @@
+import pytest
+import torch
+
+from proteingym.models.esm.parallel import compute_pppls_parallel
+from proteingym.models.esm.utils import (
+    compute_masked_marginals,
+    compute_pppls,
+    masked_batch_rows,
+    pppl_batches,
+    score_sequence_difference,
+    score_sequence_differences,
+)
+
+
+class Alphabet:
+    """A minimal alphabet mapping amino acids to vocabulary indices."""
+
+    def get_idx(self, aa: str) -> int:
+        return "ACDEFGHIKLMNPQRSTVWY".index(aa) + 4
+
+
+def loop_score(mutant_seq, wt_seq, token_probs, alphabet):
+    """The per-position reference implementation."""
+    total_score = 0.0
+    for idx, (wt_aa, mt_aa) in enumerate(zip(wt_seq, mutant_seq)):
+        if wt_aa != mt_aa:
+            score = (
+                token_probs[0, 1 + idx, alphabet.get_idx(mt_aa)]
+                - token_probs[0, 1 + idx, alphabet.get_idx(wt_aa)]
+            )
+            total_score += score.item()
+    return total_score
+
+
+def test_batched_scores_match_loop():
+    generator = torch.Generator().manual_seed(0)
+    wt_seq = "MKTAYIAKQR"
+    token_probs = torch.log_softmax(
+        torch.randn(1, len(wt_seq) + 2, 33, generator=generator), dim=-1
+    )
+    mutants = [wt_seq, "AKTAYIAKQR", "MKTAYIAKQW", "ACDEFGHIKL", "MKTWYIAKQR"]
+
+    scores = score_sequence_differences(mutants, wt_seq, token_probs, Alphabet())
+
+    assert scores == [
+        loop_score(seq, wt_seq, token_probs, Alphabet()) for seq in mutants
+    ]
+    assert scores[0] == 0.0
+    assert score_sequence_difference(mutants[3], wt_seq, token_probs, Alphabet()) == scores[3]
+
+
+def test_length_mismatch_raises():
+    with pytest.raises(ValueError, match="same length"):
+        score_sequence_differences(["MK"], "MKT", torch.zeros(1, 5, 33), Alphabet())
+
+
+class ContextModel(torch.nn.Module):
+    """A toy model whose logits at every token depend on the whole sequence."""
+
+    def __init__(self):
+        super().__init__()
+        generator = torch.Generator().manual_seed(0)
+        self.embedding = torch.nn.Parameter(torch.randn(33, 8, generator=generator))
+        self.output = torch.nn.Parameter(torch.randn(8, 33, generator=generator))
+
+    def forward(self, tokens):
+        hidden = self.embedding[tokens]
+        # padding tokens are ignored, as by ESM models
+        mask = tokens.ne(PPPLAlphabet.padding_idx).unsqueeze(-1)
+        context = (hidden * mask).sum(dim=1, keepdim=True) / mask.sum(
+            dim=1, keepdim=True
+        )
+        return {"logits": (hidden + context) @ self.output}
+
+
+class MaskAlphabet:
+    mask_idx = 32
+
+
+@pytest.mark.parametrize("batch_size, max_tokens", [(4, None), (None, 30), (7, 30)])
+def test_batched_masked_marginals_match_single(batch_size, max_tokens):
+    tokens = torch.tensor([[0, 5, 9, 12, 4, 7, 18, 2]])
+
+    expected = compute_masked_marginals(tokens, ContextModel(), MaskAlphabet())
+    marginals = compute_masked_marginals(
+        tokens, ContextModel(), MaskAlphabet(), batch_size, max_tokens
+    )
+
+    assert marginals.shape == (1, 8, 33)
+    assert torch.allclose(marginals, expected, atol=1e-6)
+
+
+def test_masked_batch_rows():
+    assert masked_batch_rows(100) == 1
+    assert masked_batch_rows(100, batch_size=8) == 8
+    assert masked_batch_rows(100, max_tokens=450) == 4
+    assert masked_batch_rows(100, batch_size=2, max_tokens=450) == 2
+    assert masked_batch_rows(100, max_tokens=50) == 1
+
+
+class PPPLAlphabet(Alphabet, MaskAlphabet):
+    """A minimal alphabet adding BOS, EOS and padding, as the ESM-2 alphabet."""
+
+    padding_idx = 1
+
+    def get_batch_converter(self):
+        def convert(data):
+            width = max(len(seq) for _, seq in data) + 2
+            tokens = torch.full((len(data), width), self.padding_idx)
+            for row, (_, seq) in enumerate(data):
+                tokens[row, : len(seq) + 2] = torch.tensor(
+                    [0, *map(self.get_idx, seq), 2]
+                )
+            return [label for label, _ in data], [seq for _, seq in data], tokens
+
+        return convert
+
+
+def loop_pppl(sequence, model, alphabet):
+    """The one-position-per-forward-pass reference implementation."""
+    _, _, batch_tokens = alphabet.get_batch_converter()([("protein1", sequence)])
+    log_probs = []
+    for i in range(1, len(sequence) - 1):
+        batch_tokens_masked = batch_tokens.clone()
+        batch_tokens_masked[0, i] = alphabet.mask_idx
+        with torch.no_grad():
+            token_probs = torch.log_softmax(
+                model(batch_tokens_masked)["logits"], dim=-1
+            )
+        log_probs.append(token_probs[0, i, alphabet.get_idx(sequence[i])].item())
+    return sum(log_probs)
+
+
+@pytest.mark.parametrize(
+    "batch_size, max_tokens", [(None, None), (5, None), (None, 40)]
+)
+def test_batched_pppls_match_loop(batch_size, max_tokens):
+    sequences = ["MKTAYIAKQR", "ACDE", "MK", "WYVTSRQPNMLK"]
+
+    scores = compute_pppls(
+        sequences, ContextModel(), PPPLAlphabet(), batch_size, max_tokens
+    )
+
+    expected = [loop_pppl(seq, ContextModel(), PPPLAlphabet()) for seq in sequences]
+    assert scores == pytest.approx(expected, abs=1e-5)
+    assert scores[2] == 0.0
+
+
+def test_pppl_batches_respect_token_budget():
+    batches = pppl_batches([4, 10, 6], special_tokens=2, max_tokens=30)
+
+    assert [len(batch) for batch in batches] == [2, 2, 2, 2, 3, 3]
+    assert batches[0] == [(1, 1), (1, 2)]
+    assert batches[-1] == [(2, 4), (0, 1), (0, 2)]
+    pairs = [pair for batch in batches for pair in batch]
+    assert sorted(pairs) == [(0, 1), (0, 2)] + [(1, p) for p in range(1, 9)] + [
+        (2, p) for p in range(1, 5)
+    ]
+
+
+def test_parallel_pppls_match_single_process():
+    sequences = ["MKTAYIAKQR", "ACDE", "MK", "WYVTSRQPNMLK", "MKTAYIAKQW"]
+
+    scores = compute_pppls_parallel(
+        sequences, ContextModel(), PPPLAlphabet(), num_workers=2, threads_per_worker=1
+    )
+
+    expected = compute_pppls(sequences, ContextModel(), PPPLAlphabet())
+    assert scores == pytest.approx(expected, abs=1e-5)
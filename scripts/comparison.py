@@ -0,0 +1,416 @@
+"""Paired significance tests between the models of a dataset.
+
+`aggregate_metrics` reports the mean and standard deviation of every model's
+test metrics, which does not tell whether model A is better than model B on
+a dataset. This module loads the test fold predictions of all models once,
+aligned on the same records, and runs a paired bootstrap test for every model
+pair at once.
+
+Each resample draws, within every test fold, one set of record indices shared
+by all models. The batched kernels of `scripts.metric` evaluate all models of
+a resample in a single call, the per-fold values are averaged over the test
+folds (as the aggregated "test" metrics are), and the differences of every
+model pair are counted by broadcasting. The two-sided p-value of a pair is
+twice the smaller fraction of resamples in which the difference is on either
+side of zero.
+
+Example Usage:
+    ```bash
+    python -m scripts.comparison \\
+        --prediction-dir prediction \\
+        --dataset-path data/charge_ladder.splits.pgdata \\
+        --dataset-name charge_ladder \\
+        --split random \\
+        --target DMS_score \\
+        --output-path comparison/charge_ladder_random_DMS_score_comparison.json
+    ```
+
+Example comparison JSON output:
+    ```json
+    {
+        "spearman": {
+            "values": {"pls": 0.41, "kermut": 0.52},
+            "p_values": {
+                "pls": {"pls": 1.0, "kermut": 0.004},
+                "kermut": {"pls": 0.004, "kermut": 1.0}
+            }
+        },
+        "metadata": {...}
+    }
+    ```
+"""
+
+import dataclasses
+import json
+import warnings
+from pathlib import Path
+from typing import Annotated
+
+import numpy as np
+import typer
+from proteingym.base.dataset import Dataset, Subsets
+
+from scripts.ground_truth import GroundTruthTable
+from scripts.metric import (
+    BOOTSTRAP_CHUNK_ELEMENTS,
+    _discover_batched_kernels,
+    _load_predictions,
+    load_ground_truth,
+)
+from scripts.utils import (
+    _get_top_k_from_slice,
+    get_fold_indices,
+    prepare_and_validate_scoring_df,
+)
+
+COMPARISON_METRICS = ("spearman", "recovery")
+"""Metrics compared by default, both with a batched kernel."""
+
+
+@dataclasses.dataclass(frozen=True)
+class AlignedFold:
+    """The test records of one fold with the predictions of every model.
+
+    Attributes:
+        fold: The test fold index, None for a dataset without splits.
+        gt: The ground truth values of the records.
+        pred: The predicted values, one row per model, aligned with `gt`.
+        top_k: The fold top_k, None if unavailable.
+    """
+
+    fold: int | None
+    gt: np.ndarray
+    pred: np.ndarray
+    top_k: int | None = None
+
+
+def discover_models(
+    prediction_dir: Path, dataset_name: str, target: str, split: str
+) -> list[str]:
+    """List the models with predictions for a dataset, target and split.
+
+    Args:
+        prediction_dir: The prediction directory, laid out as
+            `<dataset>/<model>/<target>/<split>/fold<i>/`.
+        dataset_name: The name of the dataset.
+        target: The scored target.
+        split: The split name.
+
+    Returns:
+        The sorted model names.
+    """
+    return sorted(
+        path.name
+        for path in (prediction_dir / dataset_name).glob("*")
+        if (path / target / split).is_dir()
+    )
+
+
+def load_aligned_folds(
+    ground_truth: Subsets | Dataset | GroundTruthTable,
+    prediction_dir: Path,
+    dataset_name: str,
+    model_names: list[str],
+    split: str,
+    target: str,
+) -> list[AlignedFold]:
+    """Load the test fold predictions of all models, aligned on their records.
+
+    Every prediction archive is read once. For Subsets (or a table with
+    slices), fold `i` is scored with the predictions of the model trained for
+    test fold `i`; a plain dataset is scored as a single fold with the fold 0
+    predictions. The join keeps the ground truth row order, so the predictions
+    of every model line up with the same records without sorting.
+
+    Args:
+        ground_truth: The ground truth loaded by `load_ground_truth`.
+        prediction_dir: The prediction directory, see `discover_models`.
+        dataset_name: The name of the dataset.
+        model_names: The models to load, in output order.
+        split: The split name.
+        target: The scored target.
+
+    Returns:
+        The aligned test records of every fold.
+
+    Raises:
+        FileNotFoundError: If a model has no predictions for a fold.
+        ValueError: If the models do not predict the same records.
+    """
+    has_slices = bool(getattr(ground_truth, "slices", None))
+    folds = get_fold_indices(ground_truth, split) if has_slices else [None]
+
+    aligned = []
+    for fold_idx in folds:
+        gt = None
+        preds = []
+        for model_name in model_names:
+            prediction_path = (
+                prediction_dir
+                / dataset_name
+                / model_name
+                / target
+                / split
+                / f"fold{fold_idx or 0}"
+                / f"{dataset_name}_predictions.pgdata"
+            )
+            if not prediction_path.exists():
+                raise FileNotFoundError(f"Prediction file not found: {prediction_path}")
+            scoring_df = prepare_and_validate_scoring_df(
+                ground_truth,
+                _load_predictions(ground_truth, prediction_path),
+                target,
+                split if has_slices else None,
+                fold_idx,
+            )
+            fold_gt = scoring_df[target].to_numpy()
+            if gt is None:
+                gt = fold_gt
+            elif not np.array_equal(gt, fold_gt, equal_nan=True):
+                raise ValueError(
+                    f"Model '{model_name}' does not predict the same records as "
+                    f"'{model_names[0]}' for fold {fold_idx}."
+                )
+            preds.append(scoring_df[f"{target}_pred"].to_numpy())
+        aligned.append(
+            AlignedFold(
+                fold=fold_idx,
+                gt=np.asarray(gt, dtype=float),
+                pred=np.asarray(preds, dtype=float),
+                top_k=_get_top_k_from_slice(ground_truth, split, fold_idx),
+            )
+        )
+    return aligned
+
+
+def _fold_metric_values(
+    kernel, gt: np.ndarray, pred: np.ndarray, top_k: int | None
+) -> np.ndarray:
+    """Evaluate a batched kernel for every model and resample of one fold.
+
+    Args:
+        kernel: A batched kernel of `scripts.metric`.
+        gt: The resampled ground truth values, shape (resamples, records).
+        pred: The resampled predictions, shape (models, resamples, records).
+        top_k: The fold top_k.
+
+    Returns:
+        The metric values, shape (resamples, models).
+    """
+    n_models, n_resamples, n_records = pred.shape
+    values = kernel(
+        np.broadcast_to(gt, pred.shape).reshape(-1, n_records),
+        pred.reshape(-1, n_records),
+        top_k,
+    )
+    return values.reshape(n_models, n_resamples).T
+
+
+def paired_bootstrap_test(
+    folds: list[AlignedFold],
+    metric_names: list[str],
+    n_resamples: int = 1000,
+    seed: int = 0,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Run a paired bootstrap test of every model pair on every metric.
+
+    Records are resampled with replacement within every fold, with the same
+    indices for all models. Resamples are evaluated in chunks of at most
+    `BOOTSTRAP_CHUNK_ELEMENTS` gathered predictions; every fold draws from its
+    own child seed of `seed`, so results are reproducible for a given seed.
+
+    Args:
+        folds: The aligned test folds, as returned by `load_aligned_folds`.
+        metric_names: Metrics with a batched kernel in `scripts.metric`.
+        n_resamples: The number of bootstrap resamples.
+        seed: The seed of the resampling.
+
+    Returns:
+        A mapping from metric name to its "values" (the fold mean of every
+        model, shape (models,)) and "p_values" (the two-sided p-value of every
+        model pair, shape (models, models)); NaN where undefined.
+
+    Raises:
+        ValueError: If a metric has no batched kernel.
+    """
+    batched_kernels = _discover_batched_kernels()
+    unknown = [name for name in metric_names if name not in batched_kernels]
+    if unknown:
+        raise ValueError(f"Metrics without a batched kernel: {unknown}")
+
+    n_models = len(folds[0].pred)
+    rngs = [
+        np.random.default_rng(seed_sequence)
+        for seed_sequence in np.random.SeedSequence(seed).spawn(len(folds))
+    ]
+    max_records = max(len(fold.gt) for fold in folds)
+    chunk_size = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(n_models * max_records, 1))
+
+    observed = {}
+    below = {name: np.zeros((n_models, n_models)) for name in metric_names}
+    above = {name: np.zeros((n_models, n_models)) for name in metric_names}
+    valid = {name: np.zeros((n_models, n_models)) for name in metric_names}
+
+    # Folds without records, variance or top_k give NaN values, skipped by nanmean
+    with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for name in metric_names:
+            observed[name] = np.nanmean(
+                [
+                    _fold_metric_values(
+                        batched_kernels[name], fold.gt[None], fold.pred[:, None], fold.top_k
+                    )[0]
+                    for fold in folds
+                ],
+                axis=0,
+            )
+
+        for start in range(0, n_resamples, chunk_size):
+            size = min(chunk_size, n_resamples - start)
+            indices = [
+                rng.integers(0, len(fold.gt), size=(size, len(fold.gt)))
+                for rng, fold in zip(rngs, folds)
+            ]
+            for name in metric_names:
+                statistic = np.nanmean(
+                    [
+                        _fold_metric_values(
+                            batched_kernels[name],
+                            fold.gt[fold_indices],
+                            fold.pred[:, fold_indices],
+                            fold.top_k,
+                        )
+                        for fold, fold_indices in zip(folds, indices)
+                    ],
+                    axis=0,
+                )
+                difference = statistic[:, :, None] - statistic[:, None, :]
+                below[name] += (difference <= 0).sum(axis=0)
+                above[name] += (difference >= 0).sum(axis=0)
+                valid[name] += (~np.isnan(difference)).sum(axis=0)
+
+    results = {}
+    for name in metric_names:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p_values = np.minimum(
+                1.0,
+                2 * (1 + np.minimum(below[name], above[name])) / (1 + valid[name]),
+            )
+        p_values[valid[name] == 0] = np.nan
+        results[name] = {"values": observed[name], "p_values": p_values}
+    return results
+
+
+def compare_models(
+    prediction_dir: Path,
+    dataset_path: Path,
+    dataset_name: str,
+    split: str,
+    target: str,
+    output_path: Path,
+    model_names: list[str] | None = None,
+    metric_names: list[str] | None = None,
+    n_resamples: int = 1000,
+    seed: int = 0,
+    cache_dir: Path | None = None,
+) -> Path:
+    """Compare all models of a dataset and write the p-value matrices.
+
+    Args:
+        prediction_dir: The prediction directory, see `discover_models`.
+        dataset_path: Path to the ground truth archive.
+        dataset_name: The name of the dataset.
+        split: The split name.
+        target: The scored target.
+        output_path: Path of the comparison JSON.
+        model_names: The models to compare. All models with predictions if None.
+        metric_names: The compared metrics. `COMPARISON_METRICS` if None.
+        n_resamples: The number of bootstrap resamples.
+        seed: The seed of the resampling.
+        cache_dir: Optional ground truth cache directory, see
+            `load_ground_truth`.
+
+    Returns:
+        The path to the saved comparison JSON (same as output_path).
+
+    Raises:
+        ValueError: If fewer than two models are compared.
+    """
+    if model_names is None:
+        model_names = discover_models(prediction_dir, dataset_name, target, split)
+    if len(model_names) < 2:
+        raise ValueError(
+            f"At least two models are needed for a comparison, found {model_names}."
+        )
+    metric_names = list(metric_names or COMPARISON_METRICS)
+
+    ground_truth = load_ground_truth(dataset_path, cache_dir)
+    folds = load_aligned_folds(
+        ground_truth, prediction_dir, dataset_name, model_names, split, target
+    )
+    tests = paired_bootstrap_test(folds, metric_names, n_resamples, seed)
+
+    result = {}
+    for name, test in tests.items():
+        result[name] = {
+            "values": dict(zip(model_names, _to_json(test["values"]))),
+            "p_values": {
+                model_name: dict(zip(model_names, row))
+                for model_name, row in zip(model_names, _to_json(test["p_values"]))
+            },
+        }
+    result["metadata"] = {
+        "dataset": dataset_name,
+        "split": split,
+        "target": target,
+        "models": model_names,
+        "test_folds": [fold.fold for fold in folds if fold.fold is not None],
+        "n_resamples": n_resamples,
+        "seed": seed,
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(result, indent=2))
+    return output_path
+
+
+def _to_json(values: np.ndarray) -> list:
+    """Convert an array to nested lists, with None for NaN."""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+app = typer.Typer()
+
+
+@app.command()
+def compare(
+    prediction_dir: Annotated[Path, typer.Option()],
+    dataset_path: Annotated[Path, typer.Option()],
+    dataset_name: Annotated[str, typer.Option()],
+    split: Annotated[str, typer.Option()],
+    target: Annotated[str, typer.Option()],
+    output_path: Annotated[Path, typer.Option()],
+    model_name: Annotated[list[str], typer.Option()] = None,
+    metric: Annotated[list[str], typer.Option()] = None,
+    n_resamples: Annotated[int, typer.Option()] = 1000,
+    seed: Annotated[int, typer.Option()] = 0,
+    cache_dir: Annotated[Path, typer.Option()] = None,
+):
+    """Compare the models of a dataset with paired bootstrap tests."""
+    compare_models(
+        prediction_dir,
+        dataset_path,
+        dataset_name,
+        split,
+        target,
+        output_path,
+        model_names=model_name or None,
+        metric_names=metric or None,
+        n_resamples=n_resamples,
+        seed=seed,
+        cache_dir=cache_dir,
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,394 @@
+"""Frame-backed ground truth and its content-addressed on-disk cache.
+
+Parsing a `.pgdata` archive into `Dataset`/`Subsets` objects is the dominant
+start-up cost of every scoring run, yet scoring only needs the sequences,
+assay variables, targets, fold membership and fold metadata. A
+`GroundTruthTable` holds exactly that as one Polars frame and can stand in
+for `Subsets`/`Dataset` in the scoring functions of `scripts.utils` and
+`scripts.metric`.
+
+Tables are cached on disk as uncompressed Arrow IPC files keyed by the SHA-256
+of the archive they were built from, so any later run that scores against the
+same archive memory-maps the table instead of re-parsing it. Changing the
+archive changes its key; stale entries are simply never read again.
+
+Examples:
+    >>> ground_truth = load_cached_ground_truth(
+    ...     Path("data/charge_ladder.splits.pgdata"),
+    ...     Path(".cache/ground_truth"),
+    ...     Subsets.from_path,
+    ... )
+    >>> ground_truth.slices["random"][0].metadata
+    {'fold': 0.0, 'top_k': 10}
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+from proteingym.base.dataset import Dataset, Subsets, SEQUENCE
+from proteingym.base.sequence import SequenceType
+
+GROUND_TRUTH_CACHE_VERSION = 4
+"""Version of the cache layout, part of every cache key."""
+
+RECORD_KEY = "__record_key__"
+"""The 64-bit record fingerprint column used to align predictions."""
+
+GROUND_TRUTH_CACHE_DIR_ENV = "PROTEINGYM_BENCHMARK_CACHE_DIR"
+"""Environment variable overriding the default ground truth cache directory."""
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+@dataclasses.dataclass(frozen=True)
+class SliceMetadata:
+    """The metadata of one fold, without its records.
+
+    Fold membership of a `GroundTruthTable` lives in its frame; this object only
+    keeps `metadata` so that code reading `ground_truth.slices[split][fold]`
+    (e.g. `_get_top_k_from_slice`) works unchanged.
+    """
+
+    metadata: dict | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class GroundTruthTable:
+    """The scoring-relevant part of a ground truth dataset as a single frame.
+
+    `frame` holds the `sequence` column, the assay variables and all assay
+    targets in `to_df` order, plus one boolean membership column per fold of
+    every split (named by `fold_column`). Tables built by `from_ground_truth`
+    also store the `RECORD_KEY` fingerprint of every record, so that it is
+    computed once per dataset and cached with the table (see `record_keys`).
+
+    A table with `slices` behaves like `Subsets` in the scoring functions; its
+    `dataset` property (a table without slices) behaves like `Dataset`.
+
+    Attributes:
+        name: The name of the ground truth dataset.
+        frame: The ground truth frame with fold membership columns.
+        assay_variables: The names of the assay variables.
+        assay_targets: The names of the assay targets.
+        slices: The fold metadata of every split.
+        wild_type: The wild-type sequence of the dataset, if it has one.
+        assay_sizes: The number of records of every assay, in frame order.
+            None if unknown, in which case the frame counts as one assay.
+    """
+
+    name: str
+    frame: pl.DataFrame
+    assay_variables: list[str]
+    assay_targets: list[str]
+    slices: dict[str, list[SliceMetadata]] = dataclasses.field(default_factory=dict)
+    wild_type: str | None = None
+    assay_sizes: list[int] | None = None
+
+    @staticmethod
+    def fold_column(split: str, fold: int) -> str:
+        """Name of the boolean membership column of a fold."""
+        return f"__fold__{split}__{fold}"
+
+    @property
+    def dataset(self) -> "GroundTruthTable":
+        """The table without its splits, scored like a full `Dataset`."""
+        return dataclasses.replace(self, slices={})
+
+    @property
+    def record_keys(self) -> pl.Series:
+        """The `RECORD_KEY` of the sequence and assay variables of every row.
+
+        Read from the frame if stored there, computed otherwise.
+        """
+        if RECORD_KEY in self.frame.columns:
+            return self.frame[RECORD_KEY]
+        return self.frame.select(
+            table_fingerprint(self.frame, self.assay_variables)
+        ).to_series()
+
+    def to_df(self, target_names: str | list[str] | None = None) -> pl.DataFrame:
+        """Return the ground truth frame as produced by `Dataset.to_df`.
+
+        Args:
+            target_names: The target(s) to include. All targets if None.
+
+        Returns:
+            The `sequence`, assay variable and selected target columns.
+        """
+        if target_names is None:
+            target_names = self.assay_targets
+        elif isinstance(target_names, str):
+            target_names = [target_names]
+        return self.frame.select(SEQUENCE, *self.assay_variables, *target_names)
+
+    @classmethod
+    def from_ground_truth(cls, ground_truth: Subsets | Dataset) -> "GroundTruthTable":
+        """Build a table from a parsed ground truth dataset.
+
+        Args:
+            ground_truth: A `Dataset`, or `Subsets` with cross-validation splits.
+
+        Returns:
+            The equivalent `GroundTruthTable`.
+
+        Raises:
+            ValueError: If the frame of the dataset does not line up with its
+                assay records.
+        """
+        dataset = ground_truth.dataset if isinstance(ground_truth, Subsets) else ground_truth
+        frame = dataset.to_df()
+        offsets = np.cumsum([0] + [len(assay.records) for assay in dataset.assays])
+        if offsets[-1] != len(frame):
+            raise ValueError(
+                f"Dataset '{dataset.name}' has {offsets[-1]} records but its "
+                f"frame has {len(frame)} rows."
+            )
+
+        slices = {}
+        if isinstance(ground_truth, Subsets):
+            membership = {}
+            for split, dataset_slices in ground_truth.slices.items():
+                for fold_idx, dataset_slice in enumerate(dataset_slices):
+                    mask = np.zeros(len(frame), dtype=bool)
+                    mask[_slice_rows(dataset_slice, offsets)] = True
+                    membership[cls.fold_column(split, fold_idx)] = mask
+                slices[split] = [SliceMetadata(s.metadata) for s in dataset_slices]
+            frame = frame.with_columns(
+                pl.Series(name, mask) for name, mask in membership.items()
+            )
+
+        assay_variables = [v.name for v in dataset.assay_variables]
+        return cls(
+            name=dataset.name,
+            frame=frame.with_columns(table_fingerprint(frame, assay_variables)),
+            assay_variables=assay_variables,
+            assay_targets=[t.name for t in dataset.assay_targets],
+            slices=slices,
+            wild_type=wild_type_sequence(dataset),
+            assay_sizes=np.diff(offsets).tolist(),
+        )
+
+    def write(self, path: Path) -> None:
+        """Write the table to `path` (Arrow IPC) and `path.with_suffix('.json')`.
+
+        Both files are written atomically; the Arrow file is written last so
+        its presence implies a complete entry.
+
+        Args:
+            path: The destination of the Arrow IPC file.
+        """
+        metadata = {
+            "name": self.name,
+            "assay_variables": self.assay_variables,
+            "assay_targets": self.assay_targets,
+            "slices": {
+                split: [s.metadata for s in dataset_slices]
+                for split, dataset_slices in self.slices.items()
+            },
+            "wild_type": self.wild_type,
+            "assay_sizes": self.assay_sizes,
+        }
+        _atomic_write(
+            path.with_suffix(".json"),
+            lambda tmp: tmp.write_text(json.dumps(metadata, indent=2)),
+        )
+        _atomic_write(path, lambda tmp: self.frame.write_ipc(tmp, compression="uncompressed"))
+
+    @classmethod
+    def read(cls, path: Path) -> "GroundTruthTable":
+        """Memory-map a table written by `write`.
+
+        Args:
+            path: The Arrow IPC file of the table.
+
+        Returns:
+            The `GroundTruthTable`.
+        """
+        metadata = json.loads(path.with_suffix(".json").read_text())
+        return cls(
+            name=metadata["name"],
+            frame=pl.read_ipc(path, memory_map=True),
+            assay_variables=metadata["assay_variables"],
+            assay_targets=metadata["assay_targets"],
+            slices={
+                split: [SliceMetadata(m) for m in slice_metadata]
+                for split, slice_metadata in metadata["slices"].items()
+            },
+            wild_type=metadata["wild_type"],
+            assay_sizes=metadata["assay_sizes"],
+        )
+
+
+def record_fingerprint(columns: list[str]) -> pl.Expr:
+    """A 64-bit fingerprint of the given key columns, named `RECORD_KEY`.
+
+    The first column (the sequence) is hashed on its own and combined with the
+    remaining, short keys, which avoids hashing the long strings inside a
+    struct. The fingerprint is null if any key is null, so that records with
+    null keys never match, as in a join on the key columns themselves.
+
+    Args:
+        columns: The key columns to fingerprint (e.g. sequence and variables).
+
+    Returns:
+        A UInt64 expression.
+    """
+    fingerprint = pl.col(columns[0]).hash(seed=0)
+    if len(columns) > 1:
+        fingerprint = pl.struct(fingerprint, *columns[1:]).hash(seed=0)
+    return (
+        pl.when(pl.any_horizontal([pl.col(c).is_null() for c in columns]))
+        .then(None)
+        .otherwise(fingerprint)
+        .alias(RECORD_KEY)
+    )
+
+
+def table_fingerprint(frame: pl.DataFrame, assay_variables: list[str]) -> pl.Expr:
+    """The `record_fingerprint` of the records of a table frame.
+
+    Assay variables that are null for every record are left out, as they are
+    when joining scoring frames (see `_join_scoring_frames`).
+
+    Args:
+        frame: The table frame.
+        assay_variables: The names of the assay variables of the table.
+
+    Returns:
+        A UInt64 expression over the sequence and non-null assay variables.
+    """
+    return record_fingerprint(
+        [SEQUENCE, *(v for v in assay_variables if not frame[v].is_null().all())]
+    )
+
+
+def wild_type_sequence(
+    ground_truth: Subsets | Dataset | GroundTruthTable,
+) -> str | None:
+    """Return the wild-type sequence of a ground truth dataset.
+
+    Args:
+        ground_truth: A `Dataset`, `Subsets` or `GroundTruthTable`.
+
+    Returns:
+        The first sequence of type `SequenceType.WILD_TYPE`, None if there is
+        none.
+    """
+    if isinstance(ground_truth, GroundTruthTable):
+        return ground_truth.wild_type
+    if isinstance(ground_truth, Subsets):
+        ground_truth = ground_truth.dataset
+    return next(
+        (
+            str(sequence.value)
+            for sequence in ground_truth.sequences
+            if sequence.type == SequenceType.WILD_TYPE
+        ),
+        None,
+    )
+
+
+def _slice_rows(dataset_slice, offsets: np.ndarray) -> np.ndarray:
+    """Frame row indices selected by a dataset slice.
+
+    Args:
+        dataset_slice: A `DatasetSlice` with one records selector per assay
+            (a boolean mask, a list of indices or a `slice`).
+        offsets: The first frame row of every assay, followed by the total.
+
+    Returns:
+        The selected row indices, in assay and record order.
+    """
+    rows = [np.empty(0, dtype=np.int64)]
+    for assay_idx, assay_slice in enumerate(dataset_slice.assays):
+        records = getattr(assay_slice, "records", assay_slice)
+        n_records = offsets[assay_idx + 1] - offsets[assay_idx]
+        if isinstance(records, slice):
+            indices = np.arange(n_records)[records]
+        else:
+            records = np.asarray(records)
+            if records.dtype == bool:
+                indices = np.flatnonzero(records[:n_records])
+            else:
+                indices = records.astype(np.int64)
+        rows.append(indices + offsets[assay_idx])
+    return np.concatenate(rows)
+
+
+def _atomic_write(path: Path, write) -> None:
+    """Call `write` on a temporary file next to `path`, then move it in place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        write(Path(tmp))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def archive_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in blocks.
+
+    Args:
+        path: The file to hash.
+
+    Returns:
+        The hex digest of its content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """Return the ground truth cache directory.
+
+    Returns:
+        `$PROTEINGYM_BENCHMARK_CACHE_DIR` if set, otherwise
+        `~/.cache/proteingym-benchmark/ground_truth`.
+    """
+    if env_dir := os.environ.get(GROUND_TRUTH_CACHE_DIR_ENV):
+        return Path(env_dir)
+    return Path.home() / ".cache" / "proteingym-benchmark" / "ground_truth"
+
+
+def load_cached_ground_truth(
+    dataset_path: Path,
+    cache_dir: Path,
+    load: Callable[[Path], Subsets | Dataset | GroundTruthTable],
+) -> GroundTruthTable:
+    """Load a ground truth archive through the content-addressed cache.
+
+    On a hit the cached table is memory-mapped; on a miss the archive is parsed
+    with `load`, converted and stored for later runs.
+
+    Args:
+        dataset_path: Path to the ground truth `.pgdata` archive.
+        cache_dir: The cache directory, created if needed.
+        load: Parses the archive into `Subsets`, a `Dataset` or directly into a
+            `GroundTruthTable` on a miss.
+
+    Returns:
+        The `GroundTruthTable` of the archive.
+    """
+    key = f"{archive_digest(dataset_path)}-v{GROUND_TRUTH_CACHE_VERSION}"
+    entry = cache_dir / f"{key}.arrow"
+    if entry.exists():
+        return GroundTruthTable.read(entry)
+
+    table = load(dataset_path)
+    if not isinstance(table, GroundTruthTable):
+        table = GroundTruthTable.from_ground_truth(table)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    table.write(entry)
+    return table
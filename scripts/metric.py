@@ -11,13 +11,13 @@ metrics. Results are saved as JSON with metadata for further analysis.
 
 Metrics operate on Dataset or Subsets objects from the proteingym-base package, enabling
 evaluation on complete datasets or specific cross-validation folds. All metrics use a
-plugin-style architecture: any function with the 'metric_' prefix is automatically
-discovered and made available for calculation.
+plugin-style architecture: any function with the 'kernel_' or 'metric_' prefix is
+automatically discovered and made available for calculation.
 
 Example Usage:
     ```bash
     # Evaluate predictions on a specific dataset slice (e.g., cross-validation fold)
-    python metric.py \\
+    python -m scripts.metric evaluate \\
         --prediction-path predictions.pgdata \\
         --dataset-path dataset.splits.pgdata \\
         --metric-path metrics.json \\
@@ -42,7 +42,26 @@ Example metric JSON output:
     ```
 
 Adding Custom Metrics:
-    To add a new metric, define a function following this pattern:
+    Most metrics only need the aligned ground truth and predicted values. Define them
+    as array-level kernels, which share a single alignment and ranking step:
+    ```python
+    def kernel_<name>(
+        gt: np.ndarray,
+        pred: np.ndarray,
+        ranks: Ranks | None = None,
+        top_k: int | None = None,
+    ) -> float | None:
+        return custom_calculation(gt, pred)
+    ```
+
+    `ranks` is the shared ranking of `gt` and `pred`: each array is sorted at most
+    once per fold, and average ranks (`ranks.gt`, `ranks.pred`) and top-k indices
+    (`ranks.top_indices`) are derived from that sort. `top_k` is the "top_k" value of
+    the fold metadata (None when unavailable). A kernel may return a dictionary of
+    named values to report a metric family, such as `recovery_curve`.
+
+    Metrics that need the dataset objects themselves can be defined as functions
+    following this pattern:
     ```python
     def metric_<name>(
         ground_truth: Subsets | Dataset,
@@ -61,34 +80,80 @@ Adding Custom Metrics:
         return result
     ```
 
-    The metric function will be automatically discovered and made available for
-    calculation. The function name after 'metric_' becomes the metric name used
-    in the --selected-metrics argument.
+    Kernels and metric functions are automatically discovered and made available for
+    calculation. The function name after 'kernel_' or 'metric_' becomes the metric
+    name used in the --selected-metrics argument; kernels take precedence.
 """
 
+import collections
+import contextlib
+import dataclasses
+import functools
+import hashlib
 import inspect
 import sys
 import argparse
 import json
 import warnings
 import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
-from scipy.stats import spearmanr
+import polars as pl
+import yaml
+from scipy.stats import rankdata
 
 from proteingym.base.dataset import Subsets, Dataset
+from scripts.ground_truth import (
+    GroundTruthTable,
+    archive_digest,
+    default_cache_dir,
+    load_cached_ground_truth,
+    wild_type_sequence,
+)
+from scripts.profiling import Profiler, profile_stage
+from scripts.result_cache import (
+    MetricResultCache,
+    default_result_cache_dir,
+    result_cache_key,
+)
+from scripts.sufficient_statistics import DECOMPOSABLE_METRICS, SufficientStatistics
 
 from scripts.utils import (
+    FOLD,
+    add_strata_columns,
     get_fold_indices,
     prepare_and_validate_scoring_df,
+    prepare_fold_scoring_df,
+    read_pgdata_table,
     _get_top_k_from_slice,
+    _join_on_fingerprint,
+    _join_scoring_frames,
 )
 
 
 logger = logging.getLogger(__name__)
 
+RECOVERY_CURVE_KS = (10, 20, 50, 100)
+"""The k values reported by the `recovery_curve` metric."""
+
+SCORE_MODES = ("test", "train_available", "per_fold", "full_dataset")
+"""The scoring modes of `calculate_metrics_by_mode`, in result order."""
+
+ALL_NAMES = "all"
+"""The `evaluate` split or target selecting every split or target of a dataset."""
+
+BOOTSTRAP_CHUNK_ELEMENTS = 2**24
+"""The maximum number of resampled values gathered at once per bootstrap chunk."""
+
+
 _metric_functions_cache = None
+_metric_kernels_cache = None
+_batched_kernels_cache = None
 
 
 def _discover_metric_functions() -> dict[str, callable]:
@@ -104,12 +169,596 @@ def _discover_metric_functions() -> dict[str, callable]:
     return _metric_functions_cache
 
 
+def _discover_metric_kernels() -> dict[str, callable]:
+    """Discover all array-level metric kernels in the current module (cached)."""
+    global _metric_kernels_cache
+    if _metric_kernels_cache is None:
+        _metric_kernels_cache = {}
+        current_module = sys.modules[__name__]
+        for name, obj in inspect.getmembers(current_module, inspect.isfunction):
+            if name.startswith("kernel_"):
+                metric_name = name.replace("kernel_", "", 1)
+                _metric_kernels_cache[metric_name] = obj
+    return _metric_kernels_cache
+
+
+def _accepts_scoring_df(metric_function: callable) -> bool:
+    """Check whether a metric function accepts a pre-aligned `scoring_df`."""
+    return "scoring_df" in inspect.signature(metric_function).parameters
+
+
+def _average_ranks(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Derive 1-based average ranks from an ascending sort order.
+
+    Equivalent to `scipy.stats.rankdata(values)`, reusing an existing sort.
+    """
+    n_samples = len(values)
+    if np.isnan(values).any():
+        return np.full(n_samples, np.nan)
+    sorted_values = values[order]
+    is_group_start = np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    group_ids = np.cumsum(is_group_start) - 1
+    group_bounds = np.r_[np.flatnonzero(is_group_start), n_samples]
+    group_ranks = 0.5 * (group_bounds[:-1] + group_bounds[1:] - 1) + 1
+    ranks = np.empty(n_samples)
+    ranks[order] = group_ranks[group_ids]
+    return ranks
+
+
+@dataclasses.dataclass(frozen=True)
+class Ranks:
+    """Shared ranking of aligned ground truth and predicted values.
+
+    Each array is sorted at most once, lazily, and the sort order is shared by
+    all ranking metrics: average ranks, top-k indices and recovery positions are
+    all derived from it. When only a top-k is needed and no full sort has been
+    done yet, `np.partition` is used instead of sorting.
+
+    Ties are ordered as by the reversed stable sort: among tied values, later
+    records rank higher. Both paths follow this rule (see `_top_k_mask`), so
+    the top k do not depend on which metrics ran first.
+    """
+
+    gt_values: np.ndarray
+    """The aligned ground truth values."""
+
+    pred_values: np.ndarray
+    """The aligned predicted values."""
+
+    @classmethod
+    def from_values(cls, gt: np.ndarray, pred: np.ndarray) -> "Ranks":
+        """Share the ranking of aligned ground truth and predicted values."""
+        return cls(gt_values=np.asarray(gt), pred_values=np.asarray(pred))
+
+    @functools.cached_property
+    def gt_order(self) -> np.ndarray:
+        """The indices sorting the ground truth values in ascending order."""
+        return np.argsort(self.gt_values, kind="stable")
+
+    @functools.cached_property
+    def pred_order(self) -> np.ndarray:
+        """The indices sorting the predicted values in ascending order."""
+        return np.argsort(self.pred_values, kind="stable")
+
+    @functools.cached_property
+    def gt(self) -> np.ndarray:
+        """The ranks of the ground truth values (ties get their average rank)."""
+        return _average_ranks(self.gt_values, self.gt_order)
+
+    @functools.cached_property
+    def pred(self) -> np.ndarray:
+        """The ranks of the predicted values (ties get their average rank)."""
+        return _average_ranks(self.pred_values, self.pred_order)
+
+    def top_indices(self, which: str, k: int) -> np.ndarray:
+        """Get the indices of the k largest values, sorted in descending order.
+
+        Args:
+            which: Either "gt" or "pred".
+            k: The number of indices to return, 0 < k <= number of samples.
+
+        Returns:
+            The indices of the k largest values, largest first.
+        """
+        order_name = f"{which}_order"
+        values = getattr(self, f"{which}_values")
+        if order_name in self.__dict__ or np.isnan(values).any():
+            return getattr(self, order_name)[::-1][:k]
+        top = np.flatnonzero(_top_k_mask(values, k))
+        # largest first, later records first among ties
+        return top[np.lexsort((top, values[top]))[::-1]]
+
+    def top_k_overlap(self, k: int) -> int:
+        """Count the records in the top k of both ground truth and predictions."""
+        in_gt_top_k = np.zeros(len(self.gt_values), dtype=bool)
+        in_gt_top_k[self.top_indices("gt", k)] = True
+        return int(in_gt_top_k[self.top_indices("pred", k)].sum())
+
+
+def _top_k_mask(values: np.ndarray, k: int) -> np.ndarray:
+    """Mark the k largest values along the last axis.
+
+    Ties at the k-th largest value are broken towards later positions, which
+    selects the same records as the first k of the reversed stable sort, in
+    O(n) instead of O(n log n).
+
+    Args:
+        values: The values, one set per row along the last axis.
+        k: The number of values to mark per row, 0 < k <= values.shape[-1].
+
+    Returns:
+        A boolean array shaped like `values`.
+    """
+    if np.isnan(values).any():
+        # NaN sorts last, so the stable sort defines its rank
+        top = np.argsort(values, axis=-1, kind="stable")[..., ::-1][..., :k]
+        mask = np.zeros(values.shape, dtype=bool)
+        np.put_along_axis(mask, top, True, axis=-1)
+        return mask
+    kth = values.shape[-1] - k
+    threshold = np.partition(values, kth, axis=-1)[..., kth : kth + 1]
+    above = values > threshold
+    tied = values == threshold
+    missing = k - above.sum(axis=-1, keepdims=True)
+    tied_from_end = np.cumsum(tied[..., ::-1], axis=-1)[..., ::-1]
+    return above | (tied & (tied_from_end <= missing))
+
+
+def _validate_top_k(top_k: int | None, n_samples: int) -> int | None:
+    """Validate the fold top_k for ranking kernels, None if not computable."""
+    if top_k is None:
+        return None
+    if top_k > n_samples:
+        raise ValueError(
+            f"top_k ({top_k}) is larger than the number of samples ({n_samples})."
+        )
+    if top_k <= 0:
+        return None
+    return top_k
+
+
+def kernel_recovery(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the fraction of the true top-k values that are predicted top-k.
+
+    This is also the precision of the predicted top-k, as both sets have k members.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Optional shared ranking of `gt` and `pred`.
+        top_k: The number of top variants to recover. If None, the metric
+            cannot be computed and None is returned.
+
+    Returns:
+        The recovery fraction (0.0 to 1.0), or None if top_k is None or <= 0.
+
+    Raises:
+        ValueError: If top_k is larger than the number of samples.
+    """
+    top_k = _validate_top_k(top_k, len(gt))
+    if top_k is None:
+        return None
+    if ranks is None:
+        ranks = Ranks.from_values(gt, pred)
+    return ranks.top_k_overlap(top_k) / top_k
+
+
+def kernel_recovery_curve(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> dict[str, float | None]:
+    """Compute recovery@k for every k in `RECOVERY_CURVE_KS` from one ranking.
+
+    A record is in the top k of both rankings exactly when the larger of its two
+    descending positions is below k, so a cumulative count over that position
+    gives the overlap for all k at once.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Optional shared ranking of `gt` and `pred`.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        A mapping from "recovery_at_<k>" to the recovery fraction, None for k
+        larger than the number of samples.
+    """
+    if ranks is None:
+        ranks = Ranks.from_values(gt, pred)
+    n_samples = len(gt)
+
+    gt_positions = np.empty(n_samples, dtype=np.intp)
+    gt_positions[ranks.gt_order[::-1]] = np.arange(n_samples)
+    pred_positions = np.empty(n_samples, dtype=np.intp)
+    pred_positions[ranks.pred_order[::-1]] = np.arange(n_samples)
+
+    overlap_at = np.cumsum(
+        np.bincount(np.maximum(gt_positions, pred_positions), minlength=n_samples)
+    )
+    return {
+        f"recovery_at_{k}": overlap_at[k - 1] / k if 0 < k <= n_samples else None
+        for k in RECOVERY_CURVE_KS
+    }
+
+
+def kernel_ndcg(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the normalized discounted cumulative gain of the predicted top-k.
+
+    Ground truth values are min-max scaled to [0, 1] to serve as gains, so that
+    negative assay values are supported.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Optional shared ranking of `gt` and `pred`.
+        top_k: The cut-off of the ranking. If None, None is returned.
+
+    Returns:
+        NDCG@top_k (0.0 to 1.0), or None if top_k is unavailable or all ground
+        truth values are equal.
+
+    Raises:
+        ValueError: If top_k is larger than the number of samples.
+    """
+    top_k = _validate_top_k(top_k, len(gt))
+    if top_k is None:
+        return None
+    if ranks is None:
+        ranks = Ranks.from_values(gt, pred)
+
+    gt_min, gt_max = gt.min(), gt.max()
+    if gt_max == gt_min:
+        return None
+    gains = (gt - gt_min) / (gt_max - gt_min)
+    discounts = 1.0 / np.log2(np.arange(2, top_k + 2))
+
+    dcg = gains[ranks.top_indices("pred", top_k)] @ discounts
+    ideal_dcg = gains[ranks.top_indices("gt", top_k)] @ discounts
+    return dcg / ideal_dcg
+
+
+def kernel_auc(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the ROC AUC of predictions for classifying the true top-k.
+
+    The true top-k variants are the positive class. The AUC is the Mann-Whitney
+    U statistic of the shared prediction ranks, so ties count as half.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Optional shared ranking of `gt` and `pred`.
+        top_k: The number of positives. If None, None is returned.
+
+    Returns:
+        The AUC (0.0 to 1.0), or None if top_k is unavailable or there are no
+        negatives.
+
+    Raises:
+        ValueError: If top_k is larger than the number of samples.
+    """
+    top_k = _validate_top_k(top_k, len(gt))
+    if top_k is None or top_k == len(gt):
+        return None
+    if ranks is None:
+        ranks = Ranks.from_values(gt, pred)
+
+    n_negatives = len(gt) - top_k
+    positive_rank_sum = ranks.pred[ranks.top_indices("gt", top_k)].sum()
+    return (positive_rank_sum - top_k * (top_k + 1) / 2) / (top_k * n_negatives)
+
+
+def kernel_spearman(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float:
+    """Compute the Spearman rank correlation as the Pearson correlation of ranks.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Optional shared ranking of `gt` and `pred`.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        The Spearman rank correlation coefficient, ranging from -1 to 1.
+    """
+    if ranks is None:
+        ranks = Ranks.from_values(gt, pred)
+    return np.corrcoef(ranks.gt, ranks.pred)[0, 1]
+
+
+def kernel_mse(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the mean squared error of the predictions.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Unused, accepted for the kernel protocol.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        The mean squared error, None without records.
+    """
+    return SufficientStatistics.from_values(gt, pred).metrics(["mse"])["mse"]
+
+
+def kernel_mae(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the mean absolute error of the predictions.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Unused, accepted for the kernel protocol.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        The mean absolute error, None without records.
+    """
+    return SufficientStatistics.from_values(gt, pred).metrics(["mae"])["mae"]
+
+
+def kernel_pearson(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the Pearson correlation of ground truth and predictions.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Unused, accepted for the kernel protocol.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        The Pearson correlation coefficient, None if either side is constant.
+    """
+    return SufficientStatistics.from_values(gt, pred).metrics(["pearson"])["pearson"]
+
+
+def kernel_r2(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    ranks: Ranks | None = None,
+    top_k: int | None = None,
+) -> float | None:
+    """Compute the coefficient of determination of the predictions.
+
+    The predictions are scored as they are, without fitting a regression:
+    R² = 1 - SSE / SST.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        ranks: Unused, accepted for the kernel protocol.
+        top_k: Unused, accepted for the kernel protocol.
+
+    Returns:
+        The coefficient of determination, None if the ground truth is constant.
+    """
+    return SufficientStatistics.from_values(gt, pred).metrics(["r2"])["r2"]
+
+
+def _discover_batched_kernels() -> dict[str, callable]:
+    """Discover all batched metric kernels in the current module (cached)."""
+    global _batched_kernels_cache
+    if _batched_kernels_cache is None:
+        _batched_kernels_cache = {}
+        current_module = sys.modules[__name__]
+        for name, obj in inspect.getmembers(current_module, inspect.isfunction):
+            if name.startswith("batched_kernel_"):
+                metric_name = name.replace("batched_kernel_", "", 1)
+                _batched_kernels_cache[metric_name] = obj
+    return _batched_kernels_cache
+
+
+def batched_kernel_recovery(
+    gt: np.ndarray, pred: np.ndarray, top_k: int | None = None
+) -> np.ndarray:
+    """Compute recovery for every row of resampled ground truth and predictions.
+
+    Args:
+        gt: The resampled ground truth values, one resample per row.
+        pred: The resampled predicted values, one resample per row.
+        top_k: The number of top variants to recover.
+
+    Returns:
+        The recovery of each row, NaN if top_k is unavailable.
+    """
+    n_samples = gt.shape[1]
+    top_k = _validate_top_k(top_k, n_samples)
+    if top_k is None:
+        return np.full(len(gt), np.nan)
+
+    # the tie rule of `Ranks.top_indices`, so rows match `kernel_recovery`
+    overlap = (_top_k_mask(gt, top_k) & _top_k_mask(pred, top_k)).sum(axis=1)
+    return overlap / top_k
+
+
+def batched_kernel_spearman(
+    gt: np.ndarray, pred: np.ndarray, top_k: int | None = None
+) -> np.ndarray:
+    """Compute the Spearman correlation for every row of resampled values.
+
+    Args:
+        gt: The resampled ground truth values, one resample per row.
+        pred: The resampled predicted values, one resample per row.
+        top_k: Unused, accepted for the batched kernel protocol.
+
+    Returns:
+        The Spearman correlation of each row, NaN for constant rows.
+    """
+    gt_ranks = rankdata(gt, axis=1)
+    pred_ranks = rankdata(pred, axis=1)
+    gt_ranks -= gt_ranks.mean(axis=1, keepdims=True)
+    pred_ranks -= pred_ranks.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (gt_ranks * pred_ranks).sum(axis=1) / np.sqrt(
+            (gt_ranks**2).sum(axis=1) * (pred_ranks**2).sum(axis=1)
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class BootstrapConfig:
+    """Configuration of bootstrap confidence intervals."""
+
+    n_resamples: int
+    """The number of bootstrap resamples."""
+
+    seed: int = 0
+    """The seed of the resampling, results are reproducible for a given seed."""
+
+    confidence_level: float = 0.95
+    """The confidence level of the percentile intervals."""
+
+    workers: int | None = None
+    """The number of worker processes evaluating chunks. None evaluates in-process."""
+
+
+def _bootstrap_chunk(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    metric_names: list[str],
+    top_k: int | None,
+    n_resamples: int,
+    seed_sequence: np.random.SeedSequence,
+) -> dict[str, np.ndarray]:
+    """Evaluate kernels on one chunk of bootstrap resamples.
+
+    The chunk's resample indices are drawn as one (n_resamples, n_samples) index
+    matrix. Batched kernels evaluate all rows at once; other kernels are called
+    per row on the gathered arrays.
+
+    Returns:
+        A mapping from metric name to the metric value of each resample, NaN
+        where the kernel returned None.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    indices = rng.integers(0, len(gt), size=(n_resamples, len(gt)))
+    gt_resamples = gt[indices]
+    pred_resamples = pred[indices]
+
+    batched_kernels = _discover_batched_kernels()
+    metric_kernels = _discover_metric_kernels()
+    values = {}
+    for metric_name in metric_names:
+        if metric_name in batched_kernels:
+            values[metric_name] = batched_kernels[metric_name](
+                gt_resamples, pred_resamples, top_k
+            )
+            continue
+        rows = collections.defaultdict(lambda: np.full(n_resamples, np.nan))
+        for row, (gt_row, pred_row) in enumerate(zip(gt_resamples, pred_resamples)):
+            row_value = metric_kernels[metric_name](gt_row, pred_row, top_k=top_k)
+            if not isinstance(row_value, dict):
+                row_value = {metric_name: row_value}
+            for name, value in row_value.items():
+                rows[name][row] = np.nan if value is None else value
+        values.update(rows)
+    return values
+
+
+def bootstrap_confidence_intervals(
+    gt: np.ndarray,
+    pred: np.ndarray,
+    metric_names: list[str],
+    top_k: int | None,
+    config: BootstrapConfig,
+) -> dict[str, float | None]:
+    """Compute percentile bootstrap confidence intervals of metric kernels.
+
+    Records are resampled with replacement. The resamples are evaluated in
+    chunks of at most `BOOTSTRAP_CHUNK_ELEMENTS` gathered values, each chunk
+    being one index matrix with its own child seed of `config.seed`, so the
+    intervals do not depend on `config.workers`.
+
+    Args:
+        gt: The aligned ground truth values.
+        pred: The aligned predicted values.
+        metric_names: The names of the metric kernels to resample.
+        top_k: The fold top_k passed on to the kernels.
+        config: The bootstrap configuration.
+
+    Returns:
+        A mapping with "<metric>_ci_lower" and "<metric>_ci_upper" for every
+        metric value, None where no resample yields a value.
+
+    Examples:
+        >>> bootstrap_confidence_intervals(
+        ...     gt, pred, ["spearman"], None, BootstrapConfig(n_resamples=1000)
+        ... )
+        {'spearman_ci_lower': 0.81, 'spearman_ci_upper': 0.88}
+    """
+    chunk_size = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(len(gt), 1))
+    chunk_sizes = [
+        min(chunk_size, config.n_resamples - start)
+        for start in range(0, config.n_resamples, chunk_size)
+    ]
+    seed_sequences = np.random.SeedSequence(config.seed).spawn(len(chunk_sizes))
+    chunk_args = [
+        (gt, pred, metric_names, top_k, size, seed_sequence)
+        for size, seed_sequence in zip(chunk_sizes, seed_sequences)
+    ]
+
+    if config.workers is not None and config.workers > 1 and len(chunk_args) > 1:
+        # Polars runs its own thread pool, which makes forking unsafe
+        with ProcessPoolExecutor(
+            max_workers=config.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            chunks = list(executor.map(_bootstrap_chunk, *zip(*chunk_args)))
+    else:
+        chunks = [_bootstrap_chunk(*args) for args in chunk_args]
+
+    alpha = (1 - config.confidence_level) / 2
+    intervals = {}
+    for name in chunks[0] if chunks else []:
+        values = np.concatenate([chunk[name] for chunk in chunks])
+        values = values[~np.isnan(values)]
+        lower, upper = (
+            np.quantile(values, [alpha, 1 - alpha]) if len(values) else (None, None)
+        )
+        intervals[f"{name}_ci_lower"] = lower
+        intervals[f"{name}_ci_upper"] = upper
+    return intervals
+
+
 def metric_recovery(
     ground_truth: Subsets | Dataset,
     predicted: Dataset,
     target: str,
     split: str | None = None,
     fold: int | list[int] | None = None,
+    scoring_df: pl.DataFrame | None = None,
 ) -> float | None:
     """Compute the recovery metric: percentage of top-k variants correctly identified.
 
@@ -141,6 +790,9 @@ def metric_recovery(
         fold: Required when ground_truth is a Subsets object. The fold index
             (0-based integer) within the specified split. Must be a single integer,
             not a list.
+        scoring_df: Optional pre-aligned scoring frame for the same records, as
+            returned by `prepare_and_validate_scoring_df`. When given, the join
+            of ground truth and predictions is skipped.
 
     Returns:
         The recovery percentage (0.0 to 1.0) representing the fraction of true top-k
@@ -179,28 +831,16 @@ def metric_recovery(
     if top_k is None:
         return None
 
-    scoring_df = prepare_and_validate_scoring_df(
-        ground_truth, predicted, target, split, fold
-    )
-
-    gt_values = scoring_df[target].to_numpy()
-    pred_values = scoring_df[f"{target}_pred"].to_numpy()
-
-    n_samples = len(gt_values)
-    if top_k > n_samples:
-        raise ValueError(
-            f"top_k ({top_k}) is larger than the number of samples ({n_samples})."
+    if scoring_df is None:
+        scoring_df = prepare_and_validate_scoring_df(
+            ground_truth, predicted, target, split, fold
         )
-    effective_k = min(top_k, n_samples)
-
-    if effective_k <= 0:
-        return None
 
-    top_k_gt_indices = set(np.argsort(gt_values)[-effective_k:])
-    top_k_pred_indices = set(np.argsort(pred_values)[-effective_k:])
-
-    overlap = len(top_k_gt_indices & top_k_pred_indices)
-    return overlap / effective_k
+    return kernel_recovery(
+        scoring_df[target].to_numpy(),
+        scoring_df[f"{target}_pred"].to_numpy(),
+        top_k=top_k,
+    )
 
 
 def metric_spearman(
@@ -209,6 +849,7 @@ def metric_spearman(
     target: str,
     split: str | None = None,
     fold: int | list[int] | None = None,
+    scoring_df: pl.DataFrame | None = None,
 ) -> float:
     """Compute the Spearman rank correlation coefficient between ground truth and
     predictions.
@@ -230,6 +871,9 @@ def metric_spearman(
             splitting strategy to evaluate (e.g., 'random').
         fold: Required when ground_truth is a Subsets object. The fold index
             (0-based integer) within the specified split.
+        scoring_df: Optional pre-aligned scoring frame for the same records, as
+            returned by `prepare_and_validate_scoring_df`. When given, the join
+            of ground truth and predictions is skipped.
 
     Returns:
         The Spearman rank correlation coefficient, ranging from -1 to 1:
@@ -258,30 +902,50 @@ def metric_spearman(
         ...     fold=0
         ... )
     """
-    scoring_df = prepare_and_validate_scoring_df(
-        ground_truth, predicted, target, split, fold
+    if scoring_df is None:
+        scoring_df = prepare_and_validate_scoring_df(
+            ground_truth, predicted, target, split, fold
+        )
+    return kernel_spearman(
+        scoring_df[target].to_numpy(),
+        scoring_df[f"{target}_pred"].to_numpy(),
     )
-    gt_values = scoring_df[target].to_numpy()
-    pred_values = scoring_df[f"{target}_pred"].to_numpy()
-    spearman_corr, _ = spearmanr(gt_values, pred_values)
-    return spearman_corr
 
 
 def calculate_selected_metrics(
     selected_metrics: list[str],
-    ground_truth: Subsets | Dataset,
+    ground_truth: Subsets | Dataset | GroundTruthTable,
     predicted: Dataset,
     target: str,
     split: str | None = None,
     fold: int | list[int] | None = None,
+    scoring_df: pl.DataFrame | None = None,
+    bootstrap: BootstrapConfig | None = None,
 ) -> dict[str, float]:
     """Calculate selected metrics by comparing ground truth and predictions.
 
-    This function dynamically discovers all functions with the 'metric_' prefix in the
-    current module and executes the requested ones. Each metric function receives the
-    ground truth, predictions, and scoring parameters.
+    This function dynamically discovers all functions with the 'kernel_' and
+    'metric_' prefixes in the current module and executes the requested ones.
+    Kernels take precedence: ground truth and predictions are aligned once, ranked
+    once, and every selected kernel is fed the same NumPy arrays. Each remaining
+    metric function receives the ground truth, predictions, and scoring parameters.
 
-    To add a new custom metric, define a function following this pattern:
+    To add a new array-level metric, define a kernel following this pattern:
+        ```python
+        def kernel_<name>(
+            gt: np.ndarray,
+            pred: np.ndarray,
+            ranks: Ranks | None = None,
+            top_k: int | None = None,
+        ) -> float | None:
+            return custom_calculation(gt, pred)
+        ```
+
+    A kernel computing a family of related values (e.g. `recovery_curve`) may
+    return a dictionary of named values instead, which is merged into the results.
+
+    To add a metric that needs the full dataset objects, define a function
+    following this pattern:
         ```python
         def metric_<name>(
             ground_truth: Subsets | Dataset,
@@ -296,7 +960,7 @@ def calculate_selected_metrics(
 
     Args:
         selected_metrics: List of metric names to calculate (e.g., ["spearman"]).
-            Names should match the function suffix after 'metric_'.
+            Names should match the function suffix after 'kernel_' or 'metric_'.
         ground_truth: The ground truth data, either as a complete Dataset or
             a Subsets object containing dataset slices.
         predicted: The predicted Dataset containing model predictions for the target.
@@ -305,6 +969,12 @@ def calculate_selected_metrics(
             splitting strategy to evaluate (e.g., 'random').
         fold: Required when ground_truth is a Subsets object. The fold index
             (0-based integer) within the specified split.
+        scoring_df: Optional pre-aligned scoring frame for the same records.
+            It feeds the kernels and is passed on to every metric function that
+            accepts a `scoring_df` argument, so that they skip their own join.
+        bootstrap: Optional bootstrap configuration. When given, percentile
+            confidence intervals of every selected kernel are added as
+            "<metric>_ci_lower" and "<metric>_ci_upper".
 
     Returns:
         Dictionary mapping metric names to their computed values. For example:
@@ -331,29 +1001,179 @@ def calculate_selected_metrics(
         ...     fold=0
         ... )
     """
+    metric_kernels = _discover_metric_kernels()
     metric_functions = _discover_metric_functions()
     results = {}
 
-    for metric_name in selected_metrics:
-        if metric_name in metric_functions:
-            metric_value = metric_functions[metric_name](
+    if any(metric_name in metric_kernels for metric_name in selected_metrics):
+        if scoring_df is None:
+            scoring_df = prepare_and_validate_scoring_df(
                 ground_truth, predicted, target, split, fold
             )
+        gt_values = scoring_df[target].to_numpy()
+        pred_values = scoring_df[f"{target}_pred"].to_numpy()
+        ranks = Ranks.from_values(gt_values, pred_values)
+        top_k = _get_top_k_from_slice(ground_truth, split, fold)
+
+    for metric_name in selected_metrics:
+        if metric_name in metric_kernels:
+            with profile_stage(f"kernel:{metric_name}"):
+                metric_value = metric_kernels[metric_name](
+                    gt_values, pred_values, ranks=ranks, top_k=top_k
+                )
+            if isinstance(metric_value, dict):
+                results.update(metric_value)
+            else:
+                results[metric_name] = metric_value
+        elif metric_name in metric_functions:
+            metric_function = metric_functions[metric_name]
+            kwargs = {}
+            if scoring_df is not None and _accepts_scoring_df(metric_function):
+                kwargs["scoring_df"] = scoring_df
+            with profile_stage(f"metric:{metric_name}"):
+                metric_value = metric_function(
+                    ground_truth, predicted, target, split, fold, **kwargs
+                )
             results[metric_name] = metric_value
         else:
             logger.warning(f"Metric '{metric_name}' not found in available metrics")
 
+    kernel_names = [name for name in selected_metrics if name in metric_kernels]
+    if bootstrap is not None and kernel_names:
+        with profile_stage("bootstrap"):
+            results.update(
+                bootstrap_confidence_intervals(
+                    gt_values, pred_values, kernel_names, top_k, bootstrap
+                )
+            )
+
     return results
 
 
+def calculate_stratified_metrics(
+    selected_metrics: list[str],
+    scoring_df: pl.DataFrame,
+    target: str,
+    stratify_by: list[str],
+    top_k: int | None = None,
+) -> dict[str, dict[str, dict[str, float | None]]]:
+    """Calculate the selected kernels within every stratum of a scoring frame.
+
+    Each stratum is a single `group_by` pass collecting the row indices of
+    every group; the kernels are fed the gathered values of each group. Rows
+    with a null stratum value are left out. Metric functions, which need the
+    dataset objects, are not calculated per stratum.
+
+    Args:
+        selected_metrics: The metric names; only kernels are calculated.
+        scoring_df: The aligned scoring frame of one mode or fold, with the
+            stratum columns of `add_strata_columns`.
+        target: The name of the scored target.
+        stratify_by: The strata, columns of `scoring_df`.
+        top_k: The fold top_k passed on to the kernels.
+
+    Returns:
+        A mapping from stratum to stratum value (as a string, in sorted order)
+        to the number of records "n" and the metrics of that group. Metrics
+        undefined for a group (NaN, e.g. correlations of a single record) are
+        None.
+
+    Examples:
+        >>> calculate_stratified_metrics(
+        ...     ["spearman"], scoring_df, "DMS_score", ["mutation_count"]
+        ... )
+        {'mutation_count': {'1': {'n': 1520, 'spearman': 0.48}, ...}}
+    """
+    metric_kernels = _discover_metric_kernels()
+    kernel_names = [name for name in selected_metrics if name in metric_kernels]
+    skipped = [name for name in selected_metrics if name not in metric_kernels]
+    if skipped:
+        logger.warning(f"Metrics {skipped} are not calculated per stratum")
+
+    gt_values = scoring_df[target].to_numpy()
+    pred_values = scoring_df[f"{target}_pred"].to_numpy()
+    row_index = "__row__"
+
+    strata = {}
+    for stratum in stratify_by:
+        groups = (
+            scoring_df.select(stratum)
+            .with_row_index(row_index)
+            .drop_nulls(stratum)
+            .group_by(stratum)
+            .agg(pl.col(row_index))
+            .sort(stratum)
+        )
+        strata[stratum] = {}
+        for value, rows in groups.iter_rows():
+            rows = np.asarray(rows)
+            gt, pred = gt_values[rows], pred_values[rows]
+            ranks = Ranks.from_values(gt, pred)
+            group_metrics = {}
+            with warnings.catch_warnings():
+                # Small groups leave correlations undefined
+                warnings.simplefilter("ignore", RuntimeWarning)
+                for metric_name in kernel_names:
+                    metric_value = metric_kernels[metric_name](
+                        gt, pred, ranks=ranks, top_k=top_k
+                    )
+                    if isinstance(metric_value, dict):
+                        group_metrics.update(metric_value)
+                    else:
+                        group_metrics[metric_name] = metric_value
+            for name, metric_value in group_metrics.items():
+                if metric_value is not None and np.isnan(metric_value):
+                    group_metrics[name] = None
+            strata[stratum][str(value)] = {"n": len(rows), **group_metrics}
+    return strata
+
+
+def _calculate_metric_calls(
+    calls: list[tuple[tuple, dict]], workers: int | None = None
+) -> list[dict[str, float]]:
+    """Run `calculate_selected_metrics` calls, optionally on a thread pool.
+
+    Without workers, the calls run one after the other. Otherwise every call,
+    i.e. every (mode, fold) combination, is one unit on a pool of `workers`
+    threads; NumPy and Polars release the GIL in the heavy parts of the
+    kernels, bootstrap resampling and joins. A call is not split further, so
+    its metrics keep sharing one `Ranks` and one set of bootstrap resamples.
+
+    Args:
+        calls: The positional (selected_metrics, ground_truth, predicted,
+            target, split, fold) and keyword arguments of every call.
+        workers: The number of threads. None or 1 runs the calls sequentially.
+
+    Returns:
+        The metrics of every call, in order.
+    """
+    if workers is None or workers <= 1 or len(calls) <= 1:
+        return [calculate_selected_metrics(*args, **kwargs) for args, kwargs in calls]
+
+    # Fill the discovery caches before the threads read them
+    _discover_metric_kernels()
+    _discover_metric_functions()
+    _discover_batched_kernels()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                lambda call: calculate_selected_metrics(*call[0], **call[1]), calls
+            )
+        )
+
+
 def calculate_metrics_by_mode(
     selected_metrics: list[str],
-    ground_truth: Subsets,
+    ground_truth: Subsets | GroundTruthTable,
     predicted: Dataset,
     target: str,
     split: str,
     test_fold: int,
     score_modes: list[str] | None = None,
+    bootstrap: BootstrapConfig | None = None,
+    workers: int | None = None,
+    stratify_by: list[str] | None = None,
 ) -> dict[str, dict[str, float]]:
     """Calculate metrics in different scoring modes.
 
@@ -370,6 +1190,15 @@ def calculate_metrics_by_mode(
             - "per_fold": Score each fold individually
             - "full_dataset": Score against the full underlying dataset (ignoring splits)
             If None, defaults to ["test", "train_available", "per_fold"].
+        bootstrap: Optional bootstrap configuration, adding confidence intervals
+            to every mode (see `calculate_selected_metrics`).
+        workers: Optional number of threads. When greater than 1, every
+            (mode, fold) combination is calculated as a separate unit on a
+            thread pool (see `_calculate_metric_calls`); the results are
+            identical to a sequential run.
+        stratify_by: Optional strata (see `add_strata_columns`). When given,
+            "strata" mirrors the calculated modes with the kernels of every
+            stratum value, see `calculate_stratified_metrics`.
 
     Returns:
         Dictionary with structure:
@@ -389,40 +1218,130 @@ def calculate_metrics_by_mode(
                 }
             }
 
+        When a decomposable metric (see `DECOMPOSABLE_METRICS`) is selected,
+        "sufficient_statistics" additionally maps every "fold_<i>" to the
+        `SufficientStatistics` of that fold. Without bootstrap intervals, the
+        decomposable metrics of train_available are merged from these instead
+        of being recomputed from the records.
+
         Note: When full_dataset mode is used, it scores against the complete dataset
         ignoring all splits. The metric value is identical across all folds since it
         evaluates the same data regardless of the fold.
+
+        The fold-based modes share a single fold-tagged scoring frame built by
+        `prepare_fold_scoring_df`: ground truth and predictions are joined once and
+        each mode is a filter on the fold column.
     """
     if score_modes is None:
         score_modes = ["test", "train_available", "per_fold"]
 
     all_fold_indices = get_fold_indices(ground_truth, split)
     train_folds = [f for f in all_fold_indices if f != test_fold]
+    decomposable_metrics = [m for m in selected_metrics if m in DECOMPOSABLE_METRICS]
 
     results = {}
+    fold_statistics = None
+
+    if any(mode in score_modes for mode in ("test", "train_available", "per_fold")):
+        fold_scoring_df = prepare_fold_scoring_df(
+            ground_truth, predicted, target, split
+        )
+        if stratify_by:
+            # Derive the stratum columns once for every mode and fold
+            with profile_stage("strata"):
+                fold_scoring_df = add_strata_columns(
+                    fold_scoring_df, stratify_by, wild_type_sequence(ground_truth)
+                )
+        fold_frames = {
+            fold_idx: fold_scoring_df.filter(pl.col(FOLD) == fold_idx)
+            for fold_idx in all_fold_indices
+        }
+        if decomposable_metrics:
+            fold_statistics = SufficientStatistics.by_fold(fold_scoring_df, target)
+            fold_statistics = {
+                fold_idx: fold_statistics.get(fold_idx, SufficientStatistics())
+                for fold_idx in all_fold_indices
+            }
+
+    # calculate_selected_metrics calls by result path, run together below
+    calls = {}
+    shared_args = (ground_truth, predicted, target, split)
 
     if "test" in score_modes:
-        results["test"] = calculate_selected_metrics(
-            selected_metrics, ground_truth, predicted, target, split, test_fold
+        calls[("test",)] = (
+            (selected_metrics, *shared_args, test_fold),
+            dict(scoring_df=fold_frames[test_fold], bootstrap=bootstrap),
         )
 
     if "train_available" in score_modes:
-        results["train_available"] = calculate_selected_metrics(
-            selected_metrics, ground_truth, predicted, target, split, train_folds
+        # Decomposable metrics are merged from the fold statistics; bootstrap
+        # intervals still need the records
+        merged_metrics = [] if bootstrap is not None else decomposable_metrics
+        row_metrics = [m for m in selected_metrics if m not in merged_metrics]
+        calls[("train_available",)] = (
+            (row_metrics, *shared_args, train_folds),
+            dict(
+                scoring_df=fold_scoring_df.filter(pl.col(FOLD).is_in(train_folds)),
+                bootstrap=bootstrap,
+            ),
         )
 
     if "per_fold" in score_modes:
-        results["per_fold"] = {}
         for fold_idx in all_fold_indices:
-            fold_metrics = calculate_selected_metrics(
-                selected_metrics, ground_truth, predicted, target, split, fold_idx
+            calls[("per_fold", f"fold_{fold_idx}")] = (
+                (selected_metrics, *shared_args, fold_idx),
+                dict(scoring_df=fold_frames[fold_idx], bootstrap=bootstrap),
             )
-            results["per_fold"][f"fold_{fold_idx}"] = fold_metrics
 
     if "full_dataset" in score_modes:
-        results["full_dataset"] = calculate_selected_metrics(
-            selected_metrics, ground_truth.dataset, predicted, target, None, None
+        calls[("full_dataset",)] = (
+            (selected_metrics, ground_truth.dataset, predicted, target, None, None),
+            dict(bootstrap=bootstrap),
         )
+        if stratify_by:
+            # Align once for the full dataset metrics and their strata
+            full_scoring_df = prepare_and_validate_scoring_df(
+                ground_truth.dataset, predicted, target, None, None
+            )
+            with profile_stage("strata"):
+                calls[("full_dataset",)][1]["scoring_df"] = add_strata_columns(
+                    full_scoring_df, stratify_by, wild_type_sequence(ground_truth)
+                )
+
+    for path, metrics in zip(
+        calls, _calculate_metric_calls(list(calls.values()), workers)
+    ):
+        *parents, name = path
+        section = results
+        for parent in parents:
+            section = section.setdefault(parent, {})
+        section[name] = metrics
+
+    if "train_available" in score_modes and merged_metrics:
+        results["train_available"].update(
+            SufficientStatistics.merge_all(
+                fold_statistics[fold_idx] for fold_idx in train_folds
+            ).metrics(merged_metrics)
+        )
+
+    if stratify_by:
+        for (*parents, name), (args, kwargs) in calls.items():
+            section = results.setdefault("strata", {})
+            for parent in parents:
+                section = section.setdefault(parent, {})
+            section[name] = calculate_stratified_metrics(
+                selected_metrics,
+                kwargs["scoring_df"],
+                target,
+                stratify_by,
+                _get_top_k_from_slice(args[1], args[4], args[5]),
+            )
+
+    if fold_statistics is not None:
+        results["sufficient_statistics"] = {
+            f"fold_{fold_idx}": fold_statistics[fold_idx].to_dict()
+            for fold_idx in all_fold_indices
+        }
 
     results["metadata"] = {
         "test_folds": [test_fold],
@@ -439,17 +1358,30 @@ def evaluate(
     dataset_path: Path | None = None,
     selected_metrics: list[str] | None = None,
     model_name: str | None = None,
-    split: str | None = None,
-    target: str | None = None,
+    split: str | list[str] | None = None,
+    target: str | list[str] | None = None,
     fold: str | None = None,
     score_modes: list[str] | None = None,
-) -> Path:
+    bootstrap: BootstrapConfig | None = None,
+    cache_dir: Path | None = None,
+    result_cache_dir: Path | None = None,
+    metric_workers: int | None = None,
+    stratify_by: list[str] | None = None,
+) -> Path | list[Path]:
     """Calculate performance metrics from predictions and save results to JSON.
 
     Loads ground truth data from a dataset archive (.pgdata or .splits.pgdata),
     loads predictions from a prediction archive, calculates the selected metrics,
     and saves the results to a JSON file with metadata.
 
+    `split` and `target` may also be lists of names, or `ALL_NAMES` ("all") for
+    every split or target of the dataset. The archive and the predictions are
+    then loaded once and every split x target combination is scored. If
+    `metric_path` contains "{split}" and/or "{target}" placeholders, each
+    combination is written to its own JSON file, as a separate call would
+    write it. Otherwise a single JSON document {"results": [...]} holds the
+    documents of all combinations.
+
     The function automatically detects whether the dataset is a plain Dataset
     (.pgdata) or Subsets (.splits.pgdata) based on the file extension.
 
@@ -466,19 +1398,41 @@ def evaluate(
         selected_metrics: Optional list of metric names to calculate (e.g., ["spearman"]).
             If None, all discovered metrics are included.
         model_name: Name of the model that generated predictions (stored in metadata).
-        split: Name of the splitting strategy to evaluate (e.g., 'random', 'kfold_random').
-            Required when dataset_path is a .splits.pgdata file.
-        target: Name of the target variable to score (e.g., 'DMS_score', 'fitness').
-            Required for all metric calculations.
+        split: Name of the splitting strategy to evaluate (e.g., 'random', 'kfold_random'),
+            a list of names, or "all". Required when dataset_path is a .splits.pgdata file.
+        target: Name of the target variable to score (e.g., 'DMS_score', 'fitness'),
+            a list of names, or "all". Required for all metric calculations.
         fold: Fold index (as string) designated as the test fold.
             Required when dataset_path is a .splits.pgdata file.
         score_modes: List of scoring modes. Options: "test", "train_available",
             "per_fold", "full_dataset". If None, defaults to
             ["test", "train_available", "per_fold"].
             Only used when dataset_path is a .splits.pgdata file.
+        bootstrap: Optional bootstrap configuration. When given, every mode also
+            reports "<metric>_ci_lower" and "<metric>_ci_upper" for each kernel.
+        cache_dir: Optional ground truth cache directory, see `load_ground_truth`.
+        result_cache_dir: Optional metric result cache directory. Every section
+            of the JSON (mode, metadata) is looked up by the hashes of both
+            archives, the source of the selected metrics and the scoring
+            parameters; predictions are only loaded and scored for missing
+            sections. Sections not depending on the test fold, such as
+            "full_dataset", are shared by all fold jobs.
+        metric_workers: Optional number of threads calculating (mode, fold,
+            metric) units in parallel, see `calculate_metrics_by_mode`.
+        stratify_by: Optional strata: "mutation_count" and "position" (derived
+            from the wild-type sequence of the dataset) or assay variables.
+            Adds a "strata" section with the kernels of every stratum value
+            of every mode, see `calculate_stratified_metrics`.
 
     Returns:
-        The path to the saved metrics JSON file (same as metric_path input).
+        The path to the saved metrics JSON file (same as metric_path input), or
+        the paths of the per-combination files written from a metric_path
+        template.
+
+    Raises:
+        ValueError: If a requested split or target is not in the dataset, or if
+            a `metric_path` template has other placeholders or maps several
+            combinations to the same file.
 
     Examples:
         >>> # Evaluate predictions on a test fold
@@ -526,67 +1480,450 @@ def evaluate(
 
     logger.info("Start to calculate metrics.")
 
+    if (
+        isinstance(split, list)
+        or isinstance(target, list)
+        or ALL_NAMES in (split, target)
+    ):
+        return _evaluate_combinations(
+            prediction_path,
+            metric_path,
+            dataset_path,
+            selected_metrics,
+            model_name,
+            split,
+            target,
+            fold,
+            score_modes,
+            bootstrap,
+            cache_dir,
+            result_cache_dir,
+            metric_workers,
+            stratify_by,
+        )
+
     if not prediction_path.exists():
-        logger.error(f"Prediction file not found: {prediction_path}")
-        error_result = {
-            "error": f"Prediction file not found: {prediction_path}",
-            "status": "failed",
-        }
+        return _write_missing_prediction_result(
+            prediction_path, metric_path, selected_metrics
+        )
+
+    ground_truth = load_ground_truth(dataset_path, cache_dir)
+
+    return score_predictions(
+        ground_truth,
+        prediction_path,
+        metric_path,
+        dataset_path,
+        selected_metrics,
+        model_name,
+        split,
+        target,
+        fold,
+        score_modes,
+        bootstrap,
+        result_cache_dir,
+        metric_workers,
+        stratify_by,
+    )
 
-        if selected_metrics:
-            for metric_name in selected_metrics:
-                error_result[metric_name] = None
 
-        metric_path.write_text(json.dumps(error_result, indent=2))
+def _evaluate_combinations(
+    prediction_path: Path,
+    metric_path: Path,
+    dataset_path: Path,
+    selected_metrics: list[str] | None,
+    model_name: str | None,
+    split: str | list[str] | None,
+    target: str | list[str] | None,
+    fold: str | None,
+    score_modes: list[str] | None,
+    bootstrap: BootstrapConfig | None,
+    cache_dir: Path | None,
+    result_cache_dir: Path | None,
+    metric_workers: int | None,
+    stratify_by: list[str] | None = None,
+) -> Path | list[Path]:
+    """Score every split x target combination from one load, see `evaluate`."""
+    ground_truth = load_ground_truth(dataset_path, cache_dir)
+    if isinstance(ground_truth, Subsets):
+        split_names = list(ground_truth.slices)
+        target_names = [t.name for t in ground_truth.dataset.assay_targets]
+    elif isinstance(ground_truth, GroundTruthTable):
+        split_names = list(ground_truth.slices)
+        target_names = ground_truth.assay_targets
+    else:
+        split_names = []
+        target_names = [t.name for t in ground_truth.assay_targets]
+
+    combinations = [
+        (split_name, target_name)
+        for split_name in _expand_names("split", split, split_names)
+        for target_name in _expand_names("target", target, target_names)
+    ]
+    is_template = "{split}" in str(metric_path) or "{target}" in str(metric_path)
+    metric_paths = (
+        _expand_metric_paths(metric_path, combinations) if is_template else []
+    )
+
+    if not prediction_path.exists():
+        if not is_template:
+            return _write_missing_prediction_result(
+                prediction_path, metric_path, selected_metrics
+            )
+        return [
+            _write_missing_prediction_result(prediction_path, path, selected_metrics)
+            for path in metric_paths
+        ]
+
+    load_predicted = functools.cache(
+        functools.partial(_load_predictions, ground_truth, prediction_path)
+    )
+    documents = [
+        _score_prediction_document(
+            ground_truth,
+            load_predicted,
+            prediction_path,
+            dataset_path,
+            selected_metrics,
+            model_name,
+            split_name,
+            target_name,
+            fold,
+            score_modes,
+            bootstrap,
+            result_cache_dir,
+            metric_workers,
+            stratify_by,
+        )
+        for split_name, target_name in combinations
+    ]
+
+    if not is_template:
+        metric_path.parent.mkdir(parents=True, exist_ok=True)
+        metric_path.write_text(json.dumps({"results": documents}, indent=2))
         return metric_path
 
+    for path, document in zip(metric_paths, documents):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(document, indent=2))
+    return metric_paths
+
+
+def _expand_metric_paths(
+    metric_path: Path, combinations: list[tuple[str | None, str | None]]
+) -> list[Path]:
+    """Fill a `{split}`/`{target}` metric path template for every combination.
+
+    Raises:
+        ValueError: If the template has other placeholders, or maps several
+            combinations to the same path.
+    """
+    try:
+        metric_paths = [
+            Path(str(metric_path).format(split=split_name, target=target_name))
+            for split_name, target_name in combinations
+        ]
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(
+            f"Invalid --metric-path template {metric_path}: only {{split}} and "
+            f"{{target}} placeholders are supported ({e!r})"
+        ) from e
+    if len(set(metric_paths)) != len(combinations):
+        raise ValueError(
+            f"--metric-path template {metric_path} gives the same path to several "
+            "split/target combinations; include both {split} and {target}"
+        )
+    return metric_paths
+
+
+def _expand_names(
+    kind: str, names: str | list[str] | None, available: list[str]
+) -> list[str | None]:
+    """Resolve a split or target argument of `evaluate` to a list of names.
+
+    Raises:
+        ValueError: If a name is not one of the `available` names.
+    """
+    if isinstance(names, list) and len(names) == 1:
+        names = names[0]
+    if names == ALL_NAMES:
+        return list(available) or [None]
+    if not isinstance(names, list):
+        return [names]
+    unknown = [name for name in names if available and name not in available]
+    if unknown:
+        raise ValueError(f"Unknown {kind}(s) {unknown}, the dataset has: {available}")
+    return names
+
+
+def load_ground_truth(
+    dataset_path: Path, cache_dir: Path | None = None
+) -> Subsets | Dataset | GroundTruthTable:
+    """Load ground truth from a dataset archive.
+
+    Args:
+        dataset_path: Path to a .splits.pgdata file (loaded as Subsets) or a
+            .pgdata file (loaded as Dataset).
+        cache_dir: Optional ground truth cache directory. When given, the
+            archive is loaded as a GroundTruthTable through the content-addressed
+            cache of `scripts.ground_truth`, parsing it only on a cache miss.
+
+    Returns:
+        The loaded Subsets or Dataset, or a GroundTruthTable if `cache_dir` is
+        given.
+
+    Raises:
+        FileNotFoundError: If the archive or its manifest is not found.
+        ValueError: If the archive is invalid.
+    """
     try:
-        if dataset_path.name.endswith(".splits.pgdata"):
-            ground_truth = Subsets.from_path(dataset_path)
-            is_subsets = True
-        else:
-            ground_truth = Dataset.from_path(dataset_path)
-            is_subsets = False
+        with profile_stage("load_ground_truth"):
+            if cache_dir is not None:
+                return load_cached_ground_truth(
+                    dataset_path, cache_dir, _load_ground_truth_for_cache
+                )
+            if dataset_path.name.endswith(".splits.pgdata"):
+                return Subsets.from_path(dataset_path)
+            return Dataset.from_path(dataset_path)
     except (FileNotFoundError, ValueError) as e:
         logger.error(f"Failed to load dataset from {dataset_path}: {e}")
         raise
 
+
+def _load_ground_truth_for_cache(
+    dataset_path: Path,
+) -> Subsets | GroundTruthTable:
+    """Parse an archive on a ground truth cache miss.
+
+    Plain datasets are read straight into a table by `read_pgdata_table`;
+    Subsets are parsed in full for their fold slices.
+    """
+    if dataset_path.name.endswith(".splits.pgdata"):
+        return Subsets.from_path(dataset_path)
+    return read_pgdata_table(dataset_path)
+
+
+def _write_missing_prediction_result(
+    prediction_path: Path, metric_path: Path, selected_metrics: list[str] | None
+) -> Path:
+    """Write an error JSON with null metric values for a missing prediction file."""
+    logger.error(f"Prediction file not found: {prediction_path}")
+    error_result = {
+        "error": f"Prediction file not found: {prediction_path}",
+        "status": "failed",
+    }
+
+    if selected_metrics:
+        for metric_name in selected_metrics:
+            error_result[metric_name] = None
+
+    metric_path.write_text(json.dumps(error_result, indent=2))
+    return metric_path
+
+
+def score_predictions(
+    ground_truth: Subsets | Dataset | GroundTruthTable,
+    prediction_path: Path,
+    metric_path: Path,
+    dataset_path: Path,
+    selected_metrics: list[str] | None = None,
+    model_name: str | None = None,
+    split: str | None = None,
+    target: str | None = None,
+    fold: str | None = None,
+    score_modes: list[str] | None = None,
+    bootstrap: BootstrapConfig | None = None,
+    result_cache_dir: Path | None = None,
+    metric_workers: int | None = None,
+    stratify_by: list[str] | None = None,
+) -> Path:
+    """Score a prediction archive against already loaded ground truth.
+
+    This is `evaluate` without loading the ground truth, so that one loaded
+    archive can score many prediction files. The arguments and the written
+    JSON are the same as for `evaluate`.
+
+    Args:
+        ground_truth: The ground truth loaded by `load_ground_truth` from
+            `dataset_path`.
+        prediction_path: Path to the prediction dataset archive (.pgdata file).
+        metric_path: Path where the calculated metrics JSON will be saved.
+        dataset_path: Path of the ground truth archive, used for metadata.
+        selected_metrics: Optional list of metric names to calculate.
+        model_name: Name of the model that generated predictions.
+        split: Name of the splitting strategy to evaluate.
+        target: Name of the target variable to score.
+        fold: Fold index (as string) designated as the test fold.
+        score_modes: List of scoring modes, see `evaluate`.
+        bootstrap: Optional bootstrap configuration, see `evaluate`.
+        result_cache_dir: Optional metric result cache directory, see `evaluate`.
+        metric_workers: Optional number of metric threads, see `evaluate`.
+        stratify_by: Optional strata, see `evaluate`.
+
+    Returns:
+        The path to the saved metrics JSON file (same as metric_path input).
+    """
+    if not prediction_path.exists():
+        return _write_missing_prediction_result(
+            prediction_path, metric_path, selected_metrics
+        )
+
+    metrics_result = _score_prediction_document(
+        ground_truth,
+        functools.partial(_load_predictions, ground_truth, prediction_path),
+        prediction_path,
+        dataset_path,
+        selected_metrics,
+        model_name,
+        split,
+        target,
+        fold,
+        score_modes,
+        bootstrap,
+        result_cache_dir,
+        metric_workers,
+        stratify_by,
+    )
+
+    metric_path.parent.mkdir(parents=True, exist_ok=True)
+    metric_path.write_text(json.dumps(metrics_result, indent=2))
+    return metric_path
+
+
+def _load_predictions(
+    ground_truth: Subsets | Dataset | GroundTruthTable, prediction_path: Path
+) -> Dataset | GroundTruthTable:
+    """Load a prediction archive in the form matching the ground truth."""
     try:
-        predicted = Dataset.from_path(prediction_path)
+        with profile_stage("load_predictions"):
+            if isinstance(ground_truth, GroundTruthTable):
+                # Scoring against a table only needs the prediction frame
+                return read_pgdata_table(prediction_path)
+            return Dataset.from_path(prediction_path)
     except (FileNotFoundError, ValueError) as e:
         logger.error(f"Failed to load predictions from {prediction_path}: {e}")
         raise
 
-    if is_subsets:
+
+def _score_prediction_document(
+    ground_truth: Subsets | Dataset | GroundTruthTable,
+    load_predicted: Callable[[], Dataset | GroundTruthTable],
+    prediction_path: Path,
+    dataset_path: Path,
+    selected_metrics: list[str] | None,
+    model_name: str | None,
+    split: str | None,
+    target: str | None,
+    fold: str | None,
+    score_modes: list[str] | None,
+    bootstrap: BootstrapConfig | None,
+    result_cache_dir: Path | None,
+    metric_workers: int | None,
+    stratify_by: list[str] | None = None,
+) -> dict:
+    """Compute the metrics JSON document of `score_predictions`.
+
+    The predictions are only loaded, with `load_predicted`, when a section is
+    not served by the result cache.
+    """
+    has_splits = isinstance(ground_truth, Subsets) or (
+        isinstance(ground_truth, GroundTruthTable) and ground_truth.slices
+    )
+    if has_splits:
         if split is None or fold is None or target is None:
             raise ValueError(
                 "Parameters --split, --fold, and --target are required when dataset_path "
                 "is a Subsets file (.splits.pgdata)."
             )
-
         test_fold = int(fold)
-
-        metrics_result = calculate_metrics_by_mode(
-            selected_metrics,
-            ground_truth,
-            predicted,
-            target,
-            split,
-            test_fold,
-            score_modes,
-        )
+        sections = _result_sections(selected_metrics, score_modes, stratify_by)
     else:
         if target is None:
             raise ValueError(
                 "The 'target' parameter is required for metric calculation. "
                 "Please provide --target."
             )
-
-        metrics_result = {
-            "full_dataset": calculate_selected_metrics(
-                selected_metrics, ground_truth, predicted, target, None, None
+        sections = ["full_dataset", "strata"] if stratify_by else ["full_dataset"]
+
+    metrics_result = {}
+    if result_cache_dir is not None:
+        result_cache = MetricResultCache(result_cache_dir)
+        cache_keys = _result_cache_keys(
+            sections,
+            prediction_path,
+            dataset_path,
+            selected_metrics,
+            split,
+            fold,
+            target,
+            bootstrap,
+            stratify_by,
+        )
+        for section in sections:
+            cached_section = result_cache.get(cache_keys[section])
+            if cached_section is not None:
+                metrics_result[section] = cached_section
+
+    missing_sections = [s for s in sections if s not in metrics_result]
+    if missing_sections:
+        predicted = load_predicted()
+        if has_splits:
+            recomputed = set(missing_sections)
+            if "strata" in recomputed:
+                # Strata are computed with all modes
+                recomputed.update(sections)
+            elif "sufficient_statistics" in recomputed:
+                # Fold statistics are computed with the fold-based modes
+                recomputed.update(m for m in sections if m != "full_dataset")
+            computed = calculate_metrics_by_mode(
+                selected_metrics,
+                ground_truth,
+                predicted,
+                target,
+                split,
+                test_fold,
+                [mode for mode in SCORE_MODES if mode in recomputed],
+                bootstrap,
+                metric_workers,
+                stratify_by,
             )
-        }
+        else:
+            kwargs = dict(bootstrap=bootstrap)
+            if stratify_by:
+                scoring_df = prepare_and_validate_scoring_df(
+                    ground_truth, predicted, target, None, None
+                )
+                with profile_stage("strata"):
+                    kwargs["scoring_df"] = add_strata_columns(
+                        scoring_df, stratify_by, wild_type_sequence(ground_truth)
+                    )
+            (computed_metrics,) = _calculate_metric_calls(
+                [
+                    (
+                        (selected_metrics, ground_truth, predicted, target, None, None),
+                        kwargs,
+                    )
+                ],
+                metric_workers,
+            )
+            computed = {"full_dataset": computed_metrics}
+            if stratify_by:
+                computed["strata"] = {
+                    "full_dataset": calculate_stratified_metrics(
+                        selected_metrics,
+                        kwargs["scoring_df"],
+                        target,
+                        stratify_by,
+                        _get_top_k_from_slice(ground_truth, None, None),
+                    )
+                }
+
+        for section in missing_sections:
+            metrics_result[section] = computed[section]
+            if result_cache_dir is not None:
+                result_cache.put(cache_keys[section], computed[section])
+
+    metrics_result = {section: metrics_result[section] for section in sections}
 
     dataset_name = dataset_path.stem
     if any([dataset_name, model_name, split, target, fold]):
@@ -603,18 +1940,364 @@ def evaluate(
         if fold:
             metrics_result["metadata"]["test_fold"] = test_fold
 
-    result_with_metadata = metrics_result
+    return metrics_result
 
-    metric_path.parent.mkdir(parents=True, exist_ok=True)
-    metric_path.write_text(json.dumps(result_with_metadata, indent=2))
-    return metric_path
 
+def _result_sections(
+    selected_metrics: list[str] | None,
+    score_modes: list[str] | None,
+    stratify_by: list[str] | None = None,
+) -> list[str]:
+    """The sections of a metrics JSON written by `calculate_metrics_by_mode`."""
+    if score_modes is None:
+        score_modes = ["test", "train_available", "per_fold"]
+    sections = [mode for mode in SCORE_MODES if mode in score_modes]
+    if stratify_by:
+        sections.append("strata")
+    if any(mode in SCORE_MODES[:3] for mode in sections) and any(
+        name in DECOMPOSABLE_METRICS for name in selected_metrics or []
+    ):
+        sections.append("sufficient_statistics")
+    return sections + ["metadata"]
+
+
+SHARED_SCORING_FUNCTIONS = (
+    _average_ranks,
+    Ranks,
+    _top_k_mask,
+    _bootstrap_chunk,
+    bootstrap_confidence_intervals,
+    calculate_selected_metrics,
+    calculate_metrics_by_mode,
+    SufficientStatistics,
+    prepare_and_validate_scoring_df,
+    prepare_fold_scoring_df,
+    _join_scoring_frames,
+    _join_on_fingerprint,
+)
+"""The shared helpers computing every metric, hashed into every result cache key.
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Calculate metric for ProteinGym benchmark evaluation."
+Changes to shared code outside of this list that change results (e.g. to
+ground truth loading or `proteingym.base`) need a `RESULT_CACHE_VERSION` bump.
+"""
+
+
+def metric_source_digest(
+    selected_metrics: list[str] | None, bootstrap: BootstrapConfig | None = None
+) -> str:
+    """Return a digest of the source code computing the selected metrics.
+
+    Only the selected kernels and metric functions (and their batched kernels
+    when bootstrapping) are hashed, plus `SHARED_SCORING_FUNCTIONS`, so editing
+    one metric leaves the cached results of the others valid. Changes to other
+    shared code are covered by `RESULT_CACHE_VERSION`.
+
+    Args:
+        selected_metrics: The metric names, None for all discovered metrics.
+        bootstrap: The bootstrap configuration, if intervals are computed.
+
+    Returns:
+        The SHA-256 hex digest of the metric names and function sources.
+    """
+    metric_kernels = _discover_metric_kernels()
+    metric_functions = _discover_metric_functions()
+    batched_kernels = _discover_batched_kernels()
+    if selected_metrics is None:
+        selected_metrics = sorted({*metric_kernels, *metric_functions})
+
+    digest = hashlib.sha256()
+    for function in SHARED_SCORING_FUNCTIONS:
+        digest.update(inspect.getsource(function).encode())
+    for metric_name in selected_metrics:
+        functions = [metric_kernels.get(metric_name), metric_functions.get(metric_name)]
+        if bootstrap is not None:
+            functions.append(batched_kernels.get(metric_name))
+        digest.update(metric_name.encode())
+        for function in functions:
+            if function is not None:
+                digest.update(inspect.getsource(function).encode())
+    return digest.hexdigest()
+
+
+def _result_cache_keys(
+    sections: list[str],
+    prediction_path: Path,
+    dataset_path: Path,
+    selected_metrics: list[str] | None,
+    split: str | None,
+    fold: str | None,
+    target: str,
+    bootstrap: BootstrapConfig | None,
+    stratify_by: list[str] | None = None,
+) -> dict[str, str]:
+    """The result cache key of every section of a metrics JSON."""
+    components = dict(
+        prediction=archive_digest(prediction_path),
+        ground_truth=archive_digest(dataset_path),
+        metric_source=metric_source_digest(selected_metrics, bootstrap),
+        selected_metrics=selected_metrics,
+        split=split,
+        target=target,
+        stratify_by=stratify_by,
+        bootstrap=(
+            None
+            if bootstrap is None
+            else {
+                "n_resamples": bootstrap.n_resamples,
+                "seed": bootstrap.seed,
+                "confidence_level": bootstrap.confidence_level,
+            }
+        ),
+    )
+    return {
+        section: result_cache_key(
+            mode=section, fold=None if fold is None else int(fold), **components
+        )
+        for section in sections
+    }
+
+
+EVALUATION_MANIFEST_COLUMNS = [
+    "prediction_path",
+    "dataset_path",
+    "split",
+    "target",
+    "fold",
+    "metric_path",
+]
+"""The required columns of an `evaluate_many` manifest."""
+
+
+def _evaluate_manifest_rows(
+    dataset_path: Path,
+    rows: list[dict[str, str | None]],
+    selected_metrics: list[str] | None,
+    score_modes: list[str] | None,
+    bootstrap: BootstrapConfig | None,
+    cache_dir: Path | None = None,
+    result_cache_dir: Path | None = None,
+    metric_workers: int | None = None,
+    stratify_by: list[str] | None = None,
+) -> list[Path]:
+    """Load one ground truth archive and score all given manifest rows with it."""
+    ground_truth = load_ground_truth(dataset_path, cache_dir)
+    return [
+        score_predictions(
+            ground_truth,
+            Path(row["prediction_path"]),
+            Path(row["metric_path"]),
+            dataset_path,
+            selected_metrics,
+            row.get("model_name"),
+            row["split"],
+            row["target"],
+            row["fold"],
+            score_modes,
+            bootstrap,
+            result_cache_dir,
+            metric_workers,
+            stratify_by,
+        )
+        for row in rows
+    ]
+
+
+def evaluate_many(
+    manifest_path: Path,
+    selected_metrics: list[str] | None = None,
+    score_modes: list[str] | None = None,
+    bootstrap: BootstrapConfig | None = None,
+    workers: int | None = None,
+    cache_dir: Path | None = None,
+    result_cache_dir: Path | None = None,
+    metric_workers: int | None = None,
+    stratify_by: list[str] | None = None,
+) -> list[Path]:
+    """Score many prediction files, loading each ground truth archive once.
+
+    The manifest is a CSV file with the columns `EVALUATION_MANIFEST_COLUMNS`
+    and an optional `model_name` column; each row is scored as `evaluate`
+    would, writing an identical metrics JSON to its `metric_path`.
+
+    Rows are grouped by `dataset_path`, and each group is scored by one task,
+    so every archive is parsed once; the groups run on `workers` processes.
+    With a `cache_dir`, the archive is parsed into the ground truth cache
+    up front instead, and each group is split into up to `workers` tasks that
+    memory-map the cached table.
+
+    Args:
+        manifest_path: Path to the manifest CSV file.
+        selected_metrics: Optional list of metric names to calculate.
+        score_modes: List of scoring modes, see `evaluate`.
+        bootstrap: Optional bootstrap configuration, see `evaluate`.
+        workers: The number of worker processes. None scores in-process.
+        cache_dir: Optional ground truth cache directory, see `load_ground_truth`.
+        result_cache_dir: Optional metric result cache directory, see `evaluate`.
+        metric_workers: Optional number of metric threads per worker process,
+            see `evaluate`.
+        stratify_by: Optional strata, see `evaluate`.
+
+    Returns:
+        The metric paths written, in manifest order.
+
+    Raises:
+        ValueError: If the manifest lacks a required column.
+
+    Examples:
+        >>> evaluate_many(Path("manifest.csv"), ["spearman"], workers=8)
+        [PosixPath('metric/BRCA1_HUMAN/esm/DMS_score/random/fold0.json'), ...]
+    """
+    manifest = pl.read_csv(manifest_path, infer_schema=False)
+    missing_columns = set(EVALUATION_MANIFEST_COLUMNS) - set(manifest.columns)
+    if missing_columns:
+        raise ValueError(
+            f"Manifest {manifest_path} is missing the columns: {sorted(missing_columns)}"
+        )
+
+    rows_by_dataset = collections.defaultdict(list)
+    for row_idx, row in enumerate(manifest.to_dicts()):
+        rows_by_dataset[row["dataset_path"]].append((row_idx, row))
+
+    tasks = []
+    for dataset_path, indexed_rows in rows_by_dataset.items():
+        n_tasks = 1
+        if cache_dir is not None and workers is not None and workers > 1:
+            # Parse the archive once here; the tasks memory-map the cached table
+            load_ground_truth(Path(dataset_path), cache_dir)
+            n_tasks = min(workers, len(indexed_rows))
+        for chunk in np.array_split(np.arange(len(indexed_rows)), n_tasks):
+            tasks.append([indexed_rows[i] for i in chunk])
+
+    task_args = [
+        (
+            Path(task[0][1]["dataset_path"]),
+            [row for _, row in task],
+            selected_metrics,
+            score_modes,
+            bootstrap,
+            cache_dir,
+            result_cache_dir,
+            metric_workers,
+            stratify_by,
+        )
+        for task in tasks
+    ]
+    if workers is not None and workers > 1 and len(tasks) > 1:
+        # Polars runs its own thread pool, which makes forking unsafe
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            task_results = list(executor.map(_evaluate_manifest_rows, *zip(*task_args)))
+    else:
+        task_results = [_evaluate_manifest_rows(*args) for args in task_args]
+
+    metric_paths = [None] * len(manifest)
+    for task, paths in zip(tasks, task_results):
+        for (row_idx, _), path in zip(task, paths):
+            metric_paths[row_idx] = path
+    return metric_paths
+
+
+def _add_bootstrap_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the bootstrap confidence interval arguments to a parser."""
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=None,
+        help="Number of bootstrap resamples for confidence intervals of each metric. If not specified, no intervals are calculated.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the bootstrap resampling",
     )
+    parser.add_argument(
+        "--bootstrap-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes evaluating bootstrap chunks. If not specified, chunks are evaluated in-process.",
+    )
+
+
+def _add_cache_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the ground truth cache argument to a parser."""
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        nargs="?",
+        const=default_cache_dir(),
+        default=None,
+        help="Load ground truth through the content-addressed cache in this directory. Without a value, $PROTEINGYM_BENCHMARK_CACHE_DIR or ~/.cache/proteingym-benchmark/ground_truth is used. If not specified, the archive is parsed on every run.",
+    )
+
+
+def _add_result_cache_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the metric result cache argument to a parser."""
+    parser.add_argument(
+        "--result-cache-dir",
+        type=Path,
+        nargs="?",
+        const=default_result_cache_dir(),
+        default=None,
+        help="Reuse metric results cached in this directory for unchanged predictions, ground truth, metric code and parameters. Without a value, the 'results' directory of the ground truth cache directory is used. If not specified, all metrics are calculated.",
+    )
+
 
+def _add_stratify_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the stratification argument to a parser."""
+    parser.add_argument(
+        "--stratify-by",
+        type=lambda value: value.split(","),
+        default=None,
+        help="Comma-separated strata to calculate the kernels in (e.g., 'mutation_count,position,<assay variable>'). mutation_count and position are derived from the wild-type sequence. If not specified, no strata are calculated.",
+    )
+
+
+def _add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the profiling argument to a parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write the wall time, CPU time and peak RSS of every scoring stage (archive loading, slicing, to_df, join, each metric) to a .profile.json file next to the output. When several files are written (a --metric-path template or evaluate-many), one <command>.profile.json is written to their common directory instead. Stages run in the worker processes of evaluate-many --workers are not included.",
+    )
+
+
+def _profile_output_path(metric_paths: Path | list[Path], command: str) -> Path:
+    """Return the output path whose sidecar holds the profile of a run.
+
+    A single metric file keeps its own sidecar. The profile of a run writing
+    several files covers all of them, so it is written once, named after the
+    command, in their common directory.
+    """
+    if isinstance(metric_paths, Path):
+        return metric_paths
+    if not metric_paths:
+        return Path(command)
+    output_dir = os.path.commonpath([path.absolute().parent for path in metric_paths])
+    return Path(output_dir) / command
+
+
+def _single_or_list(values: list[str] | None) -> str | list[str] | None:
+    """Unwrap a single value of a repeatable argument."""
+    if values is not None and len(values) == 1:
+        return values[0]
+    return values
+
+
+def _bootstrap_config_from_args(args: argparse.Namespace) -> BootstrapConfig | None:
+    """Create the bootstrap configuration from parsed arguments, if requested."""
+    if not args.bootstrap:
+        return None
+    return BootstrapConfig(
+        n_resamples=args.bootstrap,
+        seed=args.seed,
+        workers=args.bootstrap_workers,
+    )
+
+
+def _add_evaluate_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the `evaluate` command to a parser."""
     parser.add_argument(
         "--prediction-path",
         type=Path,
@@ -649,14 +2332,16 @@ def main():
     parser.add_argument(
         "--split",
         type=str,
+        nargs="+",
         default=None,
-        help="Name of the splitting strategy (e.g., 'random', 'kfold_random'). Required for .splits.pgdata files.",
+        help="Name(s) of the splitting strategies (e.g., 'random', 'kfold_random'), or 'all'. Required for .splits.pgdata files. With several, use '{split}' in --metric-path to write one file per split.",
     )
     parser.add_argument(
         "--target",
         type=str,
+        nargs="+",
         default=None,
-        help="Name of the target variable to score (e.g., 'DMS_score', 'fitness'). Required.",
+        help="Name(s) of the target variables to score (e.g., 'DMS_score', 'fitness'), or 'all'. Required. With several, use '{target}' in --metric-path to write one file per target.",
     )
     parser.add_argument(
         "--fold",
@@ -672,19 +2357,144 @@ def main():
         help="Scoring modes to calculate (e.g., 'test' 'train_available' 'per_fold' 'full_dataset'). If not specified, defaults to test, train_available, and per_fold.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        dest="metric_workers",
+        type=int,
+        default=None,
+        help="Number of threads calculating (mode, fold) units in parallel. If not specified, metrics are calculated sequentially.",
+    )
 
-    return evaluate(
-        prediction_path=args.prediction_path,
-        metric_path=args.metric_path,
-        selected_metrics=args.selected_metrics,
-        dataset_path=args.dataset_path,
-        model_name=args.model_name,
-        split=args.split,
-        target=args.target,
-        fold=args.fold,
-        score_modes=args.score_modes,
+    _add_bootstrap_arguments(parser)
+    _add_cache_argument(parser)
+    _add_result_cache_argument(parser)
+    _add_stratify_argument(parser)
+    _add_profile_argument(parser)
+    parser.set_defaults(run=_run_evaluate)
+
+
+def _run_evaluate(args: argparse.Namespace) -> Path | list[Path]:
+    """Run the `evaluate` command."""
+    with Profiler() if args.profile else contextlib.nullcontext() as profiler:
+        metric_path = evaluate(
+            prediction_path=args.prediction_path,
+            metric_path=args.metric_path,
+            selected_metrics=args.selected_metrics,
+            dataset_path=args.dataset_path,
+            model_name=args.model_name,
+            split=_single_or_list(args.split),
+            target=_single_or_list(args.target),
+            fold=args.fold,
+            score_modes=args.score_modes,
+            bootstrap=_bootstrap_config_from_args(args),
+            cache_dir=args.cache_dir,
+            result_cache_dir=args.result_cache_dir,
+            metric_workers=args.metric_workers,
+            stratify_by=args.stratify_by,
+        )
+    if profiler is not None:
+        profiler.write(_profile_output_path(metric_path, "evaluate"))
+    return metric_path
+
+
+def _add_evaluate_many_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the `evaluate-many` command to a parser."""
+    parser.add_argument(
+        "--manifest-path",
+        type=Path,
+        required=True,
+        help=f"Path to a CSV file with the columns {', '.join(EVALUATION_MANIFEST_COLUMNS)} and an optional model_name column",
     )
+    parser.add_argument(
+        "--selected-metrics",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Optional list of metric names to calculate (e.g., 'spearman'). If not specified, the metrics of --params-path are calculated.",
+    )
+    parser.add_argument(
+        "--score-modes",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Scoring modes to calculate. If not specified, the score modes of --params-path are used, or test, train_available, and per_fold.",
+    )
+    parser.add_argument(
+        "--params-path",
+        type=Path,
+        default=None,
+        help="Optional DVC params file (e.g., default.yaml) providing 'metrics' and 'score_modes'",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes scoring predictions. If not specified, predictions are scored in-process.",
+    )
+    parser.add_argument(
+        "--metric-workers",
+        type=int,
+        default=None,
+        help="Number of threads calculating (mode, fold) units in parallel within each worker. If not specified, metrics are calculated sequentially.",
+    )
+    _add_bootstrap_arguments(parser)
+    _add_cache_argument(parser)
+    _add_result_cache_argument(parser)
+    _add_stratify_argument(parser)
+    _add_profile_argument(parser)
+    parser.set_defaults(run=_run_evaluate_many)
+
+
+def _run_evaluate_many(args: argparse.Namespace) -> list[Path]:
+    """Run the `evaluate-many` command."""
+    selected_metrics = args.selected_metrics
+    score_modes = args.score_modes
+    if args.params_path is not None:
+        params = yaml.safe_load(args.params_path.read_text())
+        selected_metrics = selected_metrics or params.get("metrics")
+        score_modes = score_modes or params.get("score_modes")
+
+    with Profiler() if args.profile else contextlib.nullcontext() as profiler:
+        metric_paths = evaluate_many(
+            manifest_path=args.manifest_path,
+            selected_metrics=selected_metrics,
+            score_modes=score_modes,
+            bootstrap=_bootstrap_config_from_args(args),
+            workers=args.workers,
+            cache_dir=args.cache_dir,
+            result_cache_dir=args.result_cache_dir,
+            metric_workers=args.metric_workers,
+            stratify_by=args.stratify_by,
+        )
+    if profiler is not None:
+        profiler.write(_profile_output_path(metric_paths, "evaluate_many"))
+    return metric_paths
+
+
+def main(argv: list[str] | None = None) -> Path | list[Path]:
+    """Run the `evaluate` or `evaluate-many` command of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.metric",
+        description="Calculate metric for ProteinGym benchmark evaluation.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    _add_evaluate_arguments(
+        commands.add_parser(
+            "evaluate",
+            help="Score one prediction archive.",
+            description="Calculate metrics for one prediction archive.",
+        )
+    )
+    _add_evaluate_many_arguments(
+        commands.add_parser(
+            "evaluate-many",
+            help="Score the prediction archives of a manifest.",
+            description="Calculate metrics for many prediction files, loading "
+            "each ground truth archive once.",
+        )
+    )
+    args = parser.parse_args(argv)
+    return args.run(args)
 
 
 if __name__ == "__main__":
@@ -692,4 +2502,8 @@ if __name__ == "__main__":
         level=logging.INFO,
         format="%(message)s",
     )
-    logger.info(f"Metrics have been saved to {main()}.")
+    metric_paths = main()
+    if isinstance(metric_paths, list):
+        logger.info(f"Metrics have been saved to {len(metric_paths)} files.")
+    else:
+        logger.info(f"Metrics have been saved to {metric_paths}.")
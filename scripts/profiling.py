@@ -0,0 +1,191 @@
+"""Per-stage wall time, CPU time and peak memory of scoring runs.
+
+Scoring code marks its stages (archive loading, slicing, `to_df`, joining,
+every metric kernel, ...) with `profile_stage`. Stages cost nothing unless a
+`Profiler` is active, as set up by the `--profile` option of `scripts.metric`
+and `scripts.utils`; the profiler then accumulates, per stage name, the
+number of calls, the wall and CPU time, and the process peak RSS.
+
+CPU time close to wall time points at computation, CPU time well below wall
+time at I/O (or waiting on other threads). `peak_rss_growth_bytes` is the
+largest increase of the process peak RSS within one call of the stage, which
+attributes new memory peaks to the stage that caused them.
+
+Profiles are written as `<output>.profile.json` sidecars and rolled up
+across a run by `summarize_profiles`.
+
+Examples:
+    >>> with Profiler() as profiler:
+    ...     with profile_stage("join"):
+    ...         scoring_df = join(gt_df, pred_df)
+    >>> profiler.to_dict()["stages"]["join"]
+    {'calls': 1, 'wall_seconds': 0.42, 'cpu_seconds': 0.4, ...}
+"""
+
+import contextlib
+import dataclasses
+import json
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+import polars as pl
+
+PROFILE_FILE_SUFFIX = ".profile.json"
+"""Suffix of profile sidecar files."""
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_active_profiler = None
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of the process so far, in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+@dataclasses.dataclass
+class StageTiming:
+    """The accumulated cost of one stage.
+
+    Attributes:
+        calls: The number of times the stage ran.
+        wall_seconds: The total wall time.
+        cpu_seconds: The total CPU time of the process during the stage.
+        peak_rss_bytes: The process peak RSS at the end of the last call.
+        peak_rss_growth_bytes: The largest increase of the process peak RSS
+            within one call.
+    """
+
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    peak_rss_growth_bytes: int = 0
+
+
+class Profiler:
+    """Accumulates stage timings while active (as a context manager)."""
+
+    def __init__(self):
+        self.stages: dict[str, StageTiming] = {}
+        self._lock = threading.Lock()
+        self._start = None
+
+    def __enter__(self) -> "Profiler":
+        global _active_profiler
+        self._previous = _active_profiler
+        _active_profiler = self
+        self._start = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _active_profiler
+        self.record(
+            "total",
+            time.perf_counter() - self._start[0],
+            time.process_time() - self._start[1],
+            0,
+        )
+        _active_profiler = self._previous
+
+    def record(
+        self, name: str, wall_seconds: float, cpu_seconds: float, rss_growth: int
+    ) -> None:
+        """Add one call of a stage."""
+        with self._lock:
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.calls += 1
+            timing.wall_seconds += wall_seconds
+            timing.cpu_seconds += cpu_seconds
+            timing.peak_rss_bytes = peak_rss()
+            timing.peak_rss_growth_bytes = max(timing.peak_rss_growth_bytes, rss_growth)
+
+    def to_dict(self) -> dict:
+        """Return the timings as a JSON-serializable dictionary."""
+        return {
+            "stages": {
+                name: dataclasses.asdict(timing) for name, timing in self.stages.items()
+            },
+            "peak_rss_bytes": peak_rss(),
+        }
+
+    def write(self, output_path: Path) -> Path:
+        """Write the timings next to an output file.
+
+        Args:
+            output_path: The output of the profiled run.
+
+        Returns:
+            The sidecar path, `output_path` with `PROFILE_FILE_SUFFIX` as suffix.
+        """
+        path = output_path.with_suffix(PROFILE_FILE_SUFFIX)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return path
+
+
+@contextlib.contextmanager
+def profile_stage(name: str):
+    """Time a stage on the active profiler, if any.
+
+    Concurrent stages (e.g. metric threads) are each timed in full, and CPU
+    time is that of the whole process, so stage totals can exceed "total".
+
+    Args:
+        name: The stage name, such as "join" or "kernel:spearman".
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    wall, cpu, rss = time.perf_counter(), time.process_time(), peak_rss()
+    try:
+        yield
+    finally:
+        profiler.record(
+            name,
+            time.perf_counter() - wall,
+            time.process_time() - cpu,
+            peak_rss() - rss,
+        )
+
+
+def summarize_profiles(profile_dir: Path) -> pl.DataFrame:
+    """Roll up all profile sidecars below a directory.
+
+    Args:
+        profile_dir: The directory searched recursively for
+            `*.profile.json` files.
+
+    Returns:
+        One row per stage, with the number of profiled runs, the total calls,
+        wall and CPU time, the CPU fraction of the wall time and the largest
+        peak RSS and peak RSS growth, sorted by decreasing wall time.
+    """
+    rows = [
+        {"stage": name, **timing}
+        for path in sorted(profile_dir.rglob(f"*{PROFILE_FILE_SUFFIX}"))
+        for name, timing in json.loads(path.read_text())["stages"].items()
+    ]
+    if not rows:
+        return pl.DataFrame(schema={"stage": pl.String})
+    return (
+        pl.DataFrame(rows)
+        .group_by("stage")
+        .agg(
+            pl.len().alias("runs"),
+            pl.col("calls").sum(),
+            pl.col("wall_seconds").sum(),
+            pl.col("cpu_seconds").sum(),
+            pl.col("peak_rss_bytes").max(),
+            pl.col("peak_rss_growth_bytes").max(),
+        )
+        .with_columns(
+            (pl.col("cpu_seconds") / pl.col("wall_seconds")).alias("cpu_fraction")
+        )
+        .sort("wall_seconds", descending=True)
+    )
@@ -0,0 +1,93 @@
+"""Content-addressed cache of metric results.
+
+Each section of a metric JSON ("test", "train_available", "per_fold",
+"full_dataset", ...) is stored as its own entry, keyed by everything it is
+computed from: the SHA-256 of the prediction and ground truth archives, a
+digest of the source of the selected metric functions and the shared scoring
+helpers, and the scoring parameters. Re-running an evaluation whose inputs did
+not change reads the entries back instead of scoring, and sections that do not
+depend on the test fold (such as "full_dataset") are computed by the first
+fold job only.
+
+Examples:
+    >>> cache = MetricResultCache(Path(".cache/results"))
+    >>> key = result_cache_key(mode="full_dataset", split="random", ...)
+    >>> cache.get(key) is None
+    True
+    >>> cache.put(key, {"spearman": 0.83})
+    >>> cache.get(key)
+    {'spearman': 0.83}
+"""
+
+import dataclasses
+import hashlib
+import json
+from pathlib import Path
+
+from scripts.ground_truth import _atomic_write, default_cache_dir
+
+RESULT_CACHE_VERSION = 2
+"""Version of the result computation shared by all metrics, part of every key.
+
+The source of the selected metrics and of `SHARED_SCORING_FUNCTIONS` is already
+part of every key (see `metric_source_digest`). Bump it when a change outside
+of them (alignment helpers, ground truth loading, scoring modes, result layout,
+`proteingym.base`) changes the results.
+"""
+
+FOLD_INDEPENDENT_SECTIONS = ("full_dataset", "per_fold", "sufficient_statistics")
+"""Result sections that are identical for every test fold of a split."""
+
+
+def default_result_cache_dir() -> Path:
+    """Return the default metric result cache directory.
+
+    Returns:
+        The "results" directory inside `default_cache_dir()`.
+    """
+    return default_cache_dir() / "results"
+
+
+def result_cache_key(**components) -> str:
+    """Return the cache key of a result section.
+
+    Args:
+        **components: JSON-serializable values the section is computed from.
+            Sections in `FOLD_INDEPENDENT_SECTIONS` (given as `mode`) ignore
+            the `fold` component.
+
+    Returns:
+        The SHA-256 hex digest of the components.
+    """
+    if components.get("mode") in FOLD_INDEPENDENT_SECTIONS:
+        components["fold"] = None
+    payload = json.dumps(
+        {"version": RESULT_CACHE_VERSION, **components}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclasses.dataclass(frozen=True)
+class MetricResultCache:
+    """A directory of cached result sections, one JSON file per key.
+
+    Attributes:
+        directory: The cache directory, created on the first `put`.
+    """
+
+    directory: Path
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached section of `key`, or None on a miss."""
+        entry = self.directory / f"{key}.json"
+        if not entry.exists():
+            return None
+        return json.loads(entry.read_text())
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a result section under `key`, atomically."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _atomic_write(
+            self.directory / f"{key}.json",
+            lambda tmp: tmp.write_text(json.dumps(value)),
+        )
@@ -0,0 +1,222 @@
+"""Partitioned store of aggregated benchmark results.
+
+`benchmark/metrics.csv` holds one row per (game, model, dataset, split,
+target). Rewriting it in full for every new set of rows does not scale with
+the number of results, so rows are stored as one Parquet file per (game,
+model) partition instead, next to a small key index:
+
+    <directory>/
+        index.parquet                      game, model, dataset, split, target, partition
+        game=<game>/model=<model>/results.parquet
+
+An upsert rewrites only the partitions of the new rows (and the index), and
+a query reads only the partitions whose keys match its filters. The store is
+authoritative and the CSV is an export of it. The CSV is also the copy shared
+through git, so a CSV that changed since the last export (for example by a
+pull, see `is_exported`) is reconciled back into the store (`reconcile_csv`)
+before new rows are added.
+
+Examples:
+    >>> store = ResultsStore(Path("benchmark/results"))
+    >>> store.upsert(rows)
+    [PosixPath('benchmark/results/game=supervised/model=pls/results.parquet')]
+    >>> store.query(dataset="charge_ladder")["test_spearman"].to_list()
+    [0.41, 0.52]
+    >>> store.export_csv(Path("benchmark/metrics.csv"))
+"""
+
+import dataclasses
+import hashlib
+import io
+from pathlib import Path
+
+import polars as pl
+
+from scripts.ground_truth import _atomic_write, archive_digest
+
+RESULT_KEY_COLUMNS = ("game", "model", "dataset", "split", "target")
+"""Columns identifying a result row."""
+
+PARTITION_COLUMNS = ("game", "model")
+"""Key columns by which result rows are partitioned into files."""
+
+_PARTITION = "partition"
+_INDEX_SCHEMA = {**dict.fromkeys(RESULT_KEY_COLUMNS, pl.String), _PARTITION: pl.String}
+
+
+@dataclasses.dataclass(frozen=True)
+class ResultsStore:
+    """A directory of result partitions with a key index.
+
+    Attributes:
+        directory: The store directory, created on the first `upsert`.
+    """
+
+    directory: Path
+
+    @property
+    def index_path(self) -> Path:
+        """The Parquet file indexing the keys of every partition."""
+        return self.directory / "index.parquet"
+
+    @property
+    def export_digest_path(self) -> Path:
+        """The file holding the SHA-256 of the last CSV written by `export_csv`."""
+        return self.directory / "export.sha256"
+
+    def exists(self) -> bool:
+        """Check whether any rows were stored."""
+        return self.index_path.exists()
+
+    def partition_path(self, game: str, model: str) -> Path:
+        """Return the Parquet file holding the rows of a game and model."""
+        return self.directory / f"game={game}" / f"model={model}" / "results.parquet"
+
+    def index(self) -> pl.DataFrame:
+        """Return the key index, one row per stored result with its partition."""
+        if not self.exists():
+            return pl.DataFrame(schema=_INDEX_SCHEMA)
+        return pl.read_parquet(self.index_path)
+
+    def upsert(self, rows: pl.DataFrame) -> list[Path]:
+        """Insert or replace result rows, rewriting only their partitions.
+
+        Rows replace stored rows with the same `RESULT_KEY_COLUMNS`; within
+        `rows`, the last row of a key wins.
+
+        Args:
+            rows: Result rows with all `RESULT_KEY_COLUMNS` and any metric
+                columns.
+
+        Returns:
+            The rewritten partition files.
+
+        Raises:
+            ValueError: If `rows` lacks key columns.
+        """
+        missing = [c for c in RESULT_KEY_COLUMNS if c not in rows.columns]
+        if missing:
+            raise ValueError(f"Result rows are missing key columns: {missing}")
+        if rows.is_empty():
+            return []
+
+        rows = rows.with_columns(pl.col(c).cast(pl.String) for c in RESULT_KEY_COLUMNS)
+        written = []
+        index_rows = []
+        for (game, model), partition_rows in rows.group_by(
+            *PARTITION_COLUMNS, maintain_order=True
+        ):
+            path = self.partition_path(game, model)
+            if path.exists():
+                partition_rows = pl.concat(
+                    [pl.read_parquet(path), partition_rows], how="diagonal_relaxed"
+                )
+            partition_rows = partition_rows.unique(
+                subset=list(RESULT_KEY_COLUMNS), keep="last", maintain_order=True
+            ).sort(list(RESULT_KEY_COLUMNS))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, partition_rows.write_parquet)
+            written.append(path)
+            index_rows.append(
+                partition_rows.select(RESULT_KEY_COLUMNS).with_columns(
+                    pl.lit(path.relative_to(self.directory).as_posix()).alias(_PARTITION)
+                )
+            )
+
+        partitions = [p.relative_to(self.directory).as_posix() for p in written]
+        index = pl.concat(
+            [self.index().filter(~pl.col(_PARTITION).is_in(partitions)), *index_rows]
+        ).sort(list(RESULT_KEY_COLUMNS))
+        _atomic_write(self.index_path, index.write_parquet)
+        return written
+
+    def query(self, **filters: str) -> pl.DataFrame:
+        """Return the stored rows matching key filters.
+
+        Only the partitions holding matching keys (according to the index)
+        are read.
+
+        Args:
+            **filters: Values of `RESULT_KEY_COLUMNS` that rows must match.
+
+        Returns:
+            The matching rows, sorted by `RESULT_KEY_COLUMNS`.
+
+        Raises:
+            ValueError: If a filter is not a key column.
+        """
+        unknown = [c for c in filters if c not in RESULT_KEY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown result key columns: {unknown}")
+
+        predicate = pl.all_horizontal(
+            True, *(pl.col(c) == value for c, value in filters.items())
+        )
+        partitions = (
+            self.index().filter(predicate)[_PARTITION].unique(maintain_order=True)
+        )
+        if partitions.is_empty():
+            return pl.DataFrame(schema=dict.fromkeys(RESULT_KEY_COLUMNS, pl.String))
+        return (
+            pl.concat(
+                [pl.read_parquet(self.directory / p) for p in partitions],
+                how="diagonal_relaxed",
+            )
+            .filter(predicate)
+            .sort(list(RESULT_KEY_COLUMNS))
+        )
+
+    def reconcile_csv(self, csv_path: Path) -> list[Path]:
+        """Upsert the rows of a CSV export that differ from the stored rows.
+
+        Rows are compared as the text of their CSV fields, so a CSV exported
+        from this store is a no-op, while rows added or changed in the CSV
+        since (for example by a pull) replace the stored rows of their keys.
+
+        Args:
+            csv_path: A CSV file of result rows, as written by `export_csv`.
+
+        Returns:
+            The rewritten partition files.
+        """
+        csv_text = pl.read_csv(csv_path, infer_schema=False)
+        stored_text = pl.read_csv(
+            io.BytesIO(self.query().write_csv().encode()), infer_schema=False
+        )
+        stored_text = stored_text.select(
+            pl.col(c) if c in stored_text.columns else pl.lit(None, pl.String).alias(c)
+            for c in csv_text.columns
+        )
+        stored_rows = set(stored_text.iter_rows())
+        is_changed = pl.Series([row not in stored_rows for row in csv_text.iter_rows()])
+        return self.upsert(pl.read_csv(csv_path).filter(is_changed))
+
+    def is_exported(self, csv_path: Path) -> bool:
+        """Check whether a CSV is unchanged since the last `export_csv`.
+
+        Args:
+            csv_path: The CSV file to check.
+
+        Returns:
+            True if the SHA-256 of the file is that of the last export.
+        """
+        return (
+            self.export_digest_path.exists()
+            and self.export_digest_path.read_text() == archive_digest(csv_path)
+        )
+
+    def export_csv(self, output_path: Path) -> None:
+        """Write all stored rows to a CSV file, sorted by key.
+
+        The SHA-256 of the CSV is recorded in `export_digest_path`.
+
+        Args:
+            output_path: The CSV file to write.
+        """
+        csv_bytes = self.query().write_csv().encode()
+        output_path.write_bytes(csv_bytes)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _atomic_write(
+            self.export_digest_path,
+            lambda tmp: tmp.write_text(hashlib.sha256(csv_bytes).hexdigest()),
+        )
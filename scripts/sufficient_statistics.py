@@ -0,0 +1,186 @@
+"""Mergeable sufficient statistics of decomposable metrics.
+
+MSE, MAE, Pearson correlation and R² of a set of records only depend on a few
+moments of the aligned ground truth and predicted values. A
+`SufficientStatistics` holds those moments for one fold; statistics of any
+union of folds are obtained by merging, without revisiting rows, so that
+`train_available` and cross-fold pooled values are exact combinations of the
+per-fold statistics.
+
+Centered sums of squares and cross-products are kept (instead of raw ones) and
+merged with the pairwise update of Chan et al., which avoids the cancellation
+of computing variances from raw sums.
+
+Examples:
+    >>> folds = SufficientStatistics.by_fold(fold_scoring_df, "DMS Score")
+    >>> pooled = SufficientStatistics.merge_all(folds.values())
+    >>> pooled.metrics(["pearson", "mse"])
+    {'pearson': 0.82, 'mse': 0.41}
+"""
+
+import dataclasses
+from collections.abc import Iterable
+
+import numpy as np
+import polars as pl
+
+DECOMPOSABLE_METRICS = ("mse", "mae", "pearson", "r2")
+"""Metrics computed exactly from merged `SufficientStatistics`."""
+
+
+@dataclasses.dataclass(frozen=True)
+class SufficientStatistics:
+    """Moments of aligned ground truth and predicted values.
+
+    Attributes:
+        n: The number of records.
+        sum_gt: The sum of ground truth values.
+        sum_pred: The sum of predicted values.
+        ss_gt: The sum of squared deviations of ground truth from its mean.
+        ss_pred: The sum of squared deviations of predictions from their mean.
+        cross: The sum of cross-products of both deviations.
+        sse: The sum of squared errors.
+        sae: The sum of absolute errors.
+    """
+
+    n: int = 0
+    sum_gt: float = 0.0
+    sum_pred: float = 0.0
+    ss_gt: float = 0.0
+    ss_pred: float = 0.0
+    cross: float = 0.0
+    sse: float = 0.0
+    sae: float = 0.0
+
+    @classmethod
+    def from_values(cls, gt: np.ndarray, pred: np.ndarray) -> "SufficientStatistics":
+        """Compute the statistics of aligned value arrays.
+
+        Args:
+            gt: The aligned ground truth values.
+            pred: The aligned predicted values.
+
+        Returns:
+            The statistics of the records.
+        """
+        gt = np.asarray(gt, dtype=float)
+        pred = np.asarray(pred, dtype=float)
+        if len(gt) == 0:
+            return cls()
+        gt_dev = gt - gt.mean()
+        pred_dev = pred - pred.mean()
+        error = pred - gt
+        return cls(
+            n=len(gt),
+            sum_gt=float(gt.sum()),
+            sum_pred=float(pred.sum()),
+            ss_gt=float(gt_dev @ gt_dev),
+            ss_pred=float(pred_dev @ pred_dev),
+            cross=float(gt_dev @ pred_dev),
+            sse=float(error @ error),
+            sae=float(np.abs(error).sum()),
+        )
+
+    @classmethod
+    def by_fold(
+        cls, fold_scoring_df: pl.DataFrame, target: str, fold_column: str = "fold"
+    ) -> dict[int, "SufficientStatistics"]:
+        """Compute the statistics of every fold in one grouped pass.
+
+        Args:
+            fold_scoring_df: A fold-tagged scoring frame, as built by
+                `prepare_fold_scoring_df`.
+            target: The scored target; predictions are in "<target>_pred".
+            fold_column: The column holding the fold index of each record.
+
+        Returns:
+            A mapping from fold index to the statistics of its records.
+        """
+        gt = pl.col(target).cast(pl.Float64)
+        pred = pl.col(f"{target}_pred").cast(pl.Float64)
+        rows = (
+            fold_scoring_df.group_by(fold_column)
+            .agg(
+                pl.len().alias("n"),
+                gt.sum().alias("sum_gt"),
+                pred.sum().alias("sum_pred"),
+                ((gt - gt.mean()) ** 2).sum().alias("ss_gt"),
+                ((pred - pred.mean()) ** 2).sum().alias("ss_pred"),
+                ((gt - gt.mean()) * (pred - pred.mean())).sum().alias("cross"),
+                ((pred - gt) ** 2).sum().alias("sse"),
+                (pred - gt).abs().sum().alias("sae"),
+            )
+            .iter_rows(named=True)
+        )
+        return {row.pop(fold_column): cls(**row) for row in rows}
+
+    def merge(self, other: "SufficientStatistics") -> "SufficientStatistics":
+        """Combine the statistics of two disjoint sets of records.
+
+        Args:
+            other: The statistics of the other records.
+
+        Returns:
+            The statistics of the union of both sets.
+        """
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+        n = self.n + other.n
+        gt_delta = other.sum_gt / other.n - self.sum_gt / self.n
+        pred_delta = other.sum_pred / other.n - self.sum_pred / self.n
+        weight = self.n * other.n / n
+        return SufficientStatistics(
+            n=n,
+            sum_gt=self.sum_gt + other.sum_gt,
+            sum_pred=self.sum_pred + other.sum_pred,
+            ss_gt=self.ss_gt + other.ss_gt + gt_delta**2 * weight,
+            ss_pred=self.ss_pred + other.ss_pred + pred_delta**2 * weight,
+            cross=self.cross + other.cross + gt_delta * pred_delta * weight,
+            sse=self.sse + other.sse,
+            sae=self.sae + other.sae,
+        )
+
+    @classmethod
+    def merge_all(
+        cls, statistics: Iterable["SufficientStatistics"]
+    ) -> "SufficientStatistics":
+        """Combine the statistics of any number of disjoint sets of records."""
+        merged = cls()
+        for fold_statistics in statistics:
+            merged = merged.merge(fold_statistics)
+        return merged
+
+    def metrics(
+        self, metric_names: Iterable[str] = DECOMPOSABLE_METRICS
+    ) -> dict[str, float | None]:
+        """Compute decomposable metrics from the statistics.
+
+        Args:
+            metric_names: The metrics to compute, from `DECOMPOSABLE_METRICS`.
+
+        Returns:
+            A mapping from metric name to its value, None where it is undefined
+            (no records, or constant values for Pearson and R²).
+        """
+        values = {
+            "mse": self.sse / self.n if self.n else None,
+            "mae": self.sae / self.n if self.n else None,
+            "pearson": (
+                self.cross / np.sqrt(self.ss_gt * self.ss_pred)
+                if self.ss_gt > 0 and self.ss_pred > 0
+                else None
+            ),
+            "r2": 1.0 - self.sse / self.ss_gt if self.ss_gt > 0 else None,
+        }
+        return {name: values[name] for name in metric_names}
+
+    def to_dict(self) -> dict[str, float]:
+        """Return the statistics as a JSON-serializable dictionary."""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, float]) -> "SufficientStatistics":
+        """Rebuild statistics written by `to_dict`."""
+        return cls(**data)
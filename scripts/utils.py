@@ -1,18 +1,63 @@
+import collections
+import contextlib
 import json
-from pathlib import Path
+import tomllib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
 from typing import Annotated
 import numpy as np
 import polars as pl
 
 from proteingym.base.dataset import Subsets, Dataset, SEQUENCE
+from proteingym.base.sequence import SequenceType
 import typer
 
+from scripts.ground_truth import (
+    RECORD_KEY,
+    GroundTruthTable,
+    _atomic_write,
+    archive_digest,
+    record_fingerprint,
+    table_fingerprint,
+)
+from scripts.profiling import Profiler, profile_stage, summarize_profiles
+from scripts.results_store import RESULT_KEY_COLUMNS, ResultsStore
+from scripts.sufficient_statistics import DECOMPOSABLE_METRICS, SufficientStatistics
 
-def get_fold_indices(subsets: Subsets, split: str) -> list[int]:
+FOLD = "fold"
+"""The fold index column of a fold-tagged scoring frame."""
+
+PGDATA_MANIFEST_FILE = "manifest.lock"
+"""The manifest file inside a dataset archive."""
+
+MUTATION_COUNT = "mutation_count"
+"""Stratum: the number of positions at which a sequence differs from the wild type."""
+
+POSITION = "position"
+"""Stratum: the 1-based mutated position of single mutants."""
+
+AGGREGATED_SECTIONS = ("test", "train_available")
+"""Result sections averaged across fold files by `aggregate_metrics`."""
+
+CONFIDENCE_INTERVAL_SUFFIXES = ("_ci_lower", "_ci_upper")
+"""Suffixes of the per-fold bootstrap interval bounds, which are not averaged."""
+
+AGGREGATED_FILE_SUFFIX = "_aggregated.json"
+"""Suffix of the aggregated metric files written by `aggregate_all_metrics`."""
+
+_FOLD_METADATA_KEYS = ("test_fold", "test_folds", "train_available_folds")
+
+_STRATA_CHUNK_BYTES = 1 << 24
+"""The maximum number of sequence bytes compared at once by `add_strata_columns`."""
+
+
+def get_fold_indices(subsets: Subsets | GroundTruthTable, split: str) -> list[int]:
     """Get all fold indices for a given split strategy.
 
     Args:
-        subsets: The Subsets object containing split information.
+        subsets: The Subsets object (or GroundTruthTable) containing split
+            information.
         split: The name of the split strategy (e.g., 'random', 'kfold_random').
 
     Returns:
@@ -22,7 +67,7 @@ def get_fold_indices(subsets: Subsets, split: str) -> list[int]:
 
 
 def prepare_and_validate_scoring_df(
-    ground_truth: Subsets | Dataset,
+    ground_truth: Subsets | Dataset | GroundTruthTable,
     predicted: Dataset,
     target: str,
     split: str | None = None,
@@ -37,7 +82,9 @@ def prepare_and_validate_scoring_df(
 
     Args:
         ground_truth: The ground truth data, either as a complete Dataset or
-            a Subsets object containing dataset slices.
+            a Subsets object containing dataset slices. A GroundTruthTable is
+            scored like a Subsets object if it has slices, like a Dataset
+            otherwise.
         predicted: The predicted Dataset containing model predictions for the
             target. Must have the same structure (assays and variables) as the
             ground truth.
@@ -57,7 +104,8 @@ def prepare_and_validate_scoring_df(
             - target_pred column: predicted values (with '_pred' suffix)
 
     Raises:
-        TypeError: If ground_truth is neither a Dataset nor a Subsets object.
+        TypeError: If ground_truth is neither a Dataset, a Subsets object nor a
+            GroundTruthTable.
         ValueError: If split or fold is None when ground_truth is a Subsets object.
         ValueError: If any ground truth records lack corresponding predictions
             (incomplete coverage).
@@ -78,9 +126,41 @@ def prepare_and_validate_scoring_df(
         ...     fold=0
         ... )
     """
+    if isinstance(ground_truth, GroundTruthTable):
+        if not ground_truth.slices:
+            with profile_stage("to_df"):
+                gt_df = _table_df(ground_truth, target)
+        elif split is None or fold is None:
+            raise ValueError(
+                "Both 'split' and 'fold' must be provided when scoring Subsets."
+            )
+        else:
+            fold_indices = [fold] if isinstance(fold, int) else fold
+            with profile_stage("slice"):
+                gt_df = _table_fold_df(ground_truth, target, split, fold_indices).drop(
+                    FOLD
+                )
+        _validate_assay_variables(
+            ground_truth.assay_variables, _assay_variable_names(predicted)
+        )
+        with profile_stage("to_df"):
+            pred_df = _table_df(predicted, target)
+        if ground_truth.slices:
+            with profile_stage("slice"):
+                pred_df = _table_fold_predictions(
+                    ground_truth, predicted, pred_df, split, fold_indices
+                ).drop(FOLD)
+        with profile_stage("join"):
+            return _join_scoring_frames(
+                gt_df,
+                pred_df,
+                ground_truth.assay_variables,
+            )
+
     if isinstance(ground_truth, Dataset):
-        gt_df = ground_truth.to_df(target_names=target)
-        pred_df = predicted.to_df(target_names=target)
+        with profile_stage("to_df"):
+            gt_df = ground_truth.to_df(target_names=target)
+            pred_df = predicted.to_df(target_names=target)
     elif isinstance(ground_truth, Subsets):
         if split is None or fold is None:
             raise ValueError(
@@ -93,36 +173,172 @@ def prepare_and_validate_scoring_df(
         pred_dfs = []
         for fold_idx in fold_indices:
             dataset_slice = ground_truth.slices[split][fold_idx]
-            gt_dfs.append(
-                ground_truth.dataset[dataset_slice].to_df(target_names=target)
-            )
-            pred_dfs.append(predicted[dataset_slice].to_df(target_names=target))
+            with profile_stage("slice"):
+                gt_slice = ground_truth.dataset[dataset_slice]
+                pred_slice = predicted[dataset_slice]
+            with profile_stage("to_df"):
+                gt_dfs.append(gt_slice.to_df(target_names=target))
+                pred_dfs.append(pred_slice.to_df(target_names=target))
 
         gt_df = pl.concat(gt_dfs, how="vertical_relaxed")
         pred_df = pl.concat(pred_dfs, how="vertical_relaxed")
     else:
         raise TypeError("'ground_truth' must be a Dataset or a Subsets object.")
 
-    # Validate that ground_truth and predicted have the same assay_variables structure
     if isinstance(ground_truth, Subsets):
         gt_variables = ground_truth.dataset.assay_variables
-        pred_variables = predicted.assay_variables
     else:
         gt_variables = ground_truth.assay_variables
-        pred_variables = predicted.assay_variables
 
+    _validate_assay_variables(gt_variables, predicted.assay_variables)
+    with profile_stage("join"):
+        return _join_scoring_frames(
+            gt_df,
+            pred_df,
+            [v.name for v in gt_variables],
+        )
+
+
+def _validate_assay_variables(gt_variables: list, pred_variables: list) -> None:
+    """Check that ground truth and predictions declare the same assay variables.
+
+    Args:
+        gt_variables: The assay variables (or their names) of the ground truth.
+        pred_variables: The assay variables (or their names) of the predictions.
+
+    Raises:
+        ValueError: If the assay variables differ.
+    """
     if gt_variables != pred_variables:
-        gt_var_names = [v.name for v in gt_variables]
-        pred_var_names = [v.name for v in pred_variables]
+        gt_var_names = [getattr(v, "name", v) for v in gt_variables]
+        pred_var_names = [getattr(v, "name", v) for v in pred_variables]
         raise ValueError(
             f"Ground truth and predicted datasets must have identical assay_variables. "
             f"Ground truth has: {gt_var_names}, predicted has: {pred_var_names}"
         )
 
+
+def _assay_variable_names(dataset: Dataset | GroundTruthTable) -> list[str]:
+    """The assay variable names of a Dataset or a GroundTruthTable."""
+    return [getattr(v, "name", v) for v in dataset.assay_variables]
+
+
+def _table_fold_df(
+    table: GroundTruthTable, target: str, split: str, folds: list[int]
+) -> pl.DataFrame:
+    """Rows of the given folds of a table, tagged with their fold in `FOLD`.
+
+    The rows keep their `RECORD_KEY` fingerprints. Rows belonging to several
+    folds appear once per fold, in the same order as a per-fold concatenation
+    of `Subsets` slices.
+    """
+    columns = [SEQUENCE, *table.assay_variables, target, RECORD_KEY]
+    frame = table.frame.with_columns(table.record_keys)
+    return pl.concat(
+        [
+            frame.filter(pl.col(table.fold_column(split, fold_idx)))
+            .select(columns)
+            .with_columns(pl.lit(fold_idx, dtype=pl.Int64).alias(FOLD))
+            for fold_idx in folds
+        ],
+        how="vertical_relaxed",
+    )
+
+
+def _table_df(
+    table: Dataset | GroundTruthTable, target: str
+) -> pl.DataFrame:
+    """The `to_df` frame of a table with its `RECORD_KEY`, or of a Dataset."""
+    if isinstance(table, GroundTruthTable):
+        return table.to_df(target_names=target).with_columns(table.record_keys)
+    return table.to_df(target_names=target)
+
+
+def _table_fold_predictions(
+    table: GroundTruthTable,
+    predicted: Dataset | GroundTruthTable,
+    pred_df: pl.DataFrame,
+    split: str,
+    folds: list[int],
+) -> pl.DataFrame:
+    """Prediction rows of the given folds of a table, tagged with `FOLD`.
+
+    Fold membership is applied per assay by record position, as slicing the
+    predicted Dataset with the fold slices of a `Subsets` does: the i-th
+    prediction record of an assay takes the membership of the i-th ground
+    truth record of that assay, and records beyond the ground truth records
+    of their assay belong to no fold. Like `_table_fold_df`, rows belonging to
+    several folds appear once per fold.
+    """
+    gt_offsets = np.cumsum([0, *_assay_sizes(table)])
+    pred_offsets = np.cumsum([0, *_assay_sizes(predicted)])
+    gt_rows, pred_rows = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for assay_idx in range(min(len(gt_offsets), len(pred_offsets)) - 1):
+        n_rows = min(
+            gt_offsets[assay_idx + 1] - gt_offsets[assay_idx],
+            pred_offsets[assay_idx + 1] - pred_offsets[assay_idx],
+        )
+        gt_rows.append(gt_offsets[assay_idx] + np.arange(n_rows))
+        pred_rows.append(pred_offsets[assay_idx] + np.arange(n_rows))
+
+    fold_columns = [table.fold_column(split, fold_idx) for fold_idx in folds]
+    membership = table.frame.select(fold_columns)[np.concatenate(gt_rows)]
+    pred_df = pred_df[np.concatenate(pred_rows)]
+    return pl.concat(
+        [
+            pred_df.filter(membership[fold_column]).with_columns(
+                pl.lit(fold_idx, dtype=pl.Int64).alias(FOLD)
+            )
+            for fold_idx, fold_column in zip(folds, fold_columns)
+        ],
+        how="vertical_relaxed",
+    )
+
+
+def _assay_sizes(dataset: Dataset | GroundTruthTable) -> list[int]:
+    """The number of records of every assay of a Dataset or a GroundTruthTable."""
+    if isinstance(dataset, GroundTruthTable):
+        return dataset.assay_sizes or [dataset.frame.height]
+    return [len(assay.records) for assay in dataset.assays]
+
+
+def _join_scoring_frames(
+    gt_df: pl.DataFrame,
+    pred_df: pl.DataFrame,
+    declared_variable_names: list[str],
+    extra_keys: list[str] | None = None,
+) -> pl.DataFrame:
+    """Join ground truth and prediction frames and validate prediction coverage.
+
+    Records are aligned on a 64-bit fingerprint of their keys (see
+    `record_fingerprint`) rather than on the long sequence strings. Frames of
+    a `GroundTruthTable` carry the fingerprints in a `RECORD_KEY` column,
+    computed once per dataset and used when both frames carry them; other
+    frames are fingerprinted here. The key
+    columns of every matched pair are then compared, so a fingerprint shared
+    by two different records never pairs them. If the fingerprints of either
+    frame are not unique, a matched pair differs in its keys, a record is left
+    unmatched, or the key types differ, the frames are joined on the key
+    columns instead. Both give the same frame, in ground truth order.
+
+    Args:
+        gt_df: The ground truth frame produced by `to_df`, optionally with a
+            `RECORD_KEY` column.
+        pred_df: The prediction frame produced by `to_df`, optionally with a
+            `RECORD_KEY` column.
+        declared_variable_names: The assay variable names of the ground truth.
+        extra_keys: Additional columns present in both frames to join on
+            (e.g. the fold column of a fold-tagged scoring frame).
+
+    Returns:
+        The inner join of both frames, predicted values suffixed with '_pred'.
+
+    Raises:
+        ValueError: If predictions are missing.
+    """
     # Join on (sequence, variables) to align predictions with ground truth
     # Only use variables that are present and not all-null in both dataframes
     # (Polars doesn't match null values in joins: NULL != NULL)
-    declared_variable_names = [v.name for v in gt_variables]
     variable_names = [
         var
         for var in declared_variable_names
@@ -131,9 +347,19 @@ def prepare_and_validate_scoring_df(
         and not gt_df[var].is_null().all()
         and not pred_df[var].is_null().all()
     ]
-    join_keys = [SEQUENCE] + variable_names
+    # Stored fingerprints are only comparable with each other
+    stored = RECORD_KEY in gt_df.columns and RECORD_KEY in pred_df.columns
+    gt_keys = _record_keys(gt_df, variable_names, extra_keys or [], stored)
+    pred_keys = _record_keys(pred_df, variable_names, extra_keys or [], stored)
+    gt_df = gt_df.drop(RECORD_KEY, strict=False)
+    pred_df = pred_df.drop(RECORD_KEY, strict=False)
+    join_keys = [SEQUENCE] + variable_names + (extra_keys or [])
 
-    joined = gt_df.join(pred_df, on=join_keys, how="inner", suffix="_pred")
+    joined = _join_on_fingerprint(gt_df, pred_df, gt_keys, pred_keys, join_keys)
+    if joined is None:
+        joined = gt_df.join(
+            pred_df, on=join_keys, how="inner", suffix="_pred", maintain_order="left"
+        )
 
     missing_predictions = len(gt_df) - len(joined)
     if missing_predictions > 0:
@@ -142,6 +368,230 @@ def prepare_and_validate_scoring_df(
     return joined
 
 
+def _record_keys(
+    df: pl.DataFrame, variable_names: list[str], extra_keys: list[str], stored: bool
+) -> pl.Series:
+    """The fingerprint of the join keys of every row of a scoring frame.
+
+    The stored `RECORD_KEY` column is reused when `stored` is set, and the
+    extra keys (small integers such as the fold) are combined into it.
+    """
+    if stored and RECORD_KEY in df.columns:
+        keys = df[RECORD_KEY]
+    else:
+        keys = df.select(record_fingerprint([SEQUENCE, *variable_names])).to_series()
+    if extra_keys:
+        keys = df.select(extra_keys).with_columns(keys).select(
+            record_fingerprint([RECORD_KEY, *extra_keys])
+        ).to_series()
+    return keys
+
+
+def _join_on_fingerprint(
+    gt_df: pl.DataFrame,
+    pred_df: pl.DataFrame,
+    gt_keys: pl.Series,
+    pred_keys: pl.Series,
+    join_keys: list[str],
+) -> pl.DataFrame | None:
+    """Inner join on record fingerprints, or None if it is not exact."""
+    if any(gt_df.schema[key] != pred_df.schema[key] for key in join_keys):
+        return None
+    for keys in (gt_keys.drop_nulls(), pred_keys.drop_nulls()):
+        if keys.n_unique() != len(keys):
+            return None
+
+    matches = (
+        gt_keys.to_frame()
+        .with_row_index("gt_row")
+        .join(
+            pred_keys.to_frame().with_row_index("pred_row"),
+            on=RECORD_KEY,
+            how="inner",
+            maintain_order="left",
+        )
+    )
+    gt_idx, pred_idx = matches["gt_row"], matches["pred_row"]
+
+    # Unmatched records are counted by the key-column join, which is exact
+    # even if stored fingerprints cover other assay variables
+    if len(gt_idx) < len(gt_df):
+        return None
+    gt_matched = gt_df[gt_idx]
+    pred_matched = pred_df[pred_idx]
+    # A fingerprint shared by different records must not pair them
+    if not gt_matched.select(join_keys).equals(pred_matched.select(join_keys)):
+        return None
+
+    pred_values = pred_matched.drop(join_keys)
+    return gt_matched.hstack(
+        pred_values.rename(
+            {c: f"{c}_pred" for c in pred_values.columns if c in gt_df.columns}
+        )
+    )
+
+
+def prepare_fold_scoring_df(
+    ground_truth: Subsets | GroundTruthTable,
+    predicted: Dataset,
+    target: str,
+    split: str,
+) -> pl.DataFrame:
+    """Join ground truth and predictions once for every fold of a split.
+
+    Each fold of the split is sliced and converted to a frame exactly once,
+    tagged with its index in a `FOLD` column, and all folds are aligned with
+    the predictions in a single join. Scoring modes ("test",
+    "train_available", "per_fold") can then be derived by filtering or
+    partitioning on the `FOLD` column instead of re-running
+    `prepare_and_validate_scoring_df` per metric and per mode.
+
+    Records belonging to several folds appear once per fold, matching the
+    concatenation done by `prepare_and_validate_scoring_df` for fold lists.
+
+    For a GroundTruthTable the fold-tagged rows of both frames come from its
+    fold membership columns (see `_table_fold_predictions`).
+
+    Args:
+        ground_truth: The Subsets object (or GroundTruthTable) containing
+            cross-validation splits.
+        predicted: The predicted Dataset containing model predictions.
+        target: The name of the target variable to score.
+        split: The name of the splitting strategy (e.g., 'random').
+
+    Returns:
+        A Polars DataFrame with the columns of `prepare_and_validate_scoring_df`
+        plus an integer `FOLD` column.
+
+    Raises:
+        ValueError: If the assay variables differ or predictions are missing.
+
+    Examples:
+        >>> df = prepare_fold_scoring_df(cv_subsets, predictions, 'fitness', 'random')
+        >>> test_df = df.filter(pl.col(FOLD) == 0)
+    """
+    if isinstance(ground_truth, GroundTruthTable):
+        _validate_assay_variables(
+            ground_truth.assay_variables, _assay_variable_names(predicted)
+        )
+        with profile_stage("slice"):
+            gt_df = _table_fold_df(
+                ground_truth,
+                target,
+                split,
+                get_fold_indices(ground_truth, split),
+            )
+        with profile_stage("to_df"):
+            pred_df = _table_df(predicted, target)
+        with profile_stage("slice"):
+            pred_df = _table_fold_predictions(
+                ground_truth,
+                predicted,
+                pred_df,
+                split,
+                get_fold_indices(ground_truth, split),
+            )
+        with profile_stage("join"):
+            return _join_scoring_frames(
+                gt_df,
+                pred_df,
+                ground_truth.assay_variables,
+                extra_keys=[FOLD],
+            )
+
+    gt_dfs = []
+    pred_dfs = []
+    for fold_idx, dataset_slice in enumerate(ground_truth.slices[split]):
+        fold_column = pl.lit(fold_idx, dtype=pl.Int64).alias(FOLD)
+        with profile_stage("slice"):
+            gt_slice = ground_truth.dataset[dataset_slice]
+            pred_slice = predicted[dataset_slice]
+        with profile_stage("to_df"):
+            gt_dfs.append(
+                gt_slice.to_df(target_names=target).with_columns(fold_column)
+            )
+            pred_dfs.append(
+                pred_slice.to_df(target_names=target).with_columns(fold_column)
+            )
+
+    gt_df = pl.concat(gt_dfs, how="vertical_relaxed")
+    pred_df = pl.concat(pred_dfs, how="vertical_relaxed")
+
+    _validate_assay_variables(
+        ground_truth.dataset.assay_variables, predicted.assay_variables
+    )
+    with profile_stage("join"):
+        return _join_scoring_frames(
+            gt_df,
+            pred_df,
+            [v.name for v in ground_truth.dataset.assay_variables],
+            extra_keys=[FOLD],
+        )
+
+
+def add_strata_columns(
+    scoring_df: pl.DataFrame, stratify_by: list[str], wild_type: str | None = None
+) -> pl.DataFrame:
+    """Add the derived stratum columns requested in `stratify_by`.
+
+    `MUTATION_COUNT` and `POSITION` are derived from the sequences and the
+    wild-type sequence in one vectorized comparison; other strata must be
+    columns of the frame already (e.g. assay variables). Sequences whose
+    length differs from the wild type (insertions, deletions) get null strata,
+    as do multiple mutants for `POSITION`.
+
+    Args:
+        scoring_df: A scoring frame with the 'sequence' column.
+        stratify_by: The strata, `MUTATION_COUNT`, `POSITION` or column names.
+        wild_type: The wild-type sequence, required for the derived strata.
+
+    Returns:
+        The frame with the derived stratum columns added.
+
+    Raises:
+        ValueError: If a stratum is unknown, or if the derived strata lack the
+            wild type.
+    """
+    derived = [s for s in stratify_by if s in (MUTATION_COUNT, POSITION)]
+    unknown = [
+        s for s in stratify_by if s not in derived and s not in scoring_df.columns
+    ]
+    if unknown:
+        raise ValueError(
+            f"Unknown strata {unknown}; use {MUTATION_COUNT}, {POSITION} or one "
+            f"of the columns {scoring_df.columns}."
+        )
+    if not derived:
+        return scoring_df
+    if wild_type is None:
+        raise ValueError(f"Stratifying by {derived} requires a wild-type sequence.")
+
+    wild_type_codes = np.frombuffer(wild_type.encode(), dtype=np.uint8)
+    sequences = scoring_df[SEQUENCE]
+    counts = np.full(len(sequences), -1)
+    positions = np.full(len(sequences), -1)
+    substitutions = np.flatnonzero(
+        (sequences.str.len_bytes() == len(wild_type)).fill_null(False).to_numpy()
+    )
+    chunk_rows = max(_STRATA_CHUNK_BYTES // max(len(wild_type), 1), 1)
+    for start in range(0, len(substitutions), chunk_rows):
+        rows = substitutions[start : start + chunk_rows]
+        codes = np.frombuffer(
+            sequences.gather(rows).str.join("").item().encode(), dtype=np.uint8
+        ).reshape(len(rows), len(wild_type))
+        mutated = codes != wild_type_codes
+        counts[rows] = mutated.sum(axis=1)
+        positions[rows] = np.where(counts[rows] == 1, mutated.argmax(axis=1) + 1, -1)
+
+    strata = {MUTATION_COUNT: counts, POSITION: positions}
+    return scoring_df.with_columns(
+        pl.when(pl.lit(pl.Series(strata[name])) >= 0)
+        .then(pl.lit(pl.Series(strata[name])))
+        .alias(name)
+        for name in derived
+    )
+
+
 def _get_top_k_from_slice(
     ground_truth: Subsets | Dataset,
     split: str | None,
@@ -171,6 +621,175 @@ def _get_top_k_from_slice(
     return int(top_k) if top_k is not None else None
 
 
+def read_pgdata_frame(
+    path: Path, target_names: str | list[str] | None = None
+) -> pl.DataFrame:
+    """Read the assays of a dataset archive straight into a Polars frame.
+
+    This is the frame `Dataset.from_path(path).to_df(target_names=...)`
+    produces, without extracting the archive to disk or building Sequence
+    objects per record. Only the manifest and the assay CSV members are read;
+    structures and MSAs are never touched. For a `.splits.pgdata` archive, the
+    nested dataset archive is opened in place.
+
+    Args:
+        path: Path to a .pgdata or .splits.pgdata archive.
+        target_names: The target(s) to include. All assay targets if None.
+
+    Returns:
+        A frame with the 'sequence' column, one column per assay variable and
+        one column per selected target, with the records of all assays.
+
+    Raises:
+        FileNotFoundError: If the archive has no manifest.
+        ValueError: If the archive has several manifests or nested datasets.
+
+    Examples:
+        >>> df = read_pgdata_frame(Path("dataset.splits.pgdata"), "DMS_score")
+        >>> df.columns
+        ['sequence', 'DMS_score']
+    """
+    return _read_pgdata(path, target_names)[1]
+
+
+def read_pgdata_table(path: Path) -> GroundTruthTable:
+    """Read a dataset archive as a GroundTruthTable without splits.
+
+    Args:
+        path: Path to a .pgdata archive.
+
+    Returns:
+        The table with the frame of `read_pgdata_frame` and its `RECORD_KEY`
+        fingerprints, the names of the dataset, its assay variables and its
+        assay targets, its wild-type sequence and the number of records of
+        every assay.
+    """
+    manifest, frame, wild_type, assay_sizes = _read_pgdata(path, None)
+    assay_variables = [v["name"] for v in manifest.get("assay_variables", [])]
+    return GroundTruthTable(
+        name=manifest["name"],
+        frame=frame.with_columns(table_fingerprint(frame, assay_variables)),
+        assay_variables=assay_variables,
+        assay_targets=[t["name"] for t in manifest.get("assay_targets", [])],
+        wild_type=wild_type,
+        assay_sizes=assay_sizes,
+    )
+
+
+def _read_pgdata(
+    path: Path, target_names: str | list[str] | None
+) -> tuple[dict, pl.DataFrame, str | None, list[int]]:
+    """Read the manifest, frame, wild type and assay sizes of a (nested) archive."""
+    with zipfile.ZipFile(path) as archive:
+        nested = [n for n in archive.namelist() if n.endswith(".pgdata")]
+        if len(nested) > 1:
+            raise ValueError(f"Multiple dataset archives found in {path}: {nested}")
+        if nested:
+            with archive.open(nested[0]) as f, zipfile.ZipFile(f) as dataset_archive:
+                return _read_dataset_archive(dataset_archive, target_names)
+        return _read_dataset_archive(archive, target_names)
+
+
+def _read_dataset_archive(
+    archive: zipfile.ZipFile, target_names: str | list[str] | None
+) -> tuple[dict, pl.DataFrame, str | None, list[int]]:
+    """Read the manifest, assay CSV and wild-type members of a dataset archive.
+
+    The assay sizes are the number of records of every assay, in frame order.
+    """
+    manifest_names = [
+        n
+        for n in archive.namelist()
+        if PurePosixPath(n).name == PGDATA_MANIFEST_FILE
+    ]
+    if not manifest_names:
+        raise FileNotFoundError(
+            f"No {PGDATA_MANIFEST_FILE} found in the archive {archive.filename}."
+        )
+    if len(manifest_names) > 1:
+        raise ValueError(
+            f"Multiple manifest files found in the archive {archive.filename}."
+        )
+    manifest = tomllib.loads(archive.read(manifest_names[0]).decode())
+    root = PurePosixPath(manifest_names[0]).parent
+
+    variable_names = [v["name"] for v in manifest.get("assay_variables", [])]
+    if target_names is None:
+        target_names = [t["name"] for t in manifest.get("assay_targets", [])]
+    elif isinstance(target_names, str):
+        target_names = [target_names]
+
+    frames = []
+    for section in manifest.get("assays", []):
+        sequence_feature = section.get("sequence", SEQUENCE)
+        target_features = section.get("targets", {})
+        variables = section.get("variables", {})
+        assay_csv = archive.read(str(root / section["path"]))
+        header = pl.read_csv(assay_csv, n_rows=0).columns
+        features = {
+            name: target_features.get(name, name)
+            for name in target_names
+            if target_features.get(name, name) in header
+        }
+        assay_df = pl.read_csv(
+            assay_csv,
+            columns=[sequence_feature, *dict.fromkeys(features.values())],
+            schema_overrides={sequence_feature: pl.String},
+        )
+        frames.append(
+            assay_df.select(
+                pl.col(sequence_feature).alias(SEQUENCE),
+                *[pl.lit(variables.get(name)).alias(name) for name in variable_names],
+                *[
+                    pl.col(features[name]).alias(name)
+                    if name in features
+                    else pl.lit(None, dtype=pl.Float64).alias(name)
+                    for name in target_names
+                ],
+            )
+        )
+
+    wild_type = next(
+        (
+            _read_fasta_sequence(archive.read(str(root / section["path"])))
+            for section in manifest.get("sequences", [])
+            if section.get("type") == SequenceType.WILD_TYPE
+            and PurePosixPath(section["path"]).suffix.lower() in (".fasta", ".fa")
+        ),
+        None,
+    )
+
+    if not frames:
+        return (
+            manifest,
+            pl.DataFrame(
+                schema={
+                    SEQUENCE: pl.String,
+                    **{name: pl.Null for name in variable_names},
+                    **{name: pl.Float64 for name in target_names},
+                }
+            ),
+            wild_type,
+            [],
+        )
+    return (
+        manifest,
+        pl.concat(frames, how="vertical_relaxed"),
+        wild_type,
+        [len(frame) for frame in frames],
+    )
+
+
+def _read_fasta_sequence(fasta: bytes) -> str:
+    """Return the first sequence of a FASTA file."""
+    lines = []
+    for line in fasta.decode().splitlines()[1:]:
+        if line.startswith(">"):
+            break
+        lines.append(line.strip())
+    return "".join(lines)
+
+
 def aggregate_metrics(
     metric_dir: Path,
     dataset_name: str,
@@ -202,101 +821,280 @@ def aggregate_metrics(
             "full_dataset": {"spearman": 0.88},
             "metadata": {...}
         }
+
+    Bootstrap intervals of the fold files ("<metric>_ci_lower" and
+    "<metric>_ci_upper") are left out: the mean of per-fold bounds is not an
+    interval of the mean.
+
+    When the fold files carry "sufficient_statistics" (see
+    `calculate_metrics_by_mode`), the statistics of every test fold are merged
+    and the decomposable test metrics are also reported as "pooled": the
+    metric over all test predictions at once, rather than the mean of the
+    per-fold values. The merged statistics are kept under
+    "sufficient_statistics" so that aggregates can be merged further.
+
+    When `prediction_dir` is given, the JSON fold predictions of the model are
+    merged into one Parquet file by `combine_fold_predictions`.
     """
 
     pattern = f"{dataset_name}/{model_name}/{target}/{split}/fold*.json"
-    fold_files = list(metric_dir.glob(pattern))
+    fold_files = sorted(filter(_is_fold_metric_file, metric_dir.glob(pattern)))
 
     if not fold_files:
         print(f"No fold files found for {dataset_name}/{model_name}/{target}/{split}")
         return
 
-    test_metrics = {}
-    train_available_metrics = {}
-    full_dataset_metrics = None
-    metadata = None
+    key = (dataset_name, model_name, target, split)
+    with profile_stage("read_fold_files"):
+        documents = [json.loads(fold_file.read_bytes()) for fold_file in fold_files]
+    with profile_stage("aggregate"):
+        result = _aggregate_fold_documents({key: documents})[key]
+    output_path.write_text(json.dumps(result, indent=2))
 
-    for fold_file in fold_files:
-        with open(fold_file) as f:
-            data = json.load(f)
+    if prediction_dir:
+        with profile_stage("combine_predictions"):
+            combine_fold_predictions(prediction_dir, *key)
+
+
+def aggregate_all_metrics(
+    metric_dir: Path,
+    prediction_dir: Path | None = None,
+    workers: int | None = None,
+    output_dir: Path | None = None,
+) -> list[Path]:
+    """Aggregate the fold metrics of every dataset, model, target and split.
 
-            if metadata is None and "metadata" in data:
-                metadata = {
+    This is `aggregate_metrics` for a whole metric directory in one process:
+    the directory is walked once, the fold files are read on a thread pool,
+    and the means and standard deviations of all groups are computed in one
+    grouped pass.
+
+    Args:
+        metric_dir: The metric directory, laid out as
+            `<dataset>/<model>/<target>/<split>/fold<i>.json`.
+        prediction_dir: Optional prediction directory whose fold predictions
+            are merged by `combine_fold_predictions`.
+        workers: The number of threads reading fold files. The default of
+            `ThreadPoolExecutor` if None.
+        output_dir: The directory of the aggregated files, created if needed.
+            `metric_dir` if None.
+
+    Returns:
+        The paths of the written files, named
+        `<dataset>_<model>_<split>_<target>_aggregated.json` in `output_dir`.
+
+    Examples:
+        >>> aggregate_all_metrics(Path("metric"), output_dir=Path("aggregated"))
+        [PosixPath('aggregated/charge_ladder_pls_random_DMS_score_aggregated.json'), ...]
+    """
+    fold_files = sorted(
+        filter(_is_fold_metric_file, metric_dir.glob("*/*/*/*/fold*.json"))
+    )
+    with profile_stage("read_fold_files"):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(Path.read_bytes, fold_files))
+
+    groups = {}
+    with profile_stage("parse_fold_files"):
+        for fold_file, content in zip(fold_files, contents):
+            key = fold_file.relative_to(metric_dir).parts[:4]
+            groups.setdefault(key, []).append(json.loads(content))
+
+    with profile_stage("aggregate"):
+        results = _aggregate_fold_documents(groups)
+
+    if output_dir is None:
+        output_dir = metric_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_paths = []
+    for (dataset_name, model_name, target, split), result in results.items():
+        output_path = (
+            output_dir
+            / f"{dataset_name}_{model_name}_{split}_{target}{AGGREGATED_FILE_SUFFIX}"
+        )
+        output_path.write_text(json.dumps(result, indent=2))
+        output_paths.append(output_path)
+        if prediction_dir:
+            with profile_stage("combine_predictions"):
+                combine_fold_predictions(
+                    prediction_dir, dataset_name, model_name, target, split
+                )
+    return output_paths
+
+
+def _is_fold_metric_file(path: Path) -> bool:
+    """Check whether a path is a `fold<i>.json` metric file (not a sidecar)."""
+    return path.stem.removeprefix("fold").isdigit()
+
+
+def _aggregate_fold_documents(
+    groups: dict[tuple[str, str, str, str], list[dict]],
+) -> dict[tuple[str, str, str, str], dict]:
+    """Aggregate the parsed fold files of every group.
+
+    Args:
+        groups: The fold documents of every (dataset, model, target, split).
+
+    Returns:
+        The aggregated document of every group, see `aggregate_metrics`.
+    """
+    rows = [
+        (group_idx, section, metric_name, float(value))
+        for group_idx, documents in enumerate(groups.values())
+        for data in documents
+        for section in AGGREGATED_SECTIONS
+        for metric_name, value in data.get(section, {}).items()
+        if isinstance(value, (int, float))
+        and not metric_name.endswith(CONFIDENCE_INTERVAL_SUFFIXES)
+    ]
+    summaries = collections.defaultdict(dict)
+    if rows:
+        value = pl.col("value")
+        summary = (
+            pl.DataFrame(
+                rows,
+                schema=["group", "section", "metric", "value"],
+                orient="row",
+            )
+            .group_by("group", "section", "metric", maintain_order=True)
+            .agg(
+                value.mean().alias("mean"),
+                pl.when(pl.len() > 1).then(value.std(ddof=1)).otherwise(0.0).alias("std"),
+            )
+        )
+        for group_idx, section, metric_name, mean, std in summary.iter_rows():
+            summaries[group_idx, section][metric_name] = mean
+            summaries[group_idx, section][f"{metric_name}_std"] = std
+
+    results = {}
+    for group_idx, (key, documents) in enumerate(groups.items()):
+        dataset_name, model_name, target, split = key
+        metadata = next(
+            (
+                {
                     k: v
                     for k, v in data["metadata"].items()
-                    if k not in ["test_fold", "test_folds", "train_available_folds"]
+                    if k not in _FOLD_METADATA_KEYS
                 }
-
-            if "test" in data:
-                for metric_name, value in data["test"].items():
-                    if value is not None:
-                        if metric_name not in test_metrics:
-                            test_metrics[metric_name] = []
-                        test_metrics[metric_name].append(value)
-
-            if "train_available" in data:
-                for metric_name, value in data["train_available"].items():
-                    if value is not None:
-                        if metric_name not in train_available_metrics:
-                            train_available_metrics[metric_name] = []
-                        train_available_metrics[metric_name].append(value)
-
-            if "full_dataset" in data and full_dataset_metrics is None:
-                full_dataset_metrics = data["full_dataset"]
-
-    result = {
-        "metadata": metadata
-        or {
-            "dataset": dataset_name,
-            "model": model_name,
-            "split": split,
-            "target": target,
+                for data in documents
+                if "metadata" in data
+            ),
+            None,
+        )
+        result = {
+            "metadata": metadata
+            or {
+                "dataset": dataset_name,
+                "model": model_name,
+                "split": split,
+                "target": target,
+            }
         }
-    }
 
-    if test_metrics:
-        result["test"] = {}
-        for metric_name, values in test_metrics.items():
-            if values:
-                result["test"][metric_name] = np.mean(values)
-                result["test"][f"{metric_name}_std"] = (
-                    np.std(values, ddof=1) if len(values) > 1 else 0.0
-                )
+        for section in AGGREGATED_SECTIONS:
+            if (group_idx, section) in summaries:
+                result[section] = summaries[group_idx, section]
 
-    if train_available_metrics:
-        result["train_available"] = {}
-        for metric_name, values in train_available_metrics.items():
-            if values:
-                result["train_available"][metric_name] = np.mean(values)
-                result["train_available"][f"{metric_name}_std"] = (
-                    np.std(values, ddof=1) if len(values) > 1 else 0.0
+        full_dataset_metrics = next(
+            (data["full_dataset"] for data in documents if "full_dataset" in data),
+            None,
+        )
+        if full_dataset_metrics is not None:
+            result["full_dataset"] = full_dataset_metrics
+
+        test_statistics = [
+            SufficientStatistics.from_dict(fold_statistics)
+            for data in documents
+            if "sufficient_statistics" in data
+            for test_fold in data.get("metadata", {}).get("test_folds", [])
+            if (
+                fold_statistics := data["sufficient_statistics"].get(
+                    f"fold_{test_fold}"
                 )
+            )
+            is not None
+        ]
+        pooled_metrics = [
+            m for m in DECOMPOSABLE_METRICS if m in result.get("test", {})
+        ]
+        if test_statistics and pooled_metrics:
+            pooled = SufficientStatistics.merge_all(test_statistics)
+            result["pooled"] = pooled.metrics(pooled_metrics)
+            result["sufficient_statistics"] = {"pooled": pooled.to_dict()}
 
-    if full_dataset_metrics is not None:
-        result["full_dataset"] = full_dataset_metrics
+        results[key] = result
+    return results
 
-    output_path.write_text(json.dumps(result, indent=2))
 
-    if prediction_dir:
-        pred_pattern = f"{dataset_name}/{model_name}/{target}/{split}/fold*"
-        pred_paths = list(prediction_dir.glob(pred_pattern))
-
-        if pred_paths:
-            dfs = []
-            for pred_path in pred_paths:
-                json_file = pred_path / "predictions.json"
-                if json_file.exists():
-                    dfs.append(pl.read_json(json_file))
-            if dfs:
-                combined = pl.concat(dfs)
-                combined_path = (
-                    prediction_dir
-                    / f"{dataset_name}_{model_name}_{target}_{split}_combined.json"
-                )
-                combined.write_json(combined_path)
+def combine_fold_predictions(
+    prediction_dir: Path, dataset_name: str, model_name: str, target: str, split: str
+) -> Path | None:
+    """Merge the JSON fold predictions of a model into one Parquet file.
+
+    Every `fold<i>/predictions.json` is converted once into a Parquet part
+    with a `fold` column, kept in a `..._combined.parts` directory together
+    with the SHA-256 of the JSON it was converted from. Folds whose JSON did
+    not change since the last merge are not read again, and the parts are
+    concatenated into the combined file by a streaming sink, so memory is
+    bounded by the largest fold rather than by the combined predictions.
 
+    Args:
+        prediction_dir: The prediction directory, laid out as
+            `<dataset>/<model>/<target>/<split>/fold<i>/predictions.json`.
+        dataset_name: The name of the dataset.
+        model_name: The name of the model.
+        target: The predicted target.
+        split: The split name.
+
+    Returns:
+        The path of `<dataset>_<model>_<target>_<split>_combined.parquet` in
+        `prediction_dir`, or None if no fold has JSON predictions.
+    """
+    pred_pattern = f"{dataset_name}/{model_name}/{target}/{split}/fold*/predictions.json"
+    json_files = {
+        int(path.parent.name.removeprefix("fold")): path
+        for path in prediction_dir.glob(pred_pattern)
+        if path.parent.name.removeprefix("fold").isdigit()
+    }
+    if not json_files:
+        return None
+
+    combined_name = f"{dataset_name}_{model_name}_{target}_{split}_combined"
+    combined_path = prediction_dir / f"{combined_name}.parquet"
+    parts_dir = prediction_dir / f"{combined_name}.parts"
+    digests_path = parts_dir / "digests.json"
+    parts_dir.mkdir(exist_ok=True)
+    previous = json.loads(digests_path.read_text()) if digests_path.exists() else {}
+
+    digests = {}
+    changed = set(previous) != {str(fold) for fold in json_files}
+    for fold_idx, json_file in sorted(json_files.items()):
+        digest = archive_digest(json_file)
+        digests[str(fold_idx)] = digest
+        part = parts_dir / f"fold{fold_idx}.parquet"
+        if previous.get(str(fold_idx)) == digest and part.exists():
+            continue
+        changed = True
+        fold_df = pl.read_json(json_file).with_columns(pl.lit(fold_idx).alias(FOLD))
+        _atomic_write(part, fold_df.write_parquet)
+
+    for part in parts_dir.glob("fold*.parquet"):
+        if part.stem.removeprefix("fold") not in digests:
+            part.unlink()
+
+    if changed or not combined_path.exists():
+        parts = [parts_dir / f"fold{fold_idx}.parquet" for fold_idx in sorted(json_files)]
+        _atomic_write(
+            combined_path,
+            lambda tmp: pl.scan_parquet(parts).sink_parquet(tmp),
+        )
+    _atomic_write(digests_path, lambda tmp: tmp.write_text(json.dumps(digests)))
+    return combined_path
 
-def generate_metrics_csv(metric_dir: Path, output_path: Path, game: str):
+
+def generate_metrics_csv(
+    metric_dir: Path, output_path: Path, game: str, store_dir: Path | None = None
+):
     """Generate metrics CSV from aggregated JSON files.
 
     Reads aggregated JSON files with structure:
@@ -304,16 +1102,24 @@ def generate_metrics_csv(metric_dir: Path, output_path: Path, game: str):
             "test": {"spearman": 0.86, "spearman_std": 0.02, ...},
             "train_available": {"spearman": 0.93, "spearman_std": 0.01, ...},
             "full_dataset": {"spearman": 0.88, ...},
+            "pooled": {"pearson": 0.81, ...},
             "metadata": {...}
         }
 
     And creates CSV with columns:
         game, model, dataset, split, target, test_spearman, test_spearman_std,
         train_available_spearman, train_available_spearman_std,
-        full_dataset_spearman, ...
+        full_dataset_spearman, pooled_pearson, ...
+
+    With `store_dir`, the rows are upserted into the `ResultsStore` at that
+    directory, which rewrites only the (game, model) partitions of the new
+    rows, and the CSV is exported from the store. An existing CSV that changed
+    since the store last exported it, such as a newer pulled CSV, is first
+    reconciled into the store (see `ResultsStore.reconcile_csv`); an unchanged
+    one is not read.
     """
     rows = []
-    for metric_file in sorted(metric_dir.glob("*_aggregated.json")):
+    for metric_file in sorted(metric_dir.glob(f"*{AGGREGATED_FILE_SUFFIX}")):
         with open(metric_file) as f:
             data = json.load(f)
         if "metadata" not in data:
@@ -340,12 +1146,23 @@ def generate_metrics_csv(metric_dir: Path, output_path: Path, game: str):
             for metric_name, value in data["full_dataset"].items():
                 row[f"full_dataset_{metric_name}"] = value
 
+        if "pooled" in data:
+            for metric_name, value in data["pooled"].items():
+                row[f"pooled_{metric_name}"] = value
+
         rows.append(row)
 
-    key_cols = ["game", "model", "dataset", "split", "target"]
+    key_cols = list(RESULT_KEY_COLUMNS)
     new_df = pl.DataFrame(rows)
 
-    if output_path.exists():
+    if store_dir is not None:
+        store = ResultsStore(store_dir)
+        if output_path.exists() and not store.is_exported(output_path):
+            store.reconcile_csv(output_path)
+        if rows:
+            store.upsert(new_df)
+        store.export_csv(output_path)
+    elif output_path.exists():
         combined = pl.concat([pl.read_csv(output_path), new_df], how="diagonal_relaxed")
         combined.unique(subset=key_cols, keep="last").write_csv(output_path)
     else:
@@ -364,11 +1181,26 @@ def aggregate(
     target: Annotated[str, typer.Option()],
     output_path: Annotated[Path, typer.Option()],
     prediction_dir: Annotated[Path, typer.Option()] = None,
+    profile: Annotated[bool, typer.Option()] = False,
 ):
     """Aggregate metrics from folds."""
-    aggregate_metrics(
-        metric_dir, dataset_name, model_name, split, target, output_path, prediction_dir
-    )
+    with _profiler(profile, output_path):
+        aggregate_metrics(
+            metric_dir, dataset_name, model_name, split, target, output_path, prediction_dir
+        )
+
+
+@app.command()
+def aggregate_all(
+    metric_dir: Annotated[Path, typer.Option()],
+    prediction_dir: Annotated[Path, typer.Option()] = None,
+    workers: Annotated[int, typer.Option()] = None,
+    output_dir: Annotated[Path, typer.Option()] = None,
+    profile: Annotated[bool, typer.Option()] = False,
+):
+    """Aggregate metrics from folds for every dataset and model at once."""
+    with _profiler(profile, (output_dir or metric_dir) / "aggregate_all"):
+        aggregate_all_metrics(metric_dir, prediction_dir, workers, output_dir)
 
 
 @app.command()
@@ -376,9 +1208,36 @@ def generate_csv(
     metric_dir: Annotated[Path, typer.Option()],
     output_path: Annotated[Path, typer.Option()],
     game: Annotated[str, typer.Option()],
+    store_dir: Annotated[Path, typer.Option()] = None,
+    profile: Annotated[bool, typer.Option()] = False,
 ):
     """Generate metrics CSV."""
-    generate_metrics_csv(metric_dir, output_path, game)
+    with _profiler(profile, output_path):
+        generate_metrics_csv(metric_dir, output_path, game, store_dir)
+
+
+@app.command()
+def profile_summary(
+    profile_dir: Annotated[Path, typer.Option()],
+    output_path: Annotated[Path, typer.Option()] = None,
+):
+    """Summarize the stage profiles of a run."""
+    summary = summarize_profiles(profile_dir)
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(summary)
+    if output_path is not None:
+        summary.write_csv(output_path)
+
+
+@contextlib.contextmanager
+def _profiler(enabled: bool, output_path: Path):
+    """Profile a command when enabled, writing the sidecar of `output_path`."""
+    if not enabled:
+        yield
+        return
+    with Profiler() as profiler:
+        yield
+    profiler.write(output_path)
 
 
 if __name__ == "__main__":
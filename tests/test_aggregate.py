@@ -0,0 +1,147 @@
+import json
+
+import polars as pl
+import pytest
+
+from scripts.metric import calculate_metrics_by_mode
+from scripts.utils import (
+    FOLD,
+    aggregate_all_metrics,
+    aggregate_metrics,
+    combine_fold_predictions,
+)
+
+
+@pytest.fixture
+def metric_dir(tmp_path, subsets_with_assays, predicted_dataset):
+    """Fold metric files of two models, one of them with a single fold."""
+    metric_dir = tmp_path / "metrics"
+    for model_name, folds in [("model", range(5)), ("other", [0])]:
+        fold_dir = metric_dir / "dataset" / model_name / "DMS Score" / "random"
+        fold_dir.mkdir(parents=True)
+        for test_fold in folds:
+            results = calculate_metrics_by_mode(
+                selected_metrics=["spearman", "mse"],
+                ground_truth=subsets_with_assays,
+                predicted=predicted_dataset,
+                target="DMS Score",
+                split="random",
+                test_fold=test_fold,
+            )
+            (fold_dir / f"fold{test_fold}.json").write_text(json.dumps(results))
+    return metric_dir
+
+
+class TestAggregateIntervals:
+    """Test that per-fold bootstrap intervals are not averaged."""
+
+    def test_interval_bounds_are_left_out(self, tmp_path):
+        """Test that only the metric values are aggregated."""
+        fold_dir = tmp_path / "dataset" / "model" / "DMS Score" / "random"
+        fold_dir.mkdir(parents=True)
+        for test_fold, spearman in enumerate([0.4, 0.6]):
+            (fold_dir / f"fold{test_fold}.json").write_text(
+                json.dumps(
+                    {
+                        "test": {
+                            "spearman": spearman,
+                            "spearman_ci_lower": spearman - 0.1,
+                            "spearman_ci_upper": spearman + 0.1,
+                        }
+                    }
+                )
+            )
+
+        (output_path,) = aggregate_all_metrics(tmp_path)
+
+        test = json.loads(output_path.read_text())["test"]
+        assert sorted(test) == ["spearman", "spearman_std"]
+        assert test["spearman"] == pytest.approx(0.5)
+
+
+class TestAggregateAllMetrics:
+    """Test aggregate_all_metrics."""
+
+    def test_matches_aggregate_metrics(self, tmp_path, metric_dir):
+        """Test that every group is aggregated as by aggregate_metrics."""
+        output_paths = aggregate_all_metrics(metric_dir, workers=2)
+
+        assert [path.name for path in output_paths] == [
+            "dataset_model_random_DMS Score_aggregated.json",
+            "dataset_other_random_DMS Score_aggregated.json",
+        ]
+        for path, model_name in zip(output_paths, ["model", "other"]):
+            expected_path = tmp_path / f"{model_name}.json"
+            aggregate_metrics(
+                metric_dir, "dataset", model_name, "random", "DMS Score", expected_path
+            )
+            assert path.read_text() == expected_path.read_text()
+
+    def test_single_fold_has_zero_std(self, metric_dir):
+        """Test that a group with one fold file reports a zero spread."""
+        aggregate_all_metrics(metric_dir)
+
+        aggregated = json.loads(
+            (metric_dir / "dataset_other_random_DMS Score_aggregated.json").read_text()
+        )
+        assert aggregated["test"]["mse"] == pytest.approx(0.01)
+        assert aggregated["test"]["mse_std"] == 0.0
+        assert "test_fold" not in aggregated["metadata"]
+
+
+class TestCombineFoldPredictions:
+    """Test combine_fold_predictions."""
+
+    @pytest.fixture
+    def prediction_dir(self, tmp_path):
+        """JSON predictions of three folds."""
+        for fold_idx in range(3):
+            fold_dir = tmp_path / "dataset" / "model" / "DMS Score" / "random"
+            (fold_dir / f"fold{fold_idx}").mkdir(parents=True)
+            pl.DataFrame(
+                {"sequence": [f"SEQ{fold_idx}"], "DMS Score": [float(fold_idx)]}
+            ).write_json(fold_dir / f"fold{fold_idx}" / "predictions.json")
+        return tmp_path
+
+    def test_writes_fold_column(self, prediction_dir):
+        """Test that the folds are merged into one Parquet file."""
+        combined_path = combine_fold_predictions(
+            prediction_dir, "dataset", "model", "DMS Score", "random"
+        )
+
+        combined = pl.read_parquet(combined_path).sort(FOLD)
+        assert combined_path.name == "dataset_model_DMS Score_random_combined.parquet"
+        assert combined[FOLD].to_list() == [0, 1, 2]
+        assert combined["sequence"].to_list() == ["SEQ0", "SEQ1", "SEQ2"]
+
+    def test_unchanged_folds_are_not_read(self, prediction_dir, monkeypatch):
+        """Test that only changed folds are converted again."""
+        combine_fold_predictions(prediction_dir, "dataset", "model", "DMS Score", "random")
+        fold_dir = prediction_dir / "dataset" / "model" / "DMS Score" / "random"
+        pl.DataFrame({"sequence": ["NEW"], "DMS Score": [9.0]}).write_json(
+            fold_dir / "fold1" / "predictions.json"
+        )
+        read_paths = []
+        read_json = pl.read_json
+        monkeypatch.setattr(
+            pl, "read_json", lambda path: read_paths.append(path) or read_json(path)
+        )
+
+        combined_path = combine_fold_predictions(
+            prediction_dir, "dataset", "model", "DMS Score", "random"
+        )
+
+        assert read_paths == [fold_dir / "fold1" / "predictions.json"]
+        combined = pl.read_parquet(combined_path).sort(FOLD)
+        assert combined["sequence"].to_list() == ["SEQ0", "NEW", "SEQ2"]
+
+    def test_output_dir_outside_metric_dir(self, tmp_path, metric_dir):
+        """Test that aggregates can be written outside the metric directory."""
+        before = sorted(path for path in metric_dir.rglob("*"))
+
+        output_paths = aggregate_all_metrics(
+            metric_dir, output_dir=tmp_path / "aggregated"
+        )
+
+        assert [path.parent for path in output_paths] == [tmp_path / "aggregated"] * 2
+        assert sorted(path for path in metric_dir.rglob("*")) == before
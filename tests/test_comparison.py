@@ -0,0 +1,147 @@
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+from scripts.comparison import (
+    AlignedFold,
+    compare_models,
+    load_aligned_folds,
+    paired_bootstrap_test,
+)
+from scripts.metric import kernel_spearman
+
+
+@pytest.fixture
+def prediction_dir(tmp_path, predicted_dataset, dataset_with_assay):
+    """Fold predictions of a ranking-perfect and a reversed model."""
+    reversed_predictions = dataset_with_assay.predictions_delta(
+        pl.DataFrame(
+            {
+                "sequence": predicted_dataset.to_df()["sequence"],
+                "DMS Score": list(range(10, 0, -1)),
+            }
+        ),
+        target="DMS Score",
+    )
+    for model_name, predictions in [
+        ("perfect", predicted_dataset),
+        ("reversed", reversed_predictions),
+    ]:
+        for fold_idx in range(5):
+            fold_dir = (
+                tmp_path / "prediction" / "dataset" / model_name / "DMS Score"
+                / "random" / f"fold{fold_idx}"
+            )
+            fold_dir.mkdir(parents=True)
+            predictions.dump(path=fold_dir).rename(
+                fold_dir / "dataset_predictions.pgdata"
+            )
+    return tmp_path / "prediction"
+
+
+class TestPairedBootstrapTest:
+    """Test paired_bootstrap_test."""
+
+    @pytest.fixture
+    def folds(self) -> list[AlignedFold]:
+        """Two folds scored by an accurate model, a noisy one and a copy."""
+        rng = np.random.default_rng(0)
+        folds = []
+        for fold_idx in range(2):
+            gt = rng.normal(size=200)
+            accurate = gt + rng.normal(scale=0.3, size=200)
+            noisy = gt + rng.normal(scale=3.0, size=200)
+            folds.append(
+                AlignedFold(
+                    fold=fold_idx,
+                    gt=gt,
+                    pred=np.stack([accurate, noisy, accurate]),
+                    top_k=20,
+                )
+            )
+        return folds
+
+    def test_p_value_matrix(self, folds):
+        """Test that only the noisy model differs significantly."""
+        tests = paired_bootstrap_test(folds, ["spearman", "recovery"], n_resamples=200)
+
+        p_values = tests["spearman"]["p_values"]
+        assert p_values == pytest.approx(p_values.T)
+        assert np.diag(p_values) == pytest.approx(1.0)
+        assert p_values[0, 1] < 0.05
+        assert p_values[0, 2] == 1.0
+        assert tests["recovery"]["p_values"][1, 2] < 0.05
+
+    def test_values_are_fold_means(self, folds):
+        """Test that the compared values are the mean of the fold metrics."""
+        tests = paired_bootstrap_test(folds, ["spearman"], n_resamples=10)
+
+        expected = [
+            np.mean([kernel_spearman(fold.gt, fold.pred[model]) for fold in folds])
+            for model in range(3)
+        ]
+        assert tests["spearman"]["values"] == pytest.approx(expected)
+
+    def test_unbatched_metric_raises(self, folds):
+        """Test that metrics without a batched kernel are rejected."""
+        with pytest.raises(ValueError, match="batched kernel"):
+            paired_bootstrap_test(folds, ["mse"])
+
+
+class TestLoadAlignedFolds:
+    """Test load_aligned_folds."""
+
+    def test_keeps_ground_truth_order(self, prediction_dir, dataset_with_assay):
+        """Test that every model is aligned on the ground truth rows, in order."""
+        (fold,) = load_aligned_folds(
+            dataset_with_assay,
+            prediction_dir,
+            "dataset",
+            ["perfect", "reversed"],
+            "random",
+            "DMS Score",
+        )
+
+        gt_df = dataset_with_assay.to_df()
+        assert fold.gt.tolist() == gt_df["DMS Score"].to_list()
+        assert fold.pred[1].tolist() == list(range(10, 0, -1))
+
+
+class TestCompareModels:
+    """Test compare_models."""
+
+    def test_writes_p_value_matrix(self, tmp_path, prediction_dir, subsets_with_assays):
+        """Test that every discovered model pair gets a p-value."""
+        output_path = compare_models(
+            prediction_dir,
+            subsets_with_assays.dump(path=tmp_path),
+            "dataset",
+            "random",
+            "DMS Score",
+            tmp_path / "comparison.json",
+            n_resamples=200,
+        )
+
+        comparison = json.loads(output_path.read_text())
+        assert comparison["metadata"]["models"] == ["perfect", "reversed"]
+        assert comparison["metadata"]["test_folds"] == [0, 1, 2, 3, 4]
+        assert comparison["spearman"]["values"] == pytest.approx(
+            {"perfect": 1.0, "reversed": -1.0}
+        )
+        assert comparison["spearman"]["p_values"]["perfect"]["reversed"] < 0.05
+        assert comparison["recovery"]["values"] == {"perfect": None, "reversed": None}
+
+    def test_single_model_raises(self, tmp_path, prediction_dir, subsets_with_assays):
+        """Test that a comparison needs at least two models."""
+        with pytest.raises(ValueError, match="At least two models"):
+            compare_models(
+                prediction_dir,
+                subsets_with_assays.dump(path=tmp_path),
+                "dataset",
+                "random",
+                "DMS Score",
+                tmp_path / "comparison.json",
+                model_names=["perfect"],
+            )
@@ -0,0 +1,350 @@
+import dataclasses
+
+import polars as pl
+import pytest
+from Bio.Seq import Seq
+from polars.testing import assert_frame_equal
+from proteingym.base.dataset import (
+    Assay,
+    AssaySlice,
+    Dataset,
+    DatasetSlice,
+    Field,
+    Subsets,
+)
+from proteingym.base.sequence import Sequence, SequenceAlphabet, SequenceType
+
+from scripts import metric
+from scripts.ground_truth import (
+    RECORD_KEY,
+    GroundTruthTable,
+    load_cached_ground_truth,
+    wild_type_sequence,
+)
+from scripts.metric import calculate_metrics_by_mode, evaluate, load_ground_truth
+from scripts.utils import (
+    prepare_and_validate_scoring_df,
+    prepare_fold_scoring_df,
+    read_pgdata_frame,
+    read_pgdata_table,
+)
+
+
+class TestGroundTruthTable:
+    """Test the frame-backed ground truth."""
+
+    def test_fold_membership(self, subsets_with_assays):
+        """Test that every row records the folds containing it."""
+        table = GroundTruthTable.from_ground_truth(subsets_with_assays)
+
+        for fold_idx in range(5):
+            assert table.frame[table.fold_column("random", fold_idx)].to_list() == [
+                i // 2 == fold_idx for i in range(10)
+            ]
+        assert table.slices["random"][3].metadata == {"fold": 3.0}
+        assert table.assay_variables == ["var1"]
+
+    def test_scoring_frames_match_subsets(self, subsets_with_assays, predicted_dataset):
+        """Test that a table gives the same scoring frames as its Subsets."""
+        table = GroundTruthTable.from_ground_truth(subsets_with_assays)
+
+        assert prepare_fold_scoring_df(
+            table, predicted_dataset, "DMS Score", "random"
+        ).equals(
+            prepare_fold_scoring_df(
+                subsets_with_assays, predicted_dataset, "DMS Score", "random"
+            )
+        )
+        assert prepare_and_validate_scoring_df(
+            table, predicted_dataset, "DMS Score", split="random", fold=[1, 3]
+        ).equals(
+            prepare_and_validate_scoring_df(
+                subsets_with_assays,
+                predicted_dataset,
+                "DMS Score",
+                split="random",
+                fold=[1, 3],
+            )
+        )
+
+    def test_sequences_repeated_across_folds(self):
+        """Test that predictions are sliced by fold as in the Subsets path."""
+        sequences = [
+            Sequence(
+                name=f"seq{i}",
+                value=Seq(value),
+                type=SequenceType.ENGINEERED_SEQUENCE,
+                alphabet=SequenceAlphabet.AA,
+            )
+            for i, value in enumerate(["ACDEFG", "ACDEFH", "ACDEFG"])
+        ]
+        assay = Assay(
+            name="assay1",
+            records=[(seq, float(i), 0.0) for i, seq in enumerate(sequences)],
+            fields=[
+                Field(name="sequence"),
+                Field(name="DMS Score"),
+                Field(name="stability"),
+            ],
+        )
+        dataset = Dataset(
+            name="repeated",
+            assay_variables=[Field(name="var1")],
+            assay_targets=[Field(name="DMS Score"), Field(name="stability")],
+            assays=[assay],
+        )
+        subsets = Subsets(
+            dataset=dataset,
+            slices={
+                "random": [
+                    DatasetSlice(
+                        assays=[AssaySlice(records=[i == fold for i in range(3)])],
+                        metadata={"fold": float(fold)},
+                    )
+                    for fold in range(3)
+                ]
+            },
+        )
+        predicted = dataset.predictions_delta(
+            pl.DataFrame({"sequence": ["ACDEFG", "ACDEFH"], "DMS Score": [0.5, 0.7]}),
+            target="DMS Score",
+        )
+        table = GroundTruthTable.from_ground_truth(subsets)
+
+        fold_df = prepare_fold_scoring_df(table, predicted, "DMS Score", "random")
+
+        assert len(fold_df) == 3
+        assert fold_df.equals(
+            prepare_fold_scoring_df(subsets, predicted, "DMS Score", "random")
+        )
+        assert prepare_and_validate_scoring_df(
+            table, predicted, "DMS Score", split="random", fold=[0, 2]
+        ).equals(
+            prepare_and_validate_scoring_df(
+                subsets, predicted, "DMS Score", split="random", fold=[0, 2]
+            )
+        )
+
+    def test_assays_with_extra_predictions(self, tmp_path):
+        """Test that fold membership is applied per assay, as by Subsets."""
+
+        def assay(name, values, scores):
+            records = [
+                (
+                    Sequence(
+                        name=f"{name}{i}",
+                        value=Seq(value),
+                        type=SequenceType.ENGINEERED_SEQUENCE,
+                        alphabet=SequenceAlphabet.AA,
+                    ),
+                    score,
+                )
+                for i, (value, score) in enumerate(zip(values, scores))
+            ]
+            return Assay(
+                name=name,
+                records=records,
+                fields=[Field(name="sequence"), Field(name="DMS Score")],
+            )
+
+        def dataset(assays):
+            return Dataset(
+                name="two_assays",
+                assay_targets=[Field(name="DMS Score")],
+                assays=assays,
+            )
+
+        ground_truth = dataset(
+            [
+                assay("first", ["ACDEFG", "ACDEFH"], [0.1, 0.2]),
+                assay("second", ["ACDEFI", "ACDEFK"], [0.3, 0.4]),
+            ]
+        )
+        # The first assay has a prediction beyond its ground truth records
+        predicted = dataset(
+            [
+                assay("first", ["ACDEFG", "ACDEFH", "ACDEFL"], [1.1, 1.2, 1.9]),
+                assay("second", ["ACDEFI", "ACDEFK"], [1.3, 1.4]),
+            ]
+        )
+        subsets = Subsets(
+            dataset=ground_truth,
+            slices={
+                "random": [
+                    DatasetSlice(
+                        assays=[
+                            AssaySlice(records=[i == fold for i in range(2)])
+                            for _ in range(2)
+                        ],
+                        metadata={"fold": float(fold)},
+                    )
+                    for fold in range(2)
+                ]
+            },
+        )
+        table = GroundTruthTable.from_ground_truth(subsets)
+        expected = prepare_fold_scoring_df(subsets, predicted, "DMS Score", "random")
+
+        assert expected["DMS Score_pred"].to_list() == [1.1, 1.3, 1.2, 1.4]
+        assert prepare_fold_scoring_df(
+            table, predicted, "DMS Score", "random"
+        ).equals(expected)
+        # Predictions read from an archive keep their assay sizes
+        predicted_table = read_pgdata_table(predicted.dump(path=tmp_path))
+        assert prepare_fold_scoring_df(
+            table, predicted_table, "DMS Score", "random"
+        ).equals(expected)
+
+    def test_metrics_match_subsets(self, subsets_with_assays, predicted_dataset):
+        """Test that all scoring modes give the same metrics for a table."""
+        kwargs = dict(
+            selected_metrics=["spearman"],
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+            score_modes=["test", "train_available", "per_fold", "full_dataset"],
+        )
+
+        assert calculate_metrics_by_mode(
+            ground_truth=GroundTruthTable.from_ground_truth(subsets_with_assays),
+            **kwargs,
+        ) == calculate_metrics_by_mode(ground_truth=subsets_with_assays, **kwargs)
+
+    def test_variable_mismatch_raises_error(self, dataset_with_assay, predicted_dataset):
+        """Test that differing assay variable names are rejected."""
+        table = GroundTruthTable.from_ground_truth(dataset_with_assay)
+        table = GroundTruthTable(
+            name=table.name,
+            frame=table.frame.rename({"var1": "var2"}),
+            assay_variables=["var2"],
+            assay_targets=table.assay_targets,
+        )
+
+        with pytest.raises(ValueError, match="identical assay_variables"):
+            prepare_and_validate_scoring_df(table, predicted_dataset, "DMS Score")
+
+    def test_write_keeps_wild_type(self, tmp_path, dataset_with_assay):
+        """Test that the wild-type sequence survives a write and read."""
+        table = dataclasses.replace(
+            GroundTruthTable.from_ground_truth(dataset_with_assay), wild_type="ACDEFG"
+        )
+
+        table.write(tmp_path / "table.arrow")
+
+        assert GroundTruthTable.read(tmp_path / "table.arrow").wild_type == "ACDEFG"
+        assert wild_type_sequence(dataset_with_assay) is None
+
+
+class TestLoadCachedGroundTruth:
+    """Test the content-addressed ground truth cache."""
+
+    def test_round_trip(self, tmp_path, subsets_with_assays):
+        """Test that a cached table equals the table built from the archive."""
+        dataset_path = subsets_with_assays.dump(path=tmp_path)
+        cache_dir = tmp_path / "cache"
+
+        built = load_cached_ground_truth(dataset_path, cache_dir, load_ground_truth)
+        cached = load_cached_ground_truth(dataset_path, cache_dir, load_ground_truth)
+
+        assert len(list(cache_dir.glob("*.arrow"))) == 1
+        assert cached.frame.equals(built.frame)
+        assert cached.slices == built.slices
+        assert cached.assay_variables == built.assay_variables
+
+    def test_hit_does_not_parse_archive(self, tmp_path, subsets_with_assays):
+        """Test that a cache hit never calls the archive loader."""
+        dataset_path = subsets_with_assays.dump(path=tmp_path)
+        cache_dir = tmp_path / "cache"
+        load_cached_ground_truth(dataset_path, cache_dir, load_ground_truth)
+
+        def failing_load(path):
+            raise AssertionError("archive parsed on a cache hit")
+
+        table = load_cached_ground_truth(dataset_path, cache_dir, failing_load)
+
+        assert table.name == subsets_with_assays.dataset.name
+
+    def test_evaluate_with_cache_matches(
+        self, tmp_path, subsets_with_assays, predicted_dataset
+    ):
+        """Test that evaluate writes the same JSON with and without the cache."""
+        dataset_path = subsets_with_assays.dump(path=tmp_path)
+        pred_path = predicted_dataset.dump(path=tmp_path)
+        kwargs = dict(
+            prediction_path=pred_path,
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            split="random",
+            target="DMS Score",
+            fold="1",
+        )
+
+        uncached = evaluate(metric_path=tmp_path / "uncached.json", **kwargs)
+        for run in range(2):
+            cached = evaluate(
+                metric_path=tmp_path / f"cached{run}.json",
+                cache_dir=tmp_path / "cache",
+                **kwargs,
+            )
+            assert cached.read_text() == uncached.read_text()
+
+
+class TestReadPgdataFrame:
+    """Test the streaming archive reader."""
+
+    def test_matches_to_df(self, tmp_path, dataset_with_assay):
+        """Test that the reader gives the frame of Dataset.to_df."""
+        dataset_path = dataset_with_assay.dump(path=tmp_path)
+
+        for target_names in ("DMS Score", ["DMS Score", "stability"], None):
+            assert_frame_equal(
+                read_pgdata_frame(dataset_path, target_names),
+                dataset_with_assay.to_df(target_names=target_names),
+                check_dtypes=False,
+            )
+
+    def test_reads_nested_dataset(self, tmp_path, subsets_with_assays):
+        """Test that a splits archive is read through its nested dataset."""
+        dataset_path = subsets_with_assays.dump(path=tmp_path)
+
+        table = read_pgdata_table(dataset_path)
+
+        assert_frame_equal(
+            table.frame.drop(RECORD_KEY),
+            subsets_with_assays.dataset.to_df(),
+            check_dtypes=False,
+        )
+        assert table.assay_variables == ["var1"]
+        assert table.assay_targets == ["DMS Score", "stability"]
+
+    def test_cached_plain_dataset_skips_parsing(
+        self, tmp_path, dataset_with_assay, predicted_dataset, monkeypatch
+    ):
+        """Test that cached scoring of a plain dataset never builds Datasets."""
+        (tmp_path / "gt").mkdir()
+        (tmp_path / "pred").mkdir()
+        dataset_path = dataset_with_assay.dump(path=tmp_path / "gt")
+        pred_path = predicted_dataset.dump(path=tmp_path / "pred")
+        expected = evaluate(
+            prediction_path=pred_path,
+            metric_path=tmp_path / "expected.json",
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            target="DMS Score",
+        )
+
+        def failing_from_path(path):
+            raise AssertionError("archive parsed into a Dataset")
+
+        monkeypatch.setattr(metric.Dataset, "from_path", failing_from_path)
+        metric_path = evaluate(
+            prediction_path=pred_path,
+            metric_path=tmp_path / "cached.json",
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            target="DMS Score",
+            cache_dir=tmp_path / "cache",
+        )
+
+        assert metric_path.read_text() == expected.read_text()
@@ -0,0 +1,331 @@
+import numpy as np
+import pytest
+from scipy.stats import rankdata, spearmanr
+
+from scripts import metric
+from scripts.metric import (
+    RECOVERY_CURVE_KS,
+    BootstrapConfig,
+    Ranks,
+    _discover_metric_kernels,
+    batched_kernel_recovery,
+    batched_kernel_spearman,
+    bootstrap_confidence_intervals,
+    calculate_selected_metrics,
+    kernel_auc,
+    kernel_ndcg,
+    kernel_recovery,
+    kernel_recovery_curve,
+    kernel_spearman,
+)
+from scripts.utils import prepare_and_validate_scoring_df
+
+
+class TestDiscoverMetricKernels:
+    """Test _discover_metric_kernels function."""
+
+    def test_discovers_builtin_kernels(self):
+        """Test that the built-in kernels are registered by their metric name."""
+        kernels = _discover_metric_kernels()
+
+        assert kernels["spearman"] is kernel_spearman
+        assert kernels["recovery"] is kernel_recovery
+
+
+class TestRanks:
+    """Test the shared Ranks object."""
+
+    def test_average_ranks_match_scipy(self):
+        """Test that ranks derived from the shared sort match scipy's rankdata."""
+        rng = np.random.default_rng(0)
+        gt = rng.integers(0, 10, size=100).astype(float)
+        pred = rng.normal(size=100)
+
+        ranks = Ranks.from_values(gt, pred)
+
+        np.testing.assert_allclose(ranks.gt, rankdata(gt))
+        np.testing.assert_allclose(ranks.pred, rankdata(pred))
+
+    def test_top_indices_with_and_without_sort(self):
+        """Test that argpartition and the shared sort give the same top-k."""
+        values = np.random.default_rng(0).normal(size=50)
+
+        partitioned = Ranks.from_values(values, values).top_indices("gt", 5)
+        sorted_ranks = Ranks.from_values(values, values)
+        sorted_ranks.gt_order
+        from_sort = sorted_ranks.top_indices("gt", 5)
+
+        np.testing.assert_array_equal(partitioned, from_sort)
+        np.testing.assert_array_equal(from_sort, np.argsort(values)[::-1][:5])
+
+    def test_tied_top_k_independent_of_kernel_order(self):
+        """Test that ranking kernels do not depend on whether a sort is cached."""
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            gt = rng.integers(0, 5, size=30).astype(float)
+            pred = rng.integers(0, 5, size=30).astype(float)
+
+            partitioned = Ranks.from_values(gt, pred)
+            values = [
+                kernel(gt, pred, ranks=partitioned, top_k=7)
+                for kernel in (kernel_recovery, kernel_ndcg, kernel_auc)
+            ]
+            sorted_ranks = Ranks.from_values(gt, pred)
+            kernel_spearman(gt, pred, ranks=sorted_ranks)
+
+            assert values == [
+                kernel(gt, pred, ranks=sorted_ranks, top_k=7)
+                for kernel in (kernel_recovery, kernel_ndcg, kernel_auc)
+            ]
+            np.testing.assert_array_equal(
+                partitioned.top_indices("pred", 7),
+                np.argsort(pred, kind="stable")[::-1][:7],
+            )
+
+
+class TestKernelSpearman:
+    """Test kernel_spearman function."""
+
+    def test_matches_scipy_with_ties(self):
+        """Test that the rank-based kernel matches scipy's Spearman correlation."""
+        rng = np.random.default_rng(0)
+        gt = rng.integers(0, 20, size=200).astype(float)
+        pred = gt + rng.normal(size=200)
+
+        expected, _ = spearmanr(gt, pred)
+
+        assert kernel_spearman(gt, pred) == pytest.approx(expected)
+        assert kernel_spearman(
+            gt, pred, ranks=Ranks.from_values(gt, pred)
+        ) == pytest.approx(expected)
+
+
+class TestKernelRecovery:
+    """Test kernel_recovery function."""
+
+    def test_partial_recovery(self):
+        """Test recovery with two of the three top variants predicted."""
+        gt = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
+        pred = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.95, 0.75, 0.9, 1.0])
+
+        assert kernel_recovery(gt, pred, top_k=3) == pytest.approx(2.0 / 3.0)
+
+    def test_returns_none_without_top_k(self):
+        """Test that recovery is None when top_k is unavailable."""
+        gt = np.array([0.1, 0.2])
+
+        assert kernel_recovery(gt, gt) is None
+
+
+class TestRankingFamily:
+    """Test the recovery curve, NDCG and AUC kernels."""
+
+    @pytest.fixture
+    def values(self) -> tuple[np.ndarray, np.ndarray]:
+        """Ground truth and noisy predictions for 200 variants."""
+        rng = np.random.default_rng(0)
+        gt = rng.normal(size=200)
+        pred = gt + rng.normal(size=200)
+        return gt, pred
+
+    def test_recovery_curve_matches_recovery(self, values):
+        """Test that every point of the curve equals recovery at that k."""
+        gt, pred = values
+
+        curve = kernel_recovery_curve(gt, pred)
+
+        assert set(curve) == {f"recovery_at_{k}" for k in RECOVERY_CURVE_KS}
+        for k in RECOVERY_CURVE_KS:
+            assert curve[f"recovery_at_{k}"] == pytest.approx(
+                kernel_recovery(gt, pred, top_k=k)
+            )
+
+    def test_recovery_curve_none_beyond_samples(self):
+        """Test that k values larger than the number of samples give None."""
+        gt = np.arange(15, dtype=float)
+
+        curve = kernel_recovery_curve(gt, gt)
+
+        assert curve["recovery_at_10"] == pytest.approx(1.0)
+        assert curve["recovery_at_20"] is None
+
+    def test_perfect_and_reversed_predictions(self, values):
+        """Test NDCG and AUC bounds for perfect and reversed rankings."""
+        gt, _ = values
+
+        assert kernel_ndcg(gt, gt, top_k=10) == pytest.approx(1.0)
+        assert kernel_auc(gt, gt, top_k=10) == pytest.approx(1.0)
+        assert kernel_auc(gt, -gt, top_k=10) == pytest.approx(0.0)
+
+    def test_shared_ranks_give_same_values(self, values):
+        """Test that kernels agree with and without a shared ranking."""
+        gt, pred = values
+        ranks = Ranks.from_values(gt, pred)
+
+        for kernel in (kernel_recovery, kernel_ndcg, kernel_auc):
+            assert kernel(gt, pred, ranks=ranks, top_k=20) == pytest.approx(
+                kernel(gt, pred, top_k=20)
+            )
+
+    def test_none_without_top_k(self, values):
+        """Test that top-k based kernels return None without top_k."""
+        gt, pred = values
+
+        assert kernel_ndcg(gt, pred) is None
+        assert kernel_auc(gt, pred) is None
+
+
+class TestBootstrap:
+    """Test batched kernels and bootstrap confidence intervals."""
+
+    @pytest.fixture
+    def values(self) -> tuple[np.ndarray, np.ndarray]:
+        """Ground truth and noisy predictions for 500 variants."""
+        rng = np.random.default_rng(0)
+        gt = rng.normal(size=500)
+        pred = gt + rng.normal(size=500)
+        return gt, pred
+
+    def test_batched_kernels_match_row_kernels(self, values):
+        """Test that batched kernels equal the kernels applied to each row."""
+        gt, pred = values
+        indices = np.random.default_rng(1).integers(0, len(gt), size=(8, len(gt)))
+
+        np.testing.assert_allclose(
+            batched_kernel_spearman(gt[indices], pred[indices]),
+            [kernel_spearman(gt[row], pred[row]) for row in indices],
+        )
+        np.testing.assert_allclose(
+            batched_kernel_recovery(gt[indices], pred[indices], top_k=25),
+            [kernel_recovery(gt[row], pred[row], top_k=25) for row in indices],
+        )
+
+    def test_batched_recovery_matches_kernel_with_ties(self):
+        """Test that batched recovery breaks ties as kernel_recovery does."""
+        rng = np.random.default_rng(0)
+        gt = rng.integers(0, 5, size=(200, 30)).astype(float)
+        pred = rng.integers(0, 5, size=(200, 30)).astype(float)
+
+        np.testing.assert_array_equal(
+            batched_kernel_recovery(gt, pred, top_k=7),
+            [kernel_recovery(g, p, top_k=7) for g, p in zip(gt, pred)],
+        )
+
+    def test_intervals_bracket_the_metric(self, values):
+        """Test that intervals are ordered and contain the point estimate."""
+        gt, pred = values
+
+        intervals = bootstrap_confidence_intervals(
+            gt, pred, ["spearman", "ndcg"], 25, BootstrapConfig(n_resamples=200)
+        )
+
+        assert (
+            intervals["spearman_ci_lower"]
+            < kernel_spearman(gt, pred)
+            < intervals["spearman_ci_upper"]
+        )
+        assert intervals["ndcg_ci_lower"] <= intervals["ndcg_ci_upper"]
+
+    def test_reproducible_across_chunks_and_workers(self, values, monkeypatch):
+        """Test that a seed gives the same intervals in-process and in a pool."""
+        gt, pred = values
+        monkeypatch.setattr(metric, "BOOTSTRAP_CHUNK_ELEMENTS", 50 * len(gt))
+
+        in_process = bootstrap_confidence_intervals(
+            gt, pred, ["spearman"], None, BootstrapConfig(n_resamples=200, seed=3)
+        )
+        pooled = bootstrap_confidence_intervals(
+            gt,
+            pred,
+            ["spearman"],
+            None,
+            BootstrapConfig(n_resamples=200, seed=3, workers=2),
+        )
+
+        assert in_process == pooled
+
+    def test_none_without_values(self, values):
+        """Test that intervals are None when the kernel cannot be computed."""
+        gt, pred = values
+
+        intervals = bootstrap_confidence_intervals(
+            gt, pred, ["recovery"], None, BootstrapConfig(n_resamples=10)
+        )
+
+        assert intervals == {"recovery_ci_lower": None, "recovery_ci_upper": None}
+
+    def test_calculate_selected_metrics_adds_intervals(
+        self, dataset_with_assay, predicted_dataset
+    ):
+        """Test that bootstrap intervals are reported next to the metrics."""
+        results = calculate_selected_metrics(
+            selected_metrics=["spearman"],
+            ground_truth=dataset_with_assay,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            bootstrap=BootstrapConfig(n_resamples=50),
+        )
+
+        assert set(results) == {"spearman", "spearman_ci_lower", "spearman_ci_upper"}
+
+
+class TestCalculateSelectedMetricsWithKernels:
+    """Test the kernel path of calculate_selected_metrics."""
+
+    def test_kernels_share_one_alignment(
+        self, dataset_with_assay, predicted_dataset, monkeypatch
+    ):
+        """Test that all selected kernels are fed from a single join."""
+        calls = []
+
+        def counting_prepare(*args, **kwargs):
+            calls.append((args, kwargs))
+            return prepare_and_validate_scoring_df(*args, **kwargs)
+
+        monkeypatch.setattr(
+            "scripts.metric.prepare_and_validate_scoring_df", counting_prepare
+        )
+
+        results = calculate_selected_metrics(
+            selected_metrics=["spearman", "recovery"],
+            ground_truth=dataset_with_assay,
+            predicted=predicted_dataset,
+            target="DMS Score",
+        )
+
+        assert len(calls) == 1
+        assert results == {"spearman": pytest.approx(1.0), "recovery": None}
+
+    def test_metric_family_is_merged(self, dataset_with_assay, predicted_dataset):
+        """Test that a kernel returning a dictionary adds all its values."""
+        results = calculate_selected_metrics(
+            selected_metrics=["recovery_curve"],
+            ground_truth=dataset_with_assay,
+            predicted=predicted_dataset,
+            target="DMS Score",
+        )
+
+        assert results["recovery_at_10"] == pytest.approx(1.0)
+        assert results["recovery_at_20"] is None
+
+    def test_custom_kernel(self, dataset_with_assay, predicted_dataset, monkeypatch):
+        """Test that a registered kernel receives aligned arrays and ranks."""
+
+        def kernel_mean_error(gt, pred, ranks=None, top_k=None):
+            assert len(ranks.gt) == len(gt) == len(pred)
+            return float(np.mean(pred - gt))
+
+        monkeypatch.setattr(
+            metric,
+            "_metric_kernels_cache",
+            {**_discover_metric_kernels(), "mean_error": kernel_mean_error},
+        )
+
+        results = calculate_selected_metrics(
+            selected_metrics=["mean_error"],
+            ground_truth=dataset_with_assay,
+            predicted=predicted_dataset,
+            target="DMS Score",
+        )
+
+        assert results["mean_error"] == pytest.approx(0.1)
@@ -1,15 +1,30 @@
+import dataclasses
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pytest
 import polars as pl
 
-from proteingym.base.dataset import Dataset
+from proteingym.base.dataset import AssaySlice, Dataset, DatasetSlice, Subsets
 from proteingym.base.assay import SEQUENCE
 
+from scripts import metric
+from scripts.ground_truth import GroundTruthTable
 from scripts.metric import (
     calculate_metrics_by_mode,
     calculate_selected_metrics,
     evaluate,
+    evaluate_many,
+)
+from scripts import utils
+from scripts.utils import (
+    FOLD,
+    _join_scoring_frames,
+    add_strata_columns,
+    prepare_and_validate_scoring_df,
+    prepare_fold_scoring_df,
 )
-from scripts.utils import prepare_and_validate_scoring_df
 
 
 class TestPrepareAndValidateScoringDf:
@@ -78,6 +93,162 @@ class TestPrepareAndValidateScoringDf:
             )
 
 
+class TestPrepareFoldScoringDf:
+    """Test prepare_fold_scoring_df function."""
+
+    def test_tags_every_fold(self, subsets_with_assays, predicted_dataset):
+        """Test that every record is joined once and tagged with its fold."""
+        df = prepare_fold_scoring_df(
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+        )
+
+        expected_properties = {
+            "has_fold": FOLD in df.columns,
+            "has_predictions": "DMS Score_pred" in df.columns,
+            "correct_length": len(df) == 10,
+            "two_records_per_fold": df[FOLD].value_counts()["count"].to_list()
+            == [2] * 5,
+        }
+
+        assert all(expected_properties.values()), (
+            f"Failed checks: {[k for k, v in expected_properties.items() if not v]}"
+        )
+
+    def test_matches_per_fold_scoring_df(self, subsets_with_assays, predicted_dataset):
+        """Test that filtering on the fold column reproduces the per-fold join."""
+        df = prepare_fold_scoring_df(
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+        )
+
+        for fold_idx in range(5):
+            expected = prepare_and_validate_scoring_df(
+                ground_truth=subsets_with_assays,
+                predicted=predicted_dataset,
+                target="DMS Score",
+                split="random",
+                fold=fold_idx,
+            )
+            actual = df.filter(pl.col(FOLD) == fold_idx).drop(FOLD)
+
+            assert actual.equals(expected.select(actual.columns))
+
+    def test_calculate_metrics_by_mode_joins_once(
+        self, subsets_with_assays, predicted_dataset, monkeypatch
+    ):
+        """Test that fold-based score modes do not re-join per metric and mode."""
+        calls = []
+
+        def counting_prepare(*args, **kwargs):
+            calls.append((args, kwargs))
+            return prepare_and_validate_scoring_df(*args, **kwargs)
+
+        monkeypatch.setattr(
+            "scripts.metric.prepare_and_validate_scoring_df", counting_prepare
+        )
+
+        calculate_metrics_by_mode(
+            selected_metrics=["spearman"],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+        )
+
+        assert calls == []
+
+
+class TestFingerprintJoin:
+    """Test the fingerprint alignment of _join_scoring_frames."""
+
+    @pytest.fixture
+    def frames(self) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """Ground truth and shuffled predictions with a partly null variable."""
+        gt_df = pl.DataFrame(
+            {
+                SEQUENCE: ["ACD", "ACE", "ACF", "ACD"],
+                "temperature": [20, 20, None, 30],
+                "fitness": [1.0, 2.0, 3.0, 4.0],
+            }
+        )
+        pred_df = gt_df.reverse().with_columns(pl.col("fitness") + 0.5)
+        return gt_df, pred_df
+
+    def test_matches_column_join(self, frames, monkeypatch):
+        """Test that fingerprint and column joins give the same frame."""
+        gt_df, pred_df = frames
+        gt_df, pred_df = gt_df.drop_nulls(), pred_df.drop_nulls()
+
+        keyed = _join_scoring_frames(gt_df, pred_df, ["temperature"])
+        monkeypatch.setattr(utils, "_join_on_fingerprint", lambda *args: None)
+        exact = _join_scoring_frames(gt_df, pred_df, ["temperature"])
+
+        assert keyed.equals(exact)
+        assert keyed["fitness_pred"].to_list() == [1.5, 2.5, 4.5]
+
+    def test_null_keys_are_missing(self, frames):
+        """Test that a record with a null variable still counts as missing."""
+        gt_df, pred_df = frames
+
+        with pytest.raises(ValueError, match="Missing 1 prediction"):
+            _join_scoring_frames(gt_df, pred_df, ["temperature"])
+
+    def test_collisions_fall_back_to_columns(self, frames, monkeypatch):
+        """Test that non-unique fingerprints fall back to the column join."""
+        gt_df, pred_df = frames
+        gt_df, pred_df = gt_df.drop_nulls(), pred_df.drop_nulls()
+        monkeypatch.setattr(
+            utils,
+            "record_fingerprint",
+            lambda columns: (pl.col(columns[0]).hash() * 0).alias(utils.RECORD_KEY),
+        )
+
+        joined = _join_scoring_frames(gt_df, pred_df, ["temperature"])
+
+        assert joined["fitness_pred"].to_list() == [1.5, 2.5, 4.5]
+    def test_cross_frame_collisions_are_not_paired(self, monkeypatch):
+        """Test that a fingerprint shared across frames never pairs records."""
+        gt_df = pl.DataFrame({SEQUENCE: ["ACD", "ACE"], "fitness": [1.0, 2.0]})
+        pred_df = pl.DataFrame({SEQUENCE: ["ACD", "ACF"], "fitness": [1.5, 2.5]})
+        monkeypatch.setattr(
+            utils,
+            "record_fingerprint",
+            lambda columns: pl.int_range(pl.len(), dtype=pl.UInt64).alias(
+                utils.RECORD_KEY
+            ),
+        )
+
+        with pytest.raises(ValueError, match="Missing 1 prediction"):
+            _join_scoring_frames(gt_df, pred_df, [])
+
+    def test_stored_keys_are_reused(self, tmp_path, subsets_with_assays, monkeypatch):
+        """Test that tables are aligned on their stored fingerprints."""
+        table = GroundTruthTable.from_ground_truth(subsets_with_assays)
+        predicted = utils.read_pgdata_table(
+            subsets_with_assays.dataset.dump(path=tmp_path)
+        )
+        expected = prepare_fold_scoring_df(
+            subsets_with_assays, subsets_with_assays.dataset, "DMS Score", "random"
+        )
+
+        fingerprint = utils.record_fingerprint
+
+        def sequence_free_fingerprint(columns):
+            assert SEQUENCE not in columns, "sequences fingerprinted again"
+            return fingerprint(columns)
+
+        monkeypatch.setattr(utils, "record_fingerprint", sequence_free_fingerprint)
+        scoring_df = prepare_fold_scoring_df(table, predicted, "DMS Score", "random")
+
+        assert scoring_df.equals(expected)
+
+
 class TestCalculateSelectedMetrics:
     """Test calculate_selected_metrics function."""
 
@@ -204,6 +375,210 @@ class TestMetricsIntegration:
         )
 
 
+class TestParallelMetrics:
+    """Test (mode, fold) units calculated on a thread pool."""
+
+    def test_matches_sequential_layout(self, subsets_with_assays, predicted_dataset):
+        """Test that threaded results equal sequential ones, key order included."""
+        kwargs = dict(
+            selected_metrics=["spearman", "recovery_curve", "mse", "recovery"],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=1,
+            score_modes=["test", "train_available", "per_fold", "full_dataset"],
+            bootstrap=metric.BootstrapConfig(n_resamples=20),
+        )
+
+        sequential = calculate_metrics_by_mode(**kwargs)
+        threaded = calculate_metrics_by_mode(**kwargs, workers=4)
+
+        assert json.dumps(threaded) == json.dumps(sequential)
+
+    def test_metrics_share_ranks(
+        self, subsets_with_assays, predicted_dataset, monkeypatch
+    ):
+        """Test that the metrics of a (mode, fold) unit are ranked once."""
+        ranked = []
+        from_values = metric.Ranks.from_values
+
+        def counting_from_values(gt, pred):
+            ranked.append(len(gt))
+            return from_values(gt, pred)
+
+        monkeypatch.setattr(metric.Ranks, "from_values", counting_from_values)
+        calculate_metrics_by_mode(
+            selected_metrics=["spearman", "recovery", "ndcg", "auc"],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=1,
+            score_modes=["test", "train_available"],
+            workers=4,
+        )
+
+        assert len(ranked) == 2
+
+    def test_matches_sequential_with_ties(self, dataset_with_assay):
+        """Test that ranking metrics on tied values do not depend on threads."""
+        ground_truth = Subsets(
+            dataset=dataset_with_assay,
+            slices={
+                "random": [
+                    DatasetSlice(
+                        assays=[AssaySlice(records=[True] * 10)],
+                        metadata={"fold": 0.0, "top_k": 3},
+                    )
+                ]
+            },
+        )
+        predicted = dataset_with_assay.predictions_delta(
+            pl.DataFrame(
+                {
+                    "sequence": [f"ACDEF{aa}" for aa in "GHIKLMNPQR"],
+                    "DMS Score": [2.0, 1.0, 2.0, 1.0, 2.0, 1.0, 2.0, 1.0, 1.0, 2.0],
+                }
+            ),
+            target="DMS Score",
+        )
+        kwargs = dict(
+            selected_metrics=["spearman", "recovery", "ndcg", "auc"],
+            ground_truth=ground_truth,
+            predicted=predicted,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+            score_modes=["test"],
+        )
+
+        sequential = calculate_metrics_by_mode(**kwargs)
+        threaded = calculate_metrics_by_mode(**kwargs, workers=4)
+
+        assert sequential["test"]["recovery"] is not None
+        assert json.dumps(threaded) == json.dumps(sequential)
+
+    def test_evaluate_full_dataset(self, tmp_path, dataset_with_assay, predicted_dataset):
+        """Test that a plain dataset gives the same result with metric workers."""
+        (tmp_path / "gt").mkdir()
+        dataset_path = dataset_with_assay.dump(path=tmp_path / "gt")
+        pred_path = predicted_dataset.dump(path=tmp_path)
+        paths = []
+        for metric_workers in (None, 3):
+            paths.append(
+                evaluate(
+                    prediction_path=pred_path,
+                    metric_path=tmp_path / f"metrics_{metric_workers}.json",
+                    dataset_path=dataset_path,
+                    selected_metrics=["spearman", "pearson", "mae"],
+                    target="DMS Score",
+                    metric_workers=metric_workers,
+                )
+            )
+
+        assert paths[0].read_text() == paths[1].read_text()
+
+
+class TestStratifiedMetrics:
+    """Test metrics calculated per stratum."""
+
+    def test_derived_strata(self):
+        """Test mutation counts and positions against the wild type."""
+        df = pl.DataFrame({SEQUENCE: ["ACDE", "ACDF", "AXDF", "ACD"]})
+
+        strata = add_strata_columns(df, ["mutation_count", "position"], "ACDE")
+
+        assert strata["mutation_count"].to_list() == [0, 1, 2, None]
+        assert strata["position"].to_list() == [None, 4, None, None]
+
+    def test_requires_wild_type(self):
+        """Test that derived strata without a wild type raise an error."""
+        df = pl.DataFrame({SEQUENCE: ["ACDE"]})
+
+        with pytest.raises(ValueError, match="wild-type"):
+            add_strata_columns(df, ["position"])
+
+    def test_groups_match_filtered_frames(self, dataset_with_assay, predicted_dataset):
+        """Test that each group's metrics equal the metrics of its rows."""
+        scoring_df = add_strata_columns(
+            prepare_and_validate_scoring_df(
+                dataset_with_assay, predicted_dataset, "DMS Score"
+            ).with_columns(parity=pl.int_range(pl.len()) % 2),
+            ["parity", "mutation_count"],
+            "ACDEFG",
+        )
+
+        strata = metric.calculate_stratified_metrics(
+            ["spearman", "mae"], scoring_df, "DMS Score", ["parity", "mutation_count"]
+        )
+
+        assert list(strata["parity"]) == ["0", "1"]
+        odd = scoring_df.filter(pl.col("parity") == 1)
+        assert strata["parity"]["1"] == pytest.approx(
+            {
+                "n": 5,
+                **calculate_selected_metrics(
+                    ["spearman", "mae"],
+                    dataset_with_assay,
+                    predicted_dataset,
+                    "DMS Score",
+                    scoring_df=odd,
+                ),
+            }
+        )
+        assert strata["mutation_count"]["0"]["n"] == 1
+        assert strata["mutation_count"]["1"]["n"] == 9
+
+    def test_strata_mirror_modes(self, subsets_with_assays, predicted_dataset):
+        """Test that calculate_metrics_by_mode reports strata for every mode."""
+        table = dataclasses.replace(
+            GroundTruthTable.from_ground_truth(subsets_with_assays), wild_type="ACDEFG"
+        )
+
+        results = calculate_metrics_by_mode(
+            selected_metrics=["spearman"],
+            ground_truth=table,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+            score_modes=["test", "per_fold", "full_dataset"],
+            stratify_by=["mutation_count"],
+        )
+
+        assert list(results["strata"]) == ["test", "per_fold", "full_dataset"]
+        assert results["strata"]["test"]["mutation_count"] == {
+            "0": {"n": 1, "spearman": None},
+            "1": {"n": 1, "spearman": None},
+        }
+        assert results["strata"]["per_fold"]["fold_4"]["mutation_count"]["1"]["n"] == 2
+
+    def test_strata_derived_once(
+        self, subsets_with_assays, predicted_dataset, monkeypatch
+    ):
+        """Test that the stratum columns are derived once, not per mode and fold."""
+        derived = []
+
+        def counting_add_strata_columns(scoring_df, stratify_by, wild_type=None):
+            derived.append(len(scoring_df))
+            return add_strata_columns(scoring_df, stratify_by, wild_type)
+
+        monkeypatch.setattr(metric, "add_strata_columns", counting_add_strata_columns)
+        calculate_metrics_by_mode(
+            selected_metrics=["spearman"],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+            score_modes=["test", "train_available", "per_fold", "full_dataset"],
+            stratify_by=["var1"],
+        )
+
+        assert len(derived) == 2
+
+
 class TestEvaluateValidation:
     """Test validation in the evaluate function."""
 
@@ -240,3 +615,241 @@ class TestEvaluateValidation:
                 fold=fold,
                 target=target_value,
             )
+
+
+class TestEvaluateCombinations:
+    """Test evaluate with several splits and targets."""
+
+    @pytest.fixture
+    def archives(self, tmp_path, subsets_with_assays):
+        """Ground truth and perfect prediction archives."""
+        (tmp_path / "gt").mkdir()
+        return (
+            subsets_with_assays.dump(path=tmp_path / "gt"),
+            subsets_with_assays.dataset.dump(path=tmp_path),
+        )
+
+    def test_template_matches_single_evaluations(
+        self, tmp_path, archives, monkeypatch
+    ):
+        """Test that each combination file equals a separate evaluation."""
+        dataset_path, pred_path = archives
+        loads = []
+        load_ground_truth = metric.load_ground_truth
+
+        def counting_load(*args, **kwargs):
+            loads.append(args)
+            return load_ground_truth(*args, **kwargs)
+
+        monkeypatch.setattr(metric, "load_ground_truth", counting_load)
+        kwargs = dict(
+            prediction_path=pred_path,
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            fold="2",
+        )
+
+        paths = evaluate(
+            metric_path=tmp_path / "many" / "{split}" / "{target}.json",
+            split="all",
+            target=["DMS Score", "stability"],
+            **kwargs,
+        )
+
+        assert len(loads) == 1
+        assert paths == [
+            tmp_path / "many" / "random" / "DMS Score.json",
+            tmp_path / "many" / "random" / "stability.json",
+        ]
+        for path, target in zip(paths, ["DMS Score", "stability"]):
+            single_path = evaluate(
+                metric_path=tmp_path / "single.json",
+                split="random",
+                target=target,
+                **kwargs,
+            )
+            assert path.read_text() == single_path.read_text()
+
+    def test_template_with_colliding_paths_raises_error(self, tmp_path, archives):
+        """Test that a template mapping two targets to one path is rejected."""
+        dataset_path, pred_path = archives
+
+        with pytest.raises(ValueError, match="gives the same path"):
+            evaluate(
+                prediction_path=pred_path,
+                metric_path=tmp_path / "{split}.json",
+                dataset_path=dataset_path,
+                selected_metrics=["spearman"],
+                split="random",
+                target=["DMS Score", "stability"],
+                fold="0",
+            )
+        assert not (tmp_path / "random.json").exists()
+
+    def test_template_with_unknown_placeholder_raises_error(self, tmp_path, archives):
+        """Test that placeholders other than split and target are reported."""
+        dataset_path, pred_path = archives
+
+        with pytest.raises(ValueError, match="Invalid --metric-path template"):
+            evaluate(
+                prediction_path=pred_path,
+                metric_path=tmp_path / "{split}_{target}_{model}.json",
+                dataset_path=dataset_path,
+                selected_metrics=["spearman"],
+                split="random",
+                target="all",
+                fold="0",
+            )
+
+    def test_combined_document(self, tmp_path, archives):
+        """Test that a plain metric path holds all combinations."""
+        dataset_path, pred_path = archives
+
+        metric_path = evaluate(
+            prediction_path=pred_path,
+            metric_path=tmp_path / "combined.json",
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            split="random",
+            target="all",
+            fold="0",
+        )
+
+        results = json.loads(metric_path.read_text())["results"]
+        assert [r["metadata"]["target"] for r in results] == ["DMS Score", "stability"]
+        assert all(r["test"]["spearman"] == pytest.approx(1.0) for r in results)
+
+    def test_unknown_target(self, tmp_path, archives):
+        """Test that a target missing from the dataset raises an error."""
+        dataset_path, pred_path = archives
+
+        with pytest.raises(ValueError, match="Unknown target"):
+            evaluate(
+                prediction_path=pred_path,
+                metric_path=tmp_path / "{target}.json",
+                dataset_path=dataset_path,
+                split="random",
+                target=["DMS Score", "activity"],
+                fold="0",
+            )
+
+
+class TestEvaluateMany:
+    """Test the evaluate_many batch entry point."""
+
+    @pytest.fixture
+    def manifest_path(self, tmp_path, subsets_with_assays, predicted_dataset):
+        """A manifest scoring the same predictions for every test fold."""
+        dataset_path = subsets_with_assays.dump(path=tmp_path)
+        pred_path = predicted_dataset.dump(path=tmp_path)
+        manifest = pl.DataFrame(
+            {
+                "prediction_path": [str(pred_path)] * 3,
+                "dataset_path": [str(dataset_path)] * 3,
+                "split": ["random"] * 3,
+                "target": ["DMS Score"] * 3,
+                "fold": ["0", "1", "2"],
+                "metric_path": [
+                    str(tmp_path / "many" / f"fold{fold}.json") for fold in range(3)
+                ],
+                "model_name": ["model"] * 3,
+            }
+        )
+        path = tmp_path / "manifest.csv"
+        manifest.write_csv(path)
+        return path
+
+    def test_matches_evaluate(self, tmp_path, manifest_path):
+        """Test that every row gets the same JSON as evaluate writes."""
+        metric_paths = evaluate_many(manifest_path, selected_metrics=["spearman"])
+
+        for row, metric_path in zip(
+            pl.read_csv(manifest_path, infer_schema=False).to_dicts(), metric_paths
+        ):
+            expected_path = evaluate(
+                prediction_path=Path(row["prediction_path"]),
+                metric_path=tmp_path / "single" / Path(row["metric_path"]).name,
+                dataset_path=Path(row["dataset_path"]),
+                selected_metrics=["spearman"],
+                model_name=row["model_name"],
+                split=row["split"],
+                target=row["target"],
+                fold=row["fold"],
+            )
+
+            assert metric_path == Path(row["metric_path"])
+            assert metric_path.read_text() == expected_path.read_text()
+
+    def test_loads_ground_truth_once(self, manifest_path, monkeypatch):
+        """Test that rows sharing a dataset share one ground truth load."""
+        calls = []
+        load_ground_truth = metric.load_ground_truth
+
+        def counting_load(dataset_path, cache_dir=None):
+            calls.append(dataset_path)
+            return load_ground_truth(dataset_path, cache_dir)
+
+        monkeypatch.setattr(metric, "load_ground_truth", counting_load)
+
+        evaluate_many(manifest_path, selected_metrics=["spearman"], workers=3)
+
+        assert len(calls) == 1
+
+    def test_parses_cached_ground_truth_once(
+        self, tmp_path, manifest_path, monkeypatch
+    ):
+        """Test that tasks split over workers share one parse through the cache."""
+        calls = []
+        parse = metric._load_ground_truth_for_cache
+        monkeypatch.setattr(
+            metric,
+            "_load_ground_truth_for_cache",
+            lambda dataset_path: calls.append(dataset_path) or parse(dataset_path),
+        )
+        # Run the worker tasks on threads, so that their parses are counted
+        monkeypatch.setattr(
+            metric,
+            "ProcessPoolExecutor",
+            lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        )
+
+        metric_paths = evaluate_many(
+            manifest_path,
+            selected_metrics=["spearman"],
+            workers=3,
+            cache_dir=tmp_path / "cache",
+        )
+
+        assert len(calls) == 1
+        assert all(path.exists() for path in metric_paths)
+
+    def test_missing_columns_raises_error(self, tmp_path):
+        """Test that a manifest without the required columns is rejected."""
+        manifest_path = tmp_path / "manifest.csv"
+        pl.DataFrame({"prediction_path": ["predictions.pgdata"]}).write_csv(
+            manifest_path
+        )
+
+        with pytest.raises(ValueError, match="missing the columns"):
+            evaluate_many(manifest_path)
+
+
+class TestCommandLine:
+    """Test the evaluate and evaluate-many commands of main."""
+
+    @pytest.mark.parametrize("command", ["evaluate", "evaluate-many"])
+    def test_command_help(self, command, capsys):
+        """Test that every command has its own help."""
+        with pytest.raises(SystemExit) as exc_info:
+            metric.main([command, "--help"])
+
+        assert exc_info.value.code == 0
+        assert f"usage: python -m scripts.metric {command}" in capsys.readouterr().out
+
+    def test_missing_command_is_reported(self, capsys):
+        """Test that a command is required."""
+        with pytest.raises(SystemExit) as exc_info:
+            metric.main(["--prediction-path", "predictions.pgdata"])
+
+        assert exc_info.value.code == 2
+        assert "invalid choice" in capsys.readouterr().err
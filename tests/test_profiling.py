@@ -0,0 +1,150 @@
+import json
+
+import polars as pl
+import pytest
+
+from scripts import metric
+from scripts.metric import evaluate
+from scripts.profiling import Profiler, profile_stage, summarize_profiles
+from scripts.utils import aggregate_all_metrics
+
+
+@pytest.fixture
+def profiled_evaluation(tmp_path, subsets_with_assays, predicted_dataset):
+    """The profiler of one evaluation of a test fold, and the metric path."""
+    (tmp_path / "gt").mkdir()
+    metric_path = tmp_path / "dataset" / "model" / "DMS Score" / "random" / "fold0.json"
+    with Profiler() as profiler:
+        evaluate(
+            prediction_path=predicted_dataset.dump(path=tmp_path),
+            metric_path=metric_path,
+            dataset_path=subsets_with_assays.dump(path=tmp_path / "gt"),
+            selected_metrics=["spearman"],
+            split="random",
+            target="DMS Score",
+            fold="0",
+        )
+    return profiler, metric_path
+
+
+class TestProfiler:
+    """Test Profiler and profile_stage."""
+
+    def test_stage_without_profiler(self):
+        """Test that stages run unprofiled outside a Profiler."""
+        with profile_stage("join"):
+            pass
+
+        with Profiler() as profiler:
+            pass
+        assert list(profiler.stages) == ["total"]
+
+    def test_evaluation_stages(self, profiled_evaluation):
+        """Test that loading, alignment and kernels are recorded."""
+        profiler, _ = profiled_evaluation
+
+        stages = profiler.to_dict()["stages"]
+        assert {
+            "load_ground_truth",
+            "load_predictions",
+            "slice",
+            "to_df",
+            "join",
+            "kernel:spearman",
+            "total",
+        } <= set(stages)
+        assert stages["total"]["calls"] == 1
+        assert stages["kernel:spearman"]["peak_rss_bytes"] > 0
+
+    def test_summary_rolls_up_sidecars(self, tmp_path, profiled_evaluation):
+        """Test that the summary sums the stages of every sidecar."""
+        profiler, metric_path = profiled_evaluation
+        profiler.write(metric_path)
+        profiler.write(tmp_path / "other.json")
+
+        summary = summarize_profiles(tmp_path)
+
+        total = summary.row(by_predicate=pl.col("stage") == "total", named=True)
+        assert total["runs"] == 2
+        assert total["calls"] == 2
+
+    def test_aggregation_skips_sidecars(self, tmp_path, profiled_evaluation):
+        """Test that profile sidecars are not read as fold metric files."""
+        profiler, metric_path = profiled_evaluation
+        assert profiler.write(metric_path).name == "fold0.profile.json"
+
+        (output_path,) = aggregate_all_metrics(tmp_path)
+
+        assert "spearman" in json.loads(output_path.read_text())["test"]
+
+
+class TestProfileSidecars:
+    """Test where the entry points write their profile sidecars."""
+
+    @pytest.fixture
+    def archives(self, tmp_path, subsets_with_assays, predicted_dataset):
+        """Ground truth and prediction archives in separate directories."""
+        (tmp_path / "gt").mkdir()
+        return (
+            subsets_with_assays.dump(path=tmp_path / "gt"),
+            predicted_dataset.dump(path=tmp_path),
+        )
+
+    def test_template_writes_one_sidecar(self, tmp_path, archives):
+        """Test that a metric path template is profiled in its output directory."""
+        dataset_path, pred_path = archives
+        output_dir = tmp_path / "metric"
+        metric.main(
+            [
+                "evaluate",
+                "--prediction-path",
+                str(pred_path),
+                "--dataset-path",
+                str(dataset_path),
+                "--metric-path",
+                str(output_dir / "{split}" / "{target}.json"),
+                "--selected-metrics",
+                "spearman",
+                "--split",
+                "random",
+                "--target",
+                "all",
+                "--fold",
+                "0",
+                "--profile",
+            ]
+        )
+
+        sidecars = sorted(tmp_path.rglob("*.profile.json"))
+        assert sidecars == [output_dir / "random" / "evaluate.profile.json"]
+
+    def test_many_writes_sidecar_with_outputs(self, tmp_path, archives):
+        """Test that evaluate-many is not profiled next to its manifest."""
+        dataset_path, pred_path = archives
+        manifest_path = tmp_path / "manifest.csv"
+        pl.DataFrame(
+            {
+                "prediction_path": [str(pred_path)] * 2,
+                "dataset_path": [str(dataset_path)] * 2,
+                "split": ["random"] * 2,
+                "target": ["DMS Score"] * 2,
+                "fold": ["0", "1"],
+                "metric_path": [
+                    str(tmp_path / "metric" / f"fold{fold}.json") for fold in range(2)
+                ],
+            }
+        ).write_csv(manifest_path)
+
+        metric.main(
+            [
+                "evaluate-many",
+                "--manifest-path",
+                str(manifest_path),
+                "--selected-metrics",
+                "spearman",
+                "--profile",
+            ]
+        )
+
+        sidecars = sorted(tmp_path.rglob("*.profile.json"))
+        assert sidecars == [tmp_path / "metric" / "evaluate_many.profile.json"]
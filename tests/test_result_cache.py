@@ -0,0 +1,162 @@
+import json
+
+import polars as pl
+import pytest
+
+from scripts import metric
+from scripts.metric import evaluate, metric_source_digest
+from scripts.result_cache import MetricResultCache, result_cache_key
+
+
+@pytest.fixture
+def archives(tmp_path, subsets_with_assays, predicted_dataset):
+    """Ground truth and prediction archives in separate directories."""
+    (tmp_path / "gt").mkdir()
+    (tmp_path / "pred").mkdir()
+    return (
+        subsets_with_assays.dump(path=tmp_path / "gt"),
+        predicted_dataset.dump(path=tmp_path / "pred"),
+    )
+
+
+@pytest.fixture
+def scored_modes(monkeypatch):
+    """Record the score modes of every calculate_metrics_by_mode call."""
+    calls = []
+    calculate_metrics_by_mode = metric.calculate_metrics_by_mode
+
+    def recording_calculate(*args, **kwargs):
+        calls.append(args[6])
+        return calculate_metrics_by_mode(*args, **kwargs)
+
+    monkeypatch.setattr(metric, "calculate_metrics_by_mode", recording_calculate)
+    return calls
+
+
+class TestMetricResultCache:
+    """Test the metric result cache."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that a stored section is read back under its key."""
+        cache = MetricResultCache(tmp_path / "results")
+        key = result_cache_key(mode="test", fold=0, split="random")
+
+        assert cache.get(key) is None
+        cache.put(key, {"spearman": 0.5})
+        assert cache.get(key) == {"spearman": 0.5}
+
+    def test_fold_independent_keys(self):
+        """Test that only fold-independent sections share keys across folds."""
+        assert result_cache_key(mode="full_dataset", fold=0) == result_cache_key(
+            mode="full_dataset", fold=1
+        )
+        assert result_cache_key(mode="test", fold=0) != result_cache_key(
+            mode="test", fold=1
+        )
+
+    def test_metric_source_digest(self):
+        """Test that the digest depends on the selected metrics."""
+        assert metric_source_digest(["spearman"]) == metric_source_digest(["spearman"])
+        assert metric_source_digest(["spearman"]) != metric_source_digest(
+            ["recovery"]
+        )
+
+    def test_metric_source_digest_covers_shared_helpers(self, monkeypatch):
+        """Test that editing a shared scoring helper changes the digest."""
+        before = metric_source_digest(["spearman"])
+
+        monkeypatch.setattr(
+            metric,
+            "SHARED_SCORING_FUNCTIONS",
+            (*metric.SHARED_SCORING_FUNCTIONS, metric.kernel_mse),
+        )
+
+        assert metric_source_digest(["spearman"]) != before
+
+    def test_metric_source_digest_ignores_other_metrics(self, monkeypatch):
+        """Test that editing one metric leaves the digest of the others."""
+        before = metric_source_digest(["spearman"])
+
+        monkeypatch.setitem(metric._discover_metric_kernels(), "mse", metric.kernel_mae)
+
+        assert metric_source_digest(["spearman"]) == before
+
+
+class TestEvaluateWithResultCache:
+    """Test evaluate with a metric result cache."""
+
+    def test_unchanged_inputs_are_not_rescored(self, tmp_path, archives, scored_modes):
+        """Test that a repeated evaluation is served from the cache."""
+        dataset_path, pred_path = archives
+        kwargs = dict(
+            prediction_path=pred_path,
+            dataset_path=dataset_path,
+            selected_metrics=["spearman", "mse"],
+            model_name="model",
+            split="random",
+            target="DMS Score",
+            fold="0",
+            result_cache_dir=tmp_path / "results",
+        )
+
+        evaluate(metric_path=tmp_path / "first.json", **kwargs)
+        evaluate(metric_path=tmp_path / "second.json", **kwargs)
+
+        assert len(scored_modes) == 1
+        assert (tmp_path / "first.json").read_text() == (
+            tmp_path / "second.json"
+        ).read_text()
+
+    def test_full_dataset_is_computed_once(self, tmp_path, archives, scored_modes):
+        """Test that fold jobs reuse the fold-independent modes."""
+        dataset_path, pred_path = archives
+        for fold in range(2):
+            evaluate(
+                prediction_path=pred_path,
+                metric_path=tmp_path / f"fold{fold}.json",
+                dataset_path=dataset_path,
+                selected_metrics=["spearman"],
+                split="random",
+                target="DMS Score",
+                fold=str(fold),
+                score_modes=["test", "full_dataset"],
+                result_cache_dir=tmp_path / "results",
+            )
+
+        assert scored_modes == [["test", "full_dataset"], ["test"]]
+        fold1 = json.loads((tmp_path / "fold1.json").read_text())
+        assert list(fold1) == ["test", "full_dataset", "metadata"]
+        assert fold1["metadata"]["test_folds"] == [1]
+
+    def test_changed_predictions_are_rescored(
+        self, tmp_path, archives, predicted_dataset, scored_modes
+    ):
+        """Test that a new prediction archive misses the cache."""
+        dataset_path, pred_path = archives
+        kwargs = dict(
+            metric_path=tmp_path / "metrics.json",
+            dataset_path=dataset_path,
+            selected_metrics=["spearman"],
+            split="random",
+            target="DMS Score",
+            fold="0",
+            result_cache_dir=tmp_path / "results",
+        )
+
+        evaluate(prediction_path=pred_path, **kwargs)
+        reversed_predictions = predicted_dataset.predictions_delta(
+            pl.DataFrame(
+                {
+                    "sequence": predicted_dataset.to_df()["sequence"],
+                    "DMS Score": list(range(10, 0, -1)),
+                }
+            ),
+            target="DMS Score",
+        )
+        evaluate(
+            prediction_path=reversed_predictions.dump(path=tmp_path), **kwargs
+        )
+
+        assert len(scored_modes) == 2
+        metrics = json.loads((tmp_path / "metrics.json").read_text())
+        assert metrics["test"]["spearman"] == pytest.approx(-1.0)
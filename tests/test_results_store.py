@@ -0,0 +1,156 @@
+import json
+
+import polars as pl
+import pytest
+
+from scripts.results_store import ResultsStore
+from scripts.utils import generate_metrics_csv
+
+
+def result_rows(game: str, model: str, spearman: list[float]) -> pl.DataFrame:
+    """Result rows of one game and model on datasets "d0", "d1", ..."""
+    return pl.DataFrame(
+        {
+            "game": game,
+            "model": model,
+            "dataset": [f"d{i}" for i in range(len(spearman))],
+            "split": "random",
+            "target": "DMS Score",
+            "test_spearman": spearman,
+        }
+    )
+
+
+class TestResultsStore:
+    """Test ResultsStore."""
+
+    def test_upsert_replaces_keys(self, tmp_path):
+        """Test that rows with a stored key replace the stored row."""
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(result_rows("supervised", "pls", [0.1, 0.2]))
+
+        written = store.upsert(result_rows("supervised", "pls", [0.5]))
+
+        assert written == [store.partition_path("supervised", "pls")]
+        assert store.query()["test_spearman"].to_list() == [0.5, 0.2]
+        assert len(store.index()) == 2
+
+    def test_upsert_touches_only_new_partitions(self, tmp_path):
+        """Test that other partitions are not rewritten."""
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(result_rows("supervised", "pls", [0.1]))
+        untouched = store.partition_path("supervised", "pls")
+        mtime = untouched.stat().st_mtime_ns
+
+        store.upsert(result_rows("zero_shot", "esm", [0.3]))
+
+        assert untouched.stat().st_mtime_ns == mtime
+        assert store.query()["model"].to_list() == ["pls", "esm"]
+
+    def test_query_reads_matching_partitions(self, tmp_path):
+        """Test that a query does not read partitions without matching keys."""
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(
+            pl.concat(
+                [
+                    result_rows("supervised", "pls", [0.1, 0.2]),
+                    result_rows("supervised", "kermut", [0.3]),
+                ]
+            )
+        )
+        store.partition_path("supervised", "kermut").unlink()
+
+        rows = store.query(model="pls", dataset="d1")
+
+        assert rows["test_spearman"].to_list() == [0.2]
+
+    def test_unknown_filter_raises(self, tmp_path):
+        """Test that queries only filter on key columns."""
+        with pytest.raises(ValueError, match="Unknown result key columns"):
+            ResultsStore(tmp_path).query(test_spearman=0.1)
+
+
+class TestGenerateMetricsCsv:
+    """Test generate_metrics_csv with a results store."""
+
+    def test_exports_csv_from_store(self, tmp_path):
+        """Test that an existing CSV seeds the store and new rows are merged."""
+        output_path = tmp_path / "metrics.csv"
+        result_rows("zero_shot", "esm", [0.3]).write_csv(output_path)
+        metric_dir = tmp_path / "metric"
+        metric_dir.mkdir()
+        (metric_dir / "d0_pls_random_DMS Score_aggregated.json").write_text(
+            json.dumps(
+                {
+                    "test": {"spearman": 0.7},
+                    "metadata": {
+                        "model": "pls",
+                        "dataset": "d0",
+                        "split": "random",
+                        "target": "DMS Score",
+                    },
+                }
+            )
+        )
+
+        generate_metrics_csv(
+            metric_dir, output_path, "supervised", store_dir=tmp_path / "results"
+        )
+
+        metrics = pl.read_csv(output_path)
+        assert metrics["game"].to_list() == ["supervised", "zero_shot"]
+        assert metrics["test_spearman"].to_list() == [0.7, 0.3]
+        assert ResultsStore(tmp_path / "results").query(game="zero_shot").height == 1
+
+    def test_pulled_csv_is_not_overwritten(self, tmp_path):
+        """Test that rows of a newer CSV are reconciled into the store."""
+        output_path = tmp_path / "metrics.csv"
+        metric_dir = tmp_path / "metric"
+        metric_dir.mkdir()
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(result_rows("zero_shot", "esm", [0.3, 0.4]))
+        store.export_csv(output_path)
+        # A pull brings a changed value and a new model
+        pl.concat(
+            [
+                result_rows("zero_shot", "esm", [0.3, 0.9]),
+                result_rows("zero_shot", "vespa", [0.5]),
+            ]
+        ).write_csv(output_path)
+
+        generate_metrics_csv(
+            metric_dir, output_path, "zero_shot", store_dir=store.directory
+        )
+
+        metrics = pl.read_csv(output_path)
+        assert metrics["model"].to_list() == ["esm", "esm", "vespa"]
+        assert metrics["test_spearman"].to_list() == [0.3, 0.9, 0.5]
+
+    def test_exported_csv_is_not_reconciled(self, tmp_path, monkeypatch):
+        """Test that the store's own unchanged export is not read back."""
+        output_path = tmp_path / "metrics.csv"
+        metric_dir = tmp_path / "metric"
+        metric_dir.mkdir()
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(result_rows("zero_shot", "esm", [0.3]))
+        store.export_csv(output_path)
+
+        def failing_reconcile(self, csv_path):
+            raise AssertionError("unchanged export reconciled")
+
+        monkeypatch.setattr(ResultsStore, "reconcile_csv", failing_reconcile)
+        generate_metrics_csv(
+            metric_dir, output_path, "zero_shot", store_dir=store.directory
+        )
+
+        assert store.is_exported(output_path)
+        assert pl.read_csv(output_path)["test_spearman"].to_list() == [0.3]
+
+    def test_unchanged_csv_rewrites_nothing(self, tmp_path):
+        """Test that reconciling the store's own export is a no-op."""
+        output_path = tmp_path / "metrics.csv"
+        store = ResultsStore(tmp_path / "results")
+        store.upsert(result_rows("zero_shot", "esm", [0.3, None]))
+        store.export_csv(output_path)
+
+        assert store.reconcile_csv(output_path) == []
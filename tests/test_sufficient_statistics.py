@@ -0,0 +1,132 @@
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+from scripts.metric import calculate_metrics_by_mode, calculate_selected_metrics
+from scripts.sufficient_statistics import DECOMPOSABLE_METRICS, SufficientStatistics
+from scripts.utils import aggregate_metrics
+
+
+class TestSufficientStatistics:
+    """Test SufficientStatistics."""
+
+    @pytest.fixture
+    def values(self) -> tuple[np.ndarray, np.ndarray]:
+        """Ground truth and noisy predictions for 300 variants."""
+        rng = np.random.default_rng(0)
+        gt = rng.normal(loc=5.0, size=300)
+        pred = gt + rng.normal(size=300)
+        return gt, pred
+
+    def test_metrics_match_numpy(self, values):
+        """Test that the metrics equal their direct computation."""
+        gt, pred = values
+
+        metrics = SufficientStatistics.from_values(gt, pred).metrics()
+
+        assert metrics["mse"] == pytest.approx(np.mean((pred - gt) ** 2))
+        assert metrics["mae"] == pytest.approx(np.mean(np.abs(pred - gt)))
+        assert metrics["pearson"] == pytest.approx(np.corrcoef(gt, pred)[0, 1])
+        assert metrics["r2"] == pytest.approx(
+            1 - np.sum((pred - gt) ** 2) / np.sum((gt - gt.mean()) ** 2)
+        )
+
+    def test_merged_folds_match_union(self, values):
+        """Test that merging fold statistics equals the statistics of all rows."""
+        gt, pred = values
+        bounds = [0, 7, 120, 121, 300]
+
+        merged = SufficientStatistics.merge_all(
+            SufficientStatistics.from_values(gt[start:end], pred[start:end])
+            for start, end in zip(bounds, bounds[1:])
+        )
+        expected = SufficientStatistics.from_values(gt, pred)
+
+        for field, value in expected.to_dict().items():
+            assert getattr(merged, field) == pytest.approx(value)
+
+    def test_by_fold_matches_from_values(self, values):
+        """Test that the grouped pass gives the statistics of every fold."""
+        gt, pred = values
+        folds = np.arange(len(gt)) % 3
+        df = pl.DataFrame({"DMS Score": gt, "DMS Score_pred": pred, "fold": folds})
+
+        by_fold = SufficientStatistics.by_fold(df, "DMS Score")
+
+        for fold_idx in range(3):
+            expected = SufficientStatistics.from_values(
+                gt[folds == fold_idx], pred[folds == fold_idx]
+            )
+            for field, value in expected.to_dict().items():
+                assert getattr(by_fold[fold_idx], field) == pytest.approx(value)
+
+    def test_undefined_metrics_are_none(self):
+        """Test that metrics without records or variance are None."""
+        assert SufficientStatistics().metrics() == dict.fromkeys(DECOMPOSABLE_METRICS)
+        assert SufficientStatistics.from_values(
+            np.ones(3), np.arange(3.0)
+        ).metrics(["pearson", "r2"]) == {"pearson": None, "r2": None}
+
+
+class TestMergedScoring:
+    """Test scoring modes built from fold statistics."""
+
+    def test_train_available_matches_rows(self, subsets_with_assays, predicted_dataset):
+        """Test that merged train_available metrics equal a row-level recompute."""
+        results = calculate_metrics_by_mode(
+            selected_metrics=["spearman", *DECOMPOSABLE_METRICS],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            test_fold=0,
+        )
+        expected = calculate_selected_metrics(
+            selected_metrics=["spearman", *DECOMPOSABLE_METRICS],
+            ground_truth=subsets_with_assays,
+            predicted=predicted_dataset,
+            target="DMS Score",
+            split="random",
+            fold=[1, 2, 3, 4],
+        )
+
+        assert results["train_available"] == pytest.approx(expected)
+        assert results["train_available"]["mse"] == pytest.approx(0.01)
+        assert set(results["sufficient_statistics"]) == {
+            f"fold_{fold_idx}" for fold_idx in range(5)
+        }
+        assert results["sufficient_statistics"]["fold_2"]["n"] == 2
+
+    def test_aggregate_reports_pooled_metrics(
+        self, tmp_path, subsets_with_assays, predicted_dataset
+    ):
+        """Test that aggregation pools the test folds into dataset-level metrics."""
+        fold_dir = tmp_path / "metrics" / "dataset" / "model" / "DMS Score" / "random"
+        fold_dir.mkdir(parents=True)
+        for test_fold in range(5):
+            results = calculate_metrics_by_mode(
+                selected_metrics=["pearson", "mse"],
+                ground_truth=subsets_with_assays,
+                predicted=predicted_dataset,
+                target="DMS Score",
+                split="random",
+                test_fold=test_fold,
+            )
+            (fold_dir / f"fold{test_fold}.json").write_text(json.dumps(results))
+        output_path = tmp_path / "aggregated.json"
+
+        aggregate_metrics(
+            tmp_path / "metrics", "dataset", "model", "random", "DMS Score", output_path
+        )
+
+        aggregated = json.loads(output_path.read_text())
+        expected = calculate_selected_metrics(
+            selected_metrics=["pearson", "mse"],
+            ground_truth=subsets_with_assays.dataset,
+            predicted=predicted_dataset,
+            target="DMS Score",
+        )
+        assert aggregated["pooled"] == pytest.approx(expected)
+        assert aggregated["sufficient_statistics"]["pooled"]["n"] == 10